@@ -17,24 +17,23 @@ from widgets.behavior_flow.layout import layout as flow_layout
 from widgets.behavior_flow.callbacks import register_callbacks as flow_callbacks
 
 # --- Utils & Preview-Bilder ---
-from widgets.utils import load_behavior_data
-from widgets.behavior_position.plot_zone_overview import generate_zone_overview_image
+from widgets.catalog import latest_date
+from widgets.image_store import image_src, is_image_src, register_image_route
+from widgets.lazy import lazy_callable
+from widgets.metrics import instrument_app, register_metrics_route, timed
+from widgets.preview_cache import get_previews
 
-# optionale Preview-Funktionen
-try:
-    from widgets.pig_behavior.plot_behavior_heatmap import generate_behavior_heatmap
-except Exception:
-    generate_behavior_heatmap = None
+PREVIEW_FOLDER = "data/action_detection/loaded"
+PREVIEW_WAIT_S = 60     # erster Besuch: so lange auf die Vorschau warten, danach Platzhalter
 
-try:
-    from widgets.activity_budget.plot_budget import generate_aggregated_plot
-except Exception:
-    generate_aggregated_plot = None
-
-try:
-    from widgets.behavior_flow.plot_behavior_flow import generate_behavior_dfg
-except Exception:
-    generate_behavior_dfg = None
+# Preview-Funktionen: Import (matplotlib, scikit-learn, networkx, plotly.express) erst beim
+# ersten Rendern der Vorschau; Importfehler landen dort als Fehlertext in der Karte
+generate_zone_overview_image = lazy_callable("widgets.behavior_position.plot_zone_overview",
+                                             "generate_zone_overview_image")
+generate_behavior_heatmap = lazy_callable("widgets.pig_behavior.plot_behavior_heatmap",
+                                          "generate_behavior_heatmap")
+generate_aggregated_plot = lazy_callable("widgets.activity_budget.plot_budget", "generate_aggregated_plot")
+generate_behavior_dfg = lazy_callable("widgets.behavior_flow.plot_behavior_flow", "generate_behavior_dfg")
 
 
 # === Dash App ===
@@ -57,10 +56,7 @@ TABS = {
 # === Helpers ===
 def _latest_date(folder: str) -> str | None:
     try:
-        df = load_behavior_data(folder)
-        if df is None or df.empty:
-            return None
-        return str(max(df["date"]))
+        return latest_date(folder)
     except Exception:
         return None
 
@@ -101,72 +97,72 @@ def _preview_card(title: str, body_component, href: str):
     )
 
 
+def _image_body(img_src):
+    if is_image_src(img_src):
+        return html.Img(
+            src=image_src(img_src),
+            style={"maxWidth": "100%", "height": "200px", "objectFit": "contain", "borderRadius": "10px"},
+        )
+    return html.P(img_src, style={"color": "red"})
+
+
+def _card(tab: str, render_body):
+    """Karte für TABS[tab]; Fehler beim Rendern landen als Text in der Karte."""
+    try:
+        body = render_body()
+    except Exception as e:
+        body = html.P(f"Fehler: {e}", style={"color": "red"})
+    return _preview_card(TABS[tab]["label"], body, TABS[tab]["path"])
+
+
+# 1) Verhalten (Heatmap-Vorschau)
+def _pig_body():
+    return _small_graph(generate_behavior_heatmap(PREVIEW_FOLDER, behavior="feeding"))
+
+
+# 2) Verhaltenspositionen (Stallübersicht)
+def _position_body():
+    day = _latest_date(PREVIEW_FOLDER)
+    if not day:
+        return _placeholder_box("Keine Tagesdaten gefunden.")
+    return _image_body(generate_zone_overview_image(
+        PREVIEW_FOLDER, day, behavior_filter=None, n_clusters=4, fit_sample_fraction=0.20
+    ))
+
+
+# 3) Aktivitätsbudget (Aggregat)
+def _budget_body():
+    return _image_body(generate_aggregated_plot())
+
+
+# 4) Prozesspfade (DFG)
+def _flow_body():
+    day = _latest_date(PREVIEW_FOLDER)
+    if not day:
+        return _placeholder_box()
+    fig, _ = generate_behavior_dfg(PREVIEW_FOLDER, day)
+    return _small_graph(fig)
+
+
+PREVIEW_JOBS = {
+    "pig":      timed("preview.pig", "preview")(lambda: _card("pig", _pig_body)),
+    "position": timed("preview.position", "preview")(lambda: _card("position", _position_body)),
+    "budget":   timed("preview.budget", "preview")(lambda: _card("budget", _budget_body)),
+    "flow":     timed("preview.flow", "preview")(lambda: _card("flow", _flow_body)),
+}
+
+
 def generate_preview_cards():
-    """Erstellt vier Vorschaukarten (eine pro Modul)."""
-    data_folder = "data/action_detection/loaded"
-    day = _latest_date(data_folder)
-
-    cards = []
-
-    # 1) Verhalten (Heatmap-Vorschau)
-    if generate_behavior_heatmap is not None:
-        try:
-            fig = generate_behavior_heatmap(data_folder, behavior="feeding")
-            body = _small_graph(fig)
-        except Exception as e:
-            body = html.P(f"Fehler: {e}", style={"color": "red"})
-    else:
-        body = _placeholder_box()
-    cards.append(_preview_card(TABS["pig"]["label"], body, TABS["pig"]["path"]))
-
-    # 2) Verhaltenspositionen (Stallübersicht)
-    if day:
-        try:
-            img_src = generate_zone_overview_image(
-                data_folder, day, behavior_filter=None, n_clusters=4, fit_sample_fraction=0.20
-            )
-            if isinstance(img_src, str) and img_src.startswith("data:image"):
-                body = html.Img(
-                    src=img_src,
-                    style={"maxWidth": "100%", "height": "200px", "objectFit": "contain", "borderRadius": "10px"},
-                )
-            else:
-                body = html.P(img_src, style={"color": "red"})
-        except Exception as e:
-            body = html.P(f"Fehler: {e}", style={"color": "red"})
-    else:
-        body = _placeholder_box("Keine Tagesdaten gefunden.")
-    cards.append(_preview_card(TABS["position"]["label"], body, TABS["position"]["path"]))
-
-    # 3) Aktivitätsbudget (Aggregat)
-    if generate_aggregated_plot is not None:
-        try:
-            img_src = generate_aggregated_plot()
-            if isinstance(img_src, str) and img_src.startswith("data:image"):
-                body = html.Img(
-                    src=img_src,
-                    style={"maxWidth": "100%", "height": "200px", "objectFit": "contain", "borderRadius": "10px"},
-                )
-            else:
-                body = html.P(img_src, style={"color": "red"})
-        except Exception as e:
-            body = html.P(f"Fehler: {e}", style={"color": "red"})
-    else:
-        body = _placeholder_box()
-    cards.append(_preview_card(TABS["budget"]["label"], body, TABS["budget"]["path"]))
-
-    # 4) Prozesspfade (DFG)
-    if generate_behavior_dfg is not None and day:
-        try:
-            fig, _ = generate_behavior_dfg(data_folder, day)
-            body = _small_graph(fig)
-        except Exception as e:
-            body = html.P(f"Fehler: {e}", style={"color": "red"})
-    else:
-        body = _placeholder_box()
-    cards.append(_preview_card(TABS["flow"]["label"], body, TABS["flow"]["path"]))
-
-    return cards
+    """
+    Vier Vorschaukarten (eine pro Modul) aus widgets.preview_cache: pro Datenversion im
+    Hintergrund gerendert (parallel), bei neuen Daten wird bis zur Neuberechnung die alte
+    Fassung gezeigt. Nur beim allerersten Aufruf wird bis PREVIEW_WAIT_S gewartet.
+    """
+    results = get_previews(PREVIEW_FOLDER, PREVIEW_JOBS, wait_s=PREVIEW_WAIT_S)
+    if results is None:
+        return [_preview_card(TABS[tab]["label"], _placeholder_box("Vorschau wird berechnet …"),
+                              TABS[tab]["path"]) for tab in PREVIEW_JOBS]
+    return [results[tab] for tab in PREVIEW_JOBS]
 
 
 def preview_layout():
@@ -215,5 +211,12 @@ position_callbacks(app)
 budget_callbacks(app)
 flow_callbacks(app)
 
+# Gerenderte PNGs (matplotlib) als /img/<sha1>.png mit ETag/Cache-Control statt Data-URI
+register_image_route(app)
+
+# Laufzeit je Callback (Stufen, Zeilen, Cache, Antwortgröße) unter /metrics (Prometheus-Text)
+instrument_app(app)
+register_metrics_route(app.server, folders=[PREVIEW_FOLDER])
+
 if __name__ == "__main__":
     app.run(debug=True)
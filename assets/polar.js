@@ -0,0 +1,64 @@
+/*
+ * Polarplots "Verhaltensverteilung nach Uhrzeit" im Browser.
+ *
+ * Der Server schickt pro Datum einmal die Zählungen Stunde × Verhalten (dcc.Store
+ * "polar-counts", siehe widgets/pig_behavior/plot_behavior_polar.py: polar_counts).
+ * Stundenslider und Linear/Log-Umschalter bauen die Figuren hier ohne Server-Roundtrip,
+ * auf Basis der mitgeschickten px.bar_polar-Vorlage (gleiches Aussehen wie serverseitig).
+ */
+(function () {
+    function clone(obj) {
+        return JSON.parse(JSON.stringify(obj));
+    }
+
+    function polarFigure(data, counts, hour, titlePrefix, scale) {
+        var total = counts ? counts.reduce(function (a, b) { return a + b; }, 0) : 0;
+        if (!total) {
+            // wie px.bar_polar(title=...) ohne Daten
+            return {
+                data: [{type: "barpolar", subplot: "polar", showlegend: false}],
+                layout: {
+                    template: data.base.layout.template,
+                    polar: {angularaxis: {direction: "clockwise", rotation: 90}},
+                    title: {text: titlePrefix + " um " + hour + ":00 Uhr – keine Daten"}
+                }
+            };
+        }
+
+        var layout = clone(data.base.layout);
+        var trace = clone(data.base.trace);
+        trace.r = counts;
+        trace.theta = data.behaviors;
+        trace.marker.color = counts;
+        trace.hovertext = data.behaviors.map(function (b, i) {
+            var pct = Math.round(counts[i] / total * 1000) / 10;
+            return b + ": " + counts[i] + " (" + pct.toFixed(1) + "%)";
+        });
+
+        layout.title = {text: titlePrefix + " um " + hour + ":00 Uhr"};
+        if (scale === "logarithmic") {
+            layout.polar.radialaxis.type = "log";
+        } else {
+            delete layout.polar.radialaxis.type;
+        }
+        return {data: [trace], layout: layout};
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        polar: {
+            update: function (data, hour, scale) {
+                if (!data) {
+                    var skip = window.dash_clientside.no_update;
+                    return [skip, skip];
+                }
+                var row = data.hours.indexOf(hour);
+                return [
+                    polarFigure(data, row >= 0 ? data.all[row] : null, hour,
+                                "Aggregierte Verteilung", scale),
+                    polarFigure(data, row >= 0 ? data.day[row] : null, hour,
+                                "Verteilung am " + data.date, scale)
+                ];
+            }
+        }
+    });
+})();
@@ -0,0 +1,342 @@
+"""
+Benchmark-Suite: alle generate_*-Funktionen, die layout()-Funktionen der Seiten und
+load_behavior_data auf synthetischen Daten mehrerer Größen; Ergebnisse als JSON pro Commit.
+
+Ablauf:
+- Pro Größe (Buchten × Tage × fps) erzeugt benchmarks/make_synthetic_data.py die Pickles und
+  das XES unter --data-dir/<größe> (vorhandene Daten mit gleicher Spezifikation werden
+  wiederverwendet). Die Sidecars/der Katalog (<ordner>/_derived) werden vor jedem Lauf
+  gelöscht, der erste Aufruf misst also auch das Einlesen.
+- Jede Größe läuft in einem eigenen Python-Prozess (frische Caches, importierte Module).
+  Dort werden PKL_FOLDER/DEFAULT_XES_PATH der Widgets auf die synthetischen Daten gesetzt,
+  Bilder landen in einem temporären image_store-Ordner.
+- Pro Fall: "first" = erster Aufruf im Prozess (Laden, Ableitungen, Zonenmodelle),
+  danach --repeat Aufrufe ("median", "min"); der Figuren-Cache wird über __wrapped__ umgangen,
+  die Daten-Caches (frame_store, behavior_cube, Tageszusammenfassungen) bleiben warm.
+- Ausgabe: benchmarks/results/<zeitstempel>_<commit>.json mit Commit, Dirty-Flag, Python-
+  Version, CPUs und pro Größe Zeilenzahl, Generierungszeit und Zeiten je Fall.
+- --compare ALT.json NEU.json stellt zwei Läufe gegenüber (Faktor NEU/ALT je Fall).
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_suite.py [--sizes small medium large 2x5x0.5] [--repeat 3]
+        [--only position] [--skip zone_map] [--data-dir data/synthetic] [--out DATEI]
+    python benchmarks/bench_suite.py --compare benchmarks/results/A.json benchmarks/results/B.json
+
+Größen: small = 1×3×0.5, medium = 4×7×0.5, large = 8×14×1 (Buchten×Tage×fps) oder "PxDxF".
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SIZES = {"small": (1, 3, 0.5), "medium": (4, 7, 0.5), "large": (8, 14, 1.0)}
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+# DBSCAN (generate_zone_map_image_for_date) braucht bei dichten Punktwolken Speicher
+# quadratisch in den Punkten eines Tages (~90k Frames: > 5 GB)
+MAX_ZONE_MAP_ROWS = 30_000
+
+# Module mit eigener PKL_FOLDER-Konstante
+FOLDER_MODULES = [
+    "widgets.activity_budget.layout",
+    "widgets.activity_budget.plot_budget",
+    "widgets.behavior_flow.callbacks",
+    "widgets.behavior_flow.layout",
+    "widgets.behavior_flow.plot_behavior_flow",
+    "widgets.behavior_position.callbacks",
+    "widgets.pig_behavior.callbacks",
+    "widgets.pig_behavior.layout",
+    "widgets.pig_behavior.plot_behavior_heatmap",
+    "widgets.pig_behavior.plot_behavior_polar",
+]
+
+
+def parse_size(name: str) -> tuple:
+    """'medium' oder '4x7x0.5' -> (Buchten, Tage, fps)."""
+    if name in SIZES:
+        return SIZES[name]
+    try:
+        pens, days, fps = name.lower().split("x")
+        return int(pens), int(days), float(fps)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"unbekannte Größe {name!r} (small/medium/large oder PxDxF)")
+
+
+def size_label(size: tuple) -> str:
+    return "{}x{}x{:g}".format(*size)
+
+
+def prepare_data(data_dir: str, size: tuple, seed: int) -> dict:
+    """Erzeugt (oder verwendet) die Daten einer Größe; Rückgabe wie generate_dataset."""
+    from benchmarks.make_synthetic_data import generate_dataset
+
+    out = os.path.join(data_dir, size_label(size))
+    spec_path = os.path.join(out, "spec.json")
+    spec = {"pens": size[0], "days": size[1], "fps": size[2], "seed": seed}
+    try:
+        with open(spec_path, "r", encoding="utf-8") as fh:
+            stored = json.load(fh)
+        if stored["spec"] == spec:
+            return stored["info"]
+    except (OSError, ValueError, KeyError):
+        pass
+    shutil.rmtree(out, ignore_errors=True)
+    info = generate_dataset(out, *size, seed=seed)
+    with open(spec_path, "w", encoding="utf-8") as fh:
+        json.dump({"spec": spec, "info": info}, fh)
+    return info
+
+
+# ---------------------------------------------------------------- Worker (ein Prozess je Größe)
+
+def build_cases(folder: str, xes_path: str, day: str) -> list:
+    """[(Name, Funktion ohne Argumente)] am Tag day; die Konstanten der Widgets zeigen danach auf folder."""
+    import importlib
+
+    for name in FOLDER_MODULES:
+        importlib.import_module(name).PKL_FOLDER = folder
+    from widgets.pig_behavior import layout as pig_layout
+    pig_layout.DEFAULT_XES_PATH = xes_path
+
+    from widgets.activity_budget import plot_budget
+    from widgets.activity_budget.layout import layout as budget_layout
+    from widgets.behavior_flow.layout import layout as flow_layout
+    from widgets.behavior_flow.plot_behavior_flow import generate_behavior_dfg
+    from widgets.behavior_flow.plot_top_sequences import get_top_behavior_sequences
+    from widgets.behavior_position.layout import layout as position_layout
+    from widgets.behavior_position.learn_zones_from_behavior import generate_zone_map_image_for_date
+    from widgets.behavior_position.plot_position_image import generate_behavior_position_image
+    from widgets.behavior_position.plot_spatial_hour_heatmap import generate_spatial_hour_heatmap
+    from widgets.behavior_position.plot_zone_duration import generate_zone_duration_image
+    from widgets.behavior_position.plot_zone_hour_heatmap import generate_zone_hour_heatmap
+    from widgets.behavior_position.plot_zone_overview import generate_zone_overview_image
+    from widgets.pig_behavior.plot_behavior_bar import generate_behavior_bar_plot
+    from widgets.pig_behavior.plot_behavior_heatmap import (generate_behavior_heatmap,
+                                                            generate_behavior_heatmap_for_day)
+    from widgets.pig_behavior.plot_behavior_polar import generate_two_polar_charts, polar_counts
+    from widgets.pig_behavior.thresholds import get_behavior_thresholds
+    from widgets.utils import BEHAVIORS, load_behavior_data
+
+    def raw(func):
+        return getattr(func, "__wrapped__", func)
+
+    day_rows = int((load_behavior_data(folder)["date"].astype(str) == day).sum())
+
+    def zone_map():
+        if day_rows > MAX_ZONE_MAP_ROWS:
+            return f"übersprungen ({day_rows} > {MAX_ZONE_MAP_ROWS} Frames am Tag)"
+        return generate_zone_map_image_for_date(load_behavior_data(folder), day)
+
+    b = "feeding"
+    return [
+        ("layout.pig_behavior", pig_layout.layout),
+        ("layout.activity_budget", budget_layout),
+        ("layout.behavior_flow", flow_layout),
+        ("layout.behavior_position", position_layout),
+        ("pig.behavior_heatmap", lambda: raw(generate_behavior_heatmap)(folder, b)),
+        ("pig.behavior_heatmap_for_day", lambda: raw(generate_behavior_heatmap_for_day)(day)),
+        ("pig.two_polar_charts", lambda: raw(generate_two_polar_charts)(12, day, "linear")),
+        ("pig.polar_counts", lambda: raw(polar_counts)(day)),
+        ("pig.behavior_bar", lambda: raw(generate_behavior_bar_plot)(
+            xes_path, b, get_behavior_thresholds(xes_path, BEHAVIORS))),
+        ("budget.single_day_plot", lambda: raw(plot_budget.generate_single_day_plot)(day)),
+        ("budget.aggregated_plot", lambda: raw(plot_budget.generate_aggregated_plot)()),
+        ("budget.single_day_figure", lambda: raw(plot_budget.generate_single_day_figure)(day)),
+        ("budget.aggregated_figure", lambda: raw(plot_budget.generate_aggregated_figure)()),
+        ("budget.behavior_heatmap", lambda: raw(plot_budget.generate_behavior_heatmap)(b)),
+        ("flow.behavior_dfg", lambda: raw(generate_behavior_dfg)(folder, day)),
+        ("flow.top_sequences", lambda: raw(get_top_behavior_sequences)(folder, day)),
+        ("position.density", lambda: raw(generate_behavior_position_image)(folder, b, day)),
+        ("position.scatter", lambda: raw(generate_behavior_position_image)(folder, b, day, mode="scatter")),
+        ("position.spatial_hour_heatmap", lambda: raw(generate_spatial_hour_heatmap)(folder, b, day, 12)),
+        ("position.zone_duration", lambda: raw(generate_zone_duration_image)(folder, b, day)),
+        ("position.zone_hour_heatmap", lambda: raw(generate_zone_hour_heatmap)(folder, b, day)),
+        ("position.zone_overview", lambda: raw(generate_zone_overview_image)(folder, day, behavior_filter=b)),
+        ("position.zone_map", zone_map),
+    ]
+
+
+def _describe(result) -> str:
+    """Kurzbeschreibung des Ergebnisses (Fehlertexte sollen im Bericht auffallen)."""
+    if isinstance(result, str):
+        return result if result.startswith("/img/") else result.strip().splitlines()[0][:80]
+    if isinstance(result, tuple):
+        return "(" + ", ".join(type(r).__name__ for r in result) + ")"
+    return type(result).__name__
+
+
+def _measure(func, repeat: int) -> dict:
+    times, result, error = [], None, None
+    try:
+        for _ in range(1 + repeat):
+            t0 = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - t0)
+    except Exception as exc:  # Fall scheitert, Suite läuft weiter
+        error = f"{type(exc).__name__}: {exc}"
+    entry = {"first": times[0] if times else None,
+             "median": statistics.median(times[1:]) if len(times) > 1 else None,
+             "min": min(times[1:]) if len(times) > 1 else None,
+             "result": error or _describe(result)}
+    if error:
+        entry["error"] = True
+    return entry
+
+
+def run_worker(spec: dict, result_path: str) -> None:
+    """
+    Misst alle Fälle einer Größe im aktuellen Prozess und schreibt {Fall: Messwerte} nach
+    jedem Fall nach result_path (bricht der Prozess ab, bleiben die bisherigen Werte).
+    """
+    from widgets.catalog import latest_date
+    from widgets.image_store import configure_image_store
+    from widgets.utils import load_behavior_data
+
+    def selected(name):
+        return ((not spec["only"] or any(p in name for p in spec["only"]))
+                and not any(p in name for p in spec["skip"]))
+
+    image_dir = tempfile.mkdtemp(prefix="bench_images_")
+    configure_image_store(disk_dir=image_dir)
+    folder = spec["folder"]
+    # zuerst das Einlesen (kalt), danach die Fälle am letzten Tag der Daten
+    cases = [("load_behavior_data", lambda: load_behavior_data(folder))]
+    results = {}
+    try:
+        for i, (name, func) in enumerate(cases):
+            if selected(name):
+                results[name] = entry = _measure(func, spec["repeat"])
+                with open(result_path, "w", encoding="utf-8") as fh:
+                    json.dump(results, fh)
+                print(f"  {name:<32} {_fmt(entry['first'])} {_fmt(entry['median'])}  {entry['result'][:40]}",
+                      file=sys.stderr, flush=True)
+            if i == 0:
+                cases += build_cases(folder, spec["xes"], latest_date(folder))
+    finally:
+        shutil.rmtree(image_dir, ignore_errors=True)
+
+
+# ---------------------------------------------------------------- Steuerung und Bericht
+
+def _fmt(seconds) -> str:
+    return f"{seconds * 1000:9.1f}ms" if seconds is not None else f"{'-':>11}"
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_size(size: tuple, args) -> dict:
+    t0 = time.perf_counter()
+    info = prepare_data(args.data_dir, size, args.seed)
+    shutil.rmtree(os.path.join(info["folder"], "_derived"), ignore_errors=True)
+    print(f"[{size_label(size)}] {info['rows']:,} Frames, {info['files']} Dateien, "
+          f"{info['events']:,} Events (Daten {time.perf_counter() - t0:.1f}s)", file=sys.stderr)
+
+    spec = {"folder": info["folder"], "xes": info["xes"], "repeat": args.repeat,
+            "only": args.only, "skip": args.skip}
+    # Ergebnis über eine Datei: die Widgets schreiben teils selbst auf stdout
+    fd, result_path = tempfile.mkstemp(prefix="bench_", suffix=".json")
+    os.close(fd)
+    try:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker",
+                               json.dumps(spec), result_path], cwd=ROOT, stdout=subprocess.DEVNULL)
+        try:
+            with open(result_path, "r", encoding="utf-8") as fh:
+                cases = json.load(fh)
+        except ValueError:
+            cases = {}
+    finally:
+        os.remove(result_path)
+    run = {"rows": info["rows"], "files": info["files"], "events": info["events"],
+           "generate_s": info["seconds"], "cases": cases}
+    if proc.returncode != 0:
+        run["error"] = f"Worker beendet mit Code {proc.returncode} (nach {len(cases)} Fällen)"
+    return run
+
+
+def compare(old_path: str, new_path: str) -> int:
+    with open(old_path, "r", encoding="utf-8") as fh:
+        old = json.load(fh)
+    with open(new_path, "r", encoding="utf-8") as fh:
+        new = json.load(fh)
+    print(f"ALT {old['commit']}{'+' if old['dirty'] else ''}  NEU {new['commit']}{'+' if new['dirty'] else ''}")
+    for size, run in new["sizes"].items():
+        before = old["sizes"].get(size, {}).get("cases", {})
+        print(f"\n[{size}] {run['rows']:,} Frames{'' if before else ' (nicht im alten Lauf)'}")
+        if "error" in run:
+            print(f"  {run['error']}")
+        print(f"  {'Fall':<32} {'first ALT':>11} {'first NEU':>11} {'x':>6} {'median ALT':>11} {'median NEU':>11} {'x':>6}")
+        for name, cur in run["cases"].items():
+            prev = before.get(name, {})
+            row = f"  {name:<32}"
+            for key in ("first", "median"):
+                a, b = prev.get(key), cur.get(key)
+                ratio = f"{b / a:6.2f}" if a and b else f"{'-':>6}"
+                row += f" {_fmt(a)} {_fmt(b)} {ratio}"
+            print(row)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[SIZES["small"], SIZES["medium"]],
+                        help="small, medium, large oder PxDxF (Standard: small medium)")
+    parser.add_argument("--repeat", type=int, default=3, help="warme Wiederholungen nach dem ersten Aufruf")
+    parser.add_argument("--only", nargs="*", default=[], help="nur Fälle, deren Name einen dieser Teile enthält")
+    parser.add_argument("--skip", nargs="*", default=[], help="Fälle auslassen (Namensteile)")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, "data", "synthetic"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="Ergebnisdatei (Standard: benchmarks/results/...)")
+    parser.add_argument("--compare", nargs=2, metavar=("ALT", "NEU"))
+    parser.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(json.loads(args.worker[0]), args.worker[1])
+        return 0
+    if args.compare:
+        return compare(*args.compare)
+
+    commit = _git("rev-parse", "--short", "HEAD") or "unknown"
+    report = {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+    for size in args.sizes:
+        report["sizes"][size_label(size)] = run_size(size, args)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}_{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=1)
+    print(f"Ergebnis: {out}", file=sys.stderr)
+    failed = any("error" in run or any(c.get("error") for c in run["cases"].values())
+                 for run in report["sizes"].values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Benchmark: Streaming-XES-Leser (widgets.utils.read_xes_columns) gegen pm4py
+(xes_importer.apply + convert_to_dataframe) auf synthetischen Logs.
+
+Pro Loggröße wird ein XES im Stil von clustered_log_10s.xes erzeugt (Traces pro Bucht,
+Events mit concept:name, time:timestamp, duration). Jeder Leser läuft in einem eigenen
+Prozess, gemessen werden Laufzeit und Spitzen-Speicher (ru_maxrss des Kindprozesses).
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/bench_xes.py [--events 100000 1000000 10000000] [--skip-pm4py-above 1000000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BEHAVIORS = ["lying", "sitting", "standing", "moving", "investigating", "feeding",
+             "defecating", "playing"]
+
+_CHILD = r"""
+import resource, sys, time
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+if {reader!r} == "pm4py":
+    import pm4py
+    from pm4py.objects.log.importer.xes import importer as xes_importer
+    log = xes_importer.apply({path!r}, parameters={{"show_progress_bar": False}})
+    n = len(pm4py.convert_to_dataframe(log))
+else:
+    from widgets.utils import read_xes_columns
+    n = len(read_xes_columns({path!r})["ts"])
+sec = time.perf_counter() - t0
+print(n, sec, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def write_synthetic_xes(path: str, n_events: int, n_traces: int = 8, seed: int = 1) -> None:
+    """Schreibt ein XES mit n_events Events, gleichmäßig auf n_traces Traces verteilt."""
+    rnd = random.Random(seed)
+    per_trace = max(1, n_events // n_traces)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<log xes.version="1.0" xmlns="http://www.xes-standard.org/">\n')
+        for tr in range(n_traces):
+            fh.write(f'  <trace>\n    <string key="concept:name" value="pen_{tr}"/>\n')
+            t = datetime(2024, 5, 1, 6, 0, 0)
+            for _ in range(per_trace):
+                d = rnd.choice((10, 20, 30, 60))
+                fh.write(
+                    "    <event>\n"
+                    f'      <string key="concept:name" value="{rnd.choice(BEHAVIORS)}"/>\n'
+                    f'      <date key="time:timestamp" value="{t.isoformat()}.000+02:00"/>\n'
+                    f'      <string key="duration" value="0 days 00:{d // 60:02d}:{d % 60:02d}"/>\n'
+                    "    </event>\n")
+                t += timedelta(seconds=d)
+                if t.hour >= 19:
+                    t = t.replace(hour=6) + timedelta(days=1)
+            fh.write("  </trace>\n")
+        fh.write("</log>\n")
+
+
+def run_reader(reader: str, path: str) -> tuple[int, float, float]:
+    """(Events, Sekunden, Spitzen-RSS in MB) eines Lesers in einem frischen Prozess."""
+    code = _CHILD.format(root=ROOT, reader=reader, path=path)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{reader} fehlgeschlagen:\n{proc.stderr[-2000:]}")
+    n, sec, rss_kb = proc.stdout.split()[-3:]
+    return int(n), float(sec), int(rss_kb) / 1024.0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--skip-pm4py-above", type=int, default=None,
+                        help="pm4py nur bis zu dieser Eventzahl messen (Laufzeit/Speicher)")
+    args = parser.parse_args(argv)
+
+    print(f"{'Events':>10}  {'Datei':>9}  {'Leser':<9} {'Zeit':>8}  {'Peak-RSS':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.events:
+            path = os.path.join(tmp, f"synthetic_{n}.xes")
+            write_synthetic_xes(path, n)
+            size_mb = os.path.getsize(path) / 1e6
+            readers = ["stream"]
+            if args.skip_pm4py_above is None or n <= args.skip_pm4py_above:
+                readers.append("pm4py")
+            for reader in readers:
+                got, sec, rss = run_reader(reader, path)
+                print(f"{got:>10}  {size_mb:>7.0f}MB  {reader:<9} {sec:>7.2f}s  {rss:>7.0f}MB")
+            os.remove(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
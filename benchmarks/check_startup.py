@@ -0,0 +1,77 @@
+"""
+Startup-Budget für app.py (Regressionstest über `python -X importtime`).
+
+Prüft zwei Dinge:
+- Beim `import app` dürfen die schweren Bibliotheken (HEAVY_MODULES) NICHT geladen werden;
+  sie kommen erst über widgets.lazy beim ersten Rendern eines Widgets.
+- Die kumulierte Importzeit von `app` (bester von N Läufen) bleibt unter STARTUP_BUDGET_MS.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/check_startup.py [--budget-ms 2500] [--runs 3]
+
+Exit-Code 0 = im Budget, 1 = Budget überschritten oder schweres Modul beim Start geladen.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+STARTUP_BUDGET_MS = 2500
+HEAVY_MODULES = ["matplotlib", "sklearn", "scipy", "networkx", "plotly.express", "pm4py"]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def measure_once() -> tuple[float, dict[str, int]]:
+    """Ein Lauf: (kumulierte Zeit für 'app' in ms, {modul: kumulierte µs})."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"'import app' fehlgeschlagen:\n{proc.stderr[-2000:]}")
+
+    modules: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            modules[m.group(4)] = int(m.group(2))
+    return modules.get("app", 0) / 1000.0, modules
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    best_ms, modules = None, {}
+    for _ in range(max(1, args.runs)):
+        ms, mods = measure_once()
+        if best_ms is None or ms < best_ms:
+            best_ms, modules = ms, mods
+
+    heavy = [m for m in HEAVY_MODULES if m in modules]
+    top = sorted(((us, m) for m, us in modules.items() if m != "app"), reverse=True)[:8]
+
+    print(f"import app: {best_ms:.0f} ms (Budget {args.budget_ms:.0f} ms, bester von {args.runs})")
+    for us, m in top:
+        print(f"  {us / 1000:8.1f} ms  {m}")
+
+    ok = True
+    if heavy:
+        print(f"FEHLER: schwere Module beim Start geladen: {', '.join(heavy)}")
+        ok = False
+    if best_ms > args.budget_ms:
+        print(f"FEHLER: Startup-Budget überschritten ({best_ms:.0f} ms > {args.budget_ms:.0f} ms)")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+Synthetische Action-Detection-Daten (Pickles) und passendes geclustertes XES-Log, um
+Produktionsgrößen ohne echte Stalldaten nachzustellen.
+
+Modell:
+- Pro Bucht und Tag eine latente Verhaltensfolge im Aufnahmefenster (Standard 6–19 Uhr):
+  Abschnitte mit geometrisch verteilter Dauer (verhaltensabhängig, z. B. Liegen lang,
+  Koten kurz), das nächste Verhalten wird nach Tagesrhythmus gewichtet gezogen
+  (Fressen um ~7 und ~16 Uhr, Liegen mittags, Spielen/Erkunden vormittags).
+- Pro Frame (fps pro Bucht) die acht Verhaltenswahrscheinlichkeiten als Dirichlet-Stichprobe
+  mit Schwerpunkt auf dem latenten Verhalten (dominant_behavior = latentes Verhalten in
+  ~90 % der Frames) und eine Bounding-Box x1/x2/y1/y2 um einen verhaltenstypischen Ort im
+  Stall (Trog, Liegebereich, Kotbereich), der innerhalb eines Abschnitts leicht wandert.
+- Dateien: <ordner>/<YYYYMMDD>_pen<k>.pkl mit den Spalten t, x1, x2, y1, y2 und BEHAVIORS
+  (wie die echten Pickles).
+- XES: ein Trace pro Bucht (concept:name pen_<k>); das dominante Verhalten wird in
+  10-s-Fenster gebündelt, gleiche aufeinanderfolgende Fenster zu einem Event mit duration
+  zusammengefasst; pro Tag ein "start"- und ein "end"-Event.
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/make_synthetic_data.py --out data/synthetic [--pens 4] [--days 7]
+        [--fps 0.5] [--start 2024-05-01] [--hours 6 19] [--seed 0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from widgets.utils import BEHAVIORS  # noqa: E402
+
+BUCKET_S = 10                       # Fensterbreite des geclusterten XES
+TZ_SUFFIX = "+02:00"                # wie clustered_log_10s.xes
+
+# mittlere Abschnittsdauer in Sekunden
+MEAN_DWELL_S = {"lying": 600, "sitting": 90, "standing": 60, "moving": 30,
+                "investigating": 45, "feeding": 240, "defecating": 15, "playing": 40}
+# typischer Ort (x, y) und Streuung im Stall (50..820 × 80..460)
+LOCATION = {"lying": ((600, 330), 60), "sitting": ((560, 300), 70),
+            "standing": ((420, 260), 110), "moving": ((420, 270), 150),
+            "investigating": ((300, 220), 110), "feeding": ((140, 160), 35),
+            "defecating": ((760, 420), 25), "playing": ((360, 300), 90)}
+BOX_W, BOX_H = (55, 95), (35, 60)  # Spannweite Boxbreite/-höhe in Pixeln
+DOMINANCE = 6.0                     # Dirichlet-Gewicht des latenten Verhaltens
+STALL_X, STALL_Y = (50, 820), (80, 460)
+
+
+def hourly_weights(hour: float) -> np.ndarray:
+    """Relative Häufigkeit der Verhalten zur Uhrzeit hour (Tagesrhythmus)."""
+    def bump(center, width):
+        return np.exp(-0.5 * ((hour - center) / width) ** 2)
+
+    w = {
+        "lying": 1.0 + 1.5 * bump(12.5, 1.8) + 1.2 * bump(18.5, 1.0),
+        "sitting": 0.4,
+        "standing": 0.6 + 0.3 * bump(8, 2),
+        "moving": 0.5 + 0.5 * bump(7.5, 1.5) + 0.4 * bump(16, 1.5),
+        "investigating": 0.4 + 0.6 * bump(9.5, 1.5),
+        "feeding": 0.2 + 1.6 * bump(7, 0.8) + 1.4 * bump(16, 0.9),
+        "defecating": 0.08,
+        "playing": 0.1 + 0.5 * bump(10, 1.2),
+    }
+    weights = np.array([w[b] for b in BEHAVIORS])
+    return weights / weights.sum()
+
+
+def _segments(rng: np.random.Generator, start_s: float, stop_s: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Latente Abschnitte im Fenster [start_s, stop_s) (Sekunden ab Mitternacht): (Beginn, Verhaltenscode)."""
+    dwell = np.array([MEAN_DWELL_S[b] for b in BEHAVIORS], dtype=float)
+    starts, codes = [], []
+    t, prev = start_s, -1
+    while t < stop_s:
+        w = hourly_weights(t / 3600.0)
+        if prev >= 0:
+            w = w.copy()
+            w[prev] *= 0.15  # selten dasselbe Verhalten direkt wieder
+            w /= w.sum()
+        code = int(rng.choice(len(BEHAVIORS), p=w))
+        starts.append(t)
+        codes.append(code)
+        t += max(2.0, rng.exponential(dwell[code]))
+        prev = code
+    return np.asarray(starts), np.asarray(codes, dtype=np.int64)
+
+
+def pen_day_frames(rng: np.random.Generator, day: pd.Timestamp, fps: float,
+                   hours: Tuple[int, int]) -> pd.DataFrame:
+    """Frames einer Bucht an einem Tag (Spalten wie die echten Pickles)."""
+    start_s, stop_s = hours[0] * 3600.0, hours[1] * 3600.0
+    seg_start, seg_code = _segments(rng, start_s, stop_s)
+    n = int((stop_s - start_s) * fps)
+    secs = start_s + np.sort(rng.uniform(0, stop_s - start_s, n))
+    seg = np.searchsorted(seg_start, secs, side="right") - 1
+    latent = seg_code[seg]
+
+    # Wahrscheinlichkeiten: Dirichlet mit Schwerpunkt auf dem latenten Verhalten
+    alpha = np.full((n, len(BEHAVIORS)), 0.6)
+    alpha[np.arange(n), latent] += DOMINANCE
+    probs = rng.gamma(alpha)
+    probs /= probs.sum(axis=1, keepdims=True)
+
+    # Ort: verhaltenstypischer Ankerpunkt je Abschnitt + kleines Wandern innerhalb
+    anchors = np.empty((len(seg_code), 2))
+    for i, code in enumerate(seg_code):
+        (cx, cy), spread = LOCATION[BEHAVIORS[code]]
+        anchors[i] = rng.normal((cx, cy), spread)
+    drift = rng.normal(0, 4, (n, 2))
+    xy = anchors[seg] + drift
+    xy[:, 0] = np.clip(xy[:, 0], *STALL_X)
+    xy[:, 1] = np.clip(xy[:, 1], *STALL_Y)
+    w = rng.uniform(*BOX_W, n)
+    h = rng.uniform(*BOX_H, n)
+
+    df = pd.DataFrame({
+        "t": day + pd.to_timedelta(secs, unit="s"),
+        "x1": xy[:, 0] - w / 2, "x2": xy[:, 0] + w / 2,
+        "y1": xy[:, 1] - h / 2, "y2": xy[:, 1] + h / 2,
+    })
+    for i, b in enumerate(BEHAVIORS):
+        df[b] = probs[:, i]
+    return df
+
+
+def clustered_events(df: pd.DataFrame) -> List[Tuple[str, pd.Timestamp, int]]:
+    """(Verhalten, Beginn, Dauer in s) aus 10-s-Fenstern des dominanten Verhaltens, inkl. start/end."""
+    if df.empty:
+        return []
+    dominant = df[BEHAVIORS].to_numpy().argmax(axis=1)
+    t0 = df["t"].iloc[0].floor(f"{BUCKET_S}s")
+    bucket = ((df["t"] - t0).dt.total_seconds().to_numpy() // BUCKET_S).astype(np.int64)
+    n_buckets = int(bucket.max()) + 1
+    votes = np.zeros((n_buckets, len(BEHAVIORS)), dtype=np.int64)
+    np.add.at(votes, (bucket, dominant), 1)
+    filled = votes.sum(axis=1) > 0
+    label = np.where(filled, votes.argmax(axis=1), -1)
+
+    events = [("start", t0, 0)]
+    run_start = 0
+    for i in range(1, n_buckets + 1):
+        if i == n_buckets or label[i] != label[run_start]:
+            if label[run_start] >= 0:
+                events.append((BEHAVIORS[label[run_start]],
+                               t0 + pd.Timedelta(seconds=run_start * BUCKET_S),
+                               (i - run_start) * BUCKET_S))
+            run_start = i
+    events.append(("end", t0 + pd.Timedelta(seconds=n_buckets * BUCKET_S), 0))
+    return events
+
+
+def _duration(seconds: int) -> str:
+    return f"0 days {seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def write_xes(path: str, traces: Dict[str, List[Tuple[str, pd.Timestamp, int]]]) -> int:
+    """Schreibt das XES (ein Trace pro Bucht). Rückgabe: Anzahl Events."""
+    n = 0
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<log xes.version="1.0" xmlns="http://www.xes-standard.org/">\n')
+        for name, events in traces.items():
+            fh.write(f'  <trace>\n    <string key="concept:name" value="{name}"/>\n')
+            for behavior, start, seconds in events:
+                fh.write("    <event>\n"
+                         f'      <string key="concept:name" value="{behavior}"/>\n'
+                         f'      <date key="time:timestamp" value="{start:%Y-%m-%dT%H:%M:%S}.000{TZ_SUFFIX}"/>\n'
+                         f'      <string key="duration" value="{_duration(seconds)}" />\n'
+                         "    </event>\n")
+                n += 1
+            fh.write("  </trace>\n")
+        fh.write("</log>\n")
+    return n
+
+
+def generate_dataset(out_dir: str, pens: int = 4, days: int = 7, fps: float = 0.5,
+                     start: str = "2024-05-01", hours: Tuple[int, int] = (6, 19),
+                     seed: int = 0) -> dict:
+    """
+    Schreibt pens × days Pickles nach <out_dir>/loaded und <out_dir>/clustered_log_10s.xes.
+    Rückgabe: {"folder", "xes", "files", "rows", "events", "seconds"}.
+    """
+    t_start = time.perf_counter()
+    folder = os.path.join(out_dir, "loaded")
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    traces: Dict[str, list] = {f"pen_{p}": [] for p in range(pens)}
+    rows = files = 0
+    for d in range(days):
+        day = pd.Timestamp(start) + pd.Timedelta(days=d)
+        for p in range(pens):
+            df = pen_day_frames(rng, day, fps, hours)
+            df.to_pickle(os.path.join(folder, f"{day:%Y%m%d}_pen{p}.pkl"))
+            traces[f"pen_{p}"].extend(clustered_events(df))
+            rows += len(df)
+            files += 1
+    xes = os.path.join(out_dir, "clustered_log_10s.xes")
+    events = write_xes(xes, traces)
+    return {"folder": folder, "xes": xes, "files": files, "rows": rows, "events": events,
+            "seconds": time.perf_counter() - t_start}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", default=os.path.join("data", "synthetic"))
+    parser.add_argument("--pens", type=int, default=4)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--fps", type=float, default=0.5, help="Frames pro Sekunde und Bucht")
+    parser.add_argument("--start", default="2024-05-01")
+    parser.add_argument("--hours", type=int, nargs=2, default=(6, 19), metavar=("VON", "BIS"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    info = generate_dataset(args.out, args.pens, args.days, args.fps, args.start,
+                            tuple(args.hours), args.seed)
+    print(f"{info['files']} Pickles, {info['rows']:,} Frames -> {info['folder']}")
+    print(f"{info['events']:,} Events -> {info['xes']}")
+    print(f"{info['seconds']:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Stresstest: parallele generate_*-Aufrufe der matplotlib-Widgets liefern dieselben Bilder
+wie serielle Aufrufe.
+
+Ablauf:
+- Referenz: jeder Job einmal seriell (Figuren-Cache umgangen über __wrapped__). Die URL
+  aus widgets.image_store ist der SHA-1 der PNG-Bytes, gleiche URL = byte-gleiches Bild.
+- Danach alle Jobs --rounds mal gemischt auf --threads Threads; jede Abweichung von der
+  Referenz (anderes Bild, Fehlertext, Exception) zählt als Fehler.
+- Ausgegeben werden Fehler je Job sowie Zeit seriell vs. parallel (Bilder pro Sekunde).
+
+Aufruf (aus dem Projektordner):
+    python benchmarks/stress_render.py [--folder data/action_detection/loaded]
+        [--xes data/clustered_log_10s.xes] [--threads 8] [--rounds 4]
+
+Exit-Code 0 = alle Bilder identisch, 1 = mindestens eine Abweichung.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def build_jobs(folder: str, xes_path: str) -> dict:
+    """{Name: Funktion ohne Argumente} für alle matplotlib-Widgets, am letzten Tag der Daten."""
+    from widgets.activity_budget import plot_budget
+    from widgets.behavior_position.plot_position_image import generate_behavior_position_image
+    from widgets.behavior_position.plot_zone_duration import generate_zone_duration_image
+    from widgets.behavior_position.plot_zone_overview import generate_zone_overview_image
+    from widgets.pig_behavior.plot_behavior_bar import generate_behavior_bar_plot
+    from widgets.pig_behavior.thresholds import get_behavior_thresholds
+    from widgets.catalog import latest_date
+    from widgets.utils import BEHAVIORS
+
+    day = latest_date(folder)
+    plot_budget.PKL_FOLDER = folder
+
+    position = generate_behavior_position_image.__wrapped__
+    duration = generate_zone_duration_image.__wrapped__
+    overview = generate_zone_overview_image.__wrapped__
+    jobs = {}
+    for behavior in ("feeding", "lying"):
+        jobs[f"position:{behavior}:density"] = lambda b=behavior: position(folder, b, day)
+        jobs[f"position:{behavior}:scatter"] = lambda b=behavior: position(folder, b, day, mode="scatter")
+        jobs[f"zone_duration:{behavior}"] = lambda b=behavior: duration(folder, b, day)
+        jobs[f"zone_overview:{behavior}"] = lambda b=behavior: overview(folder, day, b)
+    if os.path.exists(xes_path):
+        thresholds = get_behavior_thresholds(xes_path, BEHAVIORS)
+        bar = generate_behavior_bar_plot.__wrapped__
+        for behavior in list(thresholds)[:3]:
+            jobs[f"behavior_bar:{behavior}"] = lambda b=behavior: bar(xes_path, b, thresholds)
+    jobs["budget:day"] = lambda: plot_budget.generate_single_day_plot.__wrapped__(day)
+    jobs["budget:aggregated"] = lambda: plot_budget.generate_aggregated_plot.__wrapped__()
+    return jobs
+
+
+def _run(item):
+    name, func = item
+    try:
+        return name, func()
+    except Exception as exc:  # wird als Abweichung gezählt
+        return name, f"{type(exc).__name__}: {exc}"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--folder", default="data/action_detection/loaded")
+    parser.add_argument("--xes", default="data/clustered_log_10s.xes")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    jobs = build_jobs(args.folder, args.xes)
+
+    t0 = time.perf_counter()
+    reference = dict(_run(item) for item in jobs.items())
+    serial_s = time.perf_counter() - t0
+    not_images = [n for n, r in reference.items() if not str(r).startswith("/img/")]
+    if not_images:
+        print("Kein Bild in der Referenz (Daten prüfen):", ", ".join(not_images))
+
+    work = list(jobs.items()) * args.rounds
+    random.Random(args.seed).shuffle(work)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(_run, work))
+    parallel_s = time.perf_counter() - t0
+
+    wrong = Counter(name for name, result in results if result != reference[name])
+    print(f"{'Job':<32} {'Aufrufe':>7} {'Abweichungen':>12}")
+    for name in jobs:
+        print(f"{name:<32} {args.rounds:>7} {wrong.get(name, 0):>12}")
+    print(f"seriell:  {len(jobs)} Bilder in {serial_s:.2f}s ({len(jobs) / serial_s:.1f}/s)")
+    print(f"parallel: {len(work)} Bilder in {parallel_s:.2f}s ({len(work) / parallel_s:.1f}/s, "
+          f"{args.threads} Threads, {os.cpu_count()} CPUs)")
+    total = sum(wrong.values())
+    print("OK: alle Bilder identisch" if not total else f"FEHLER: {total} abweichende Bilder")
+    return 1 if total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
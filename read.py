@@ -5,33 +5,20 @@ import os
 from pm4py.objects.log.importer.xes import importer as xes_importer
 import pm4py
 
+from widgets.utils import load_behavior_data
+
 # Pfade
 PKL_FOLDER = "data/action_detection/loaded"
 NPZ_FOLDER = "data/tracking/processed"
 XES_PATH = "data/clustered_log_10s.xes"
 
-BEHAVIORS = ['lying', 'feeding', 'investigating', 'defecating',
-             'standing', 'sitting', 'moving', 'playing']
-
 def load_pkl_data(folder):
-    dfs = []
-    for f in sorted(glob.glob(os.path.join(folder, "*.pkl"))):
-        try:
-            df = pd.read_pickle(f)
-            if 't' in df.columns:
-                df['t'] = pd.to_datetime(df['t'])
-                df['hour'] = df['t'].dt.hour
-                df['date'] = df['t'].dt.date
-            if all(c in df.columns for c in ['x1', 'x2', 'y1', 'y2']):
-                df['x_center'] = (df['x1'] + df['x2']) / 2
-                df['y_center'] = (df['y1'] + df['y2']) / 2
-            available = [b for b in BEHAVIORS if b in df.columns]
-            if available:
-                df['dominant_behavior'] = df[available].idxmax(axis=1)
-            dfs.append(df)
-        except:
-            continue
-    return pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+    # abgeleitete Spalten (hour, date, dominant_behavior, Mittelpunkte) kommen aus dem Ingest
+    # (widgets.ingest) und werden dort pro Datei nur einmal berechnet
+    try:
+        return load_behavior_data(folder)
+    except:
+        return pd.DataFrame()
 
 def load_npz_data(folder):
     npz_files = sorted(glob.glob(os.path.join(folder, "*.npz")))
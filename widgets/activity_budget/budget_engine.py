@@ -0,0 +1,77 @@
+"""
+Aktivitätsbudget-Engine: Tagesbudgets aller Tage in einem Durchgang.
+
+Funktionen:
+- daily_budgets(folder_path, resolution, hours)        # Anteile (%) je (Tag, Bucket) und Verhalten
+- day_budget(folder_path, date_str, resolution, hours) # (gestapelt ohne 'lying', Rest zu 100 %)
+- aggregated_budget(folder_path, resolution, hours)    # dasselbe als Ø über alle Tage
+
+Design:
+- Grundlage sind die Zählungen der Rollup-Pyramide (widgets.behavior_cube), nicht die Frames.
+  counts -> Prozent wird für alle Tage gleichzeitig gerechnet (eine Division über die ganze
+  Tabelle) und pro Datenversion, Auflösung und Tagesfenster einmal gespeicherten
+  (frame_store.get_derived).
+- Ein Tag ist danach ein xs() auf die Tabelle, das aggregierte Budget ein Mittelwert über
+  die Tage (wenige hundert Zeilen). PNG- und Plotly-Ausgabe in plot_budget nutzen dieselben
+  Ergebnisse.
+- Tage ohne Frames in einem Bucket zählen mit 0 % (wie zuvor bei reindex(fill_value=0)).
+- Spaltenreihenfolge alphabetisch (= Stapelreihenfolge der Diagramme).
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from widgets.behavior_cube import cube_dates, get_level, window_buckets
+from widgets.frame_store import get_derived
+
+DEFAULT_HOURS = range(6, 19)
+BASE_BEHAVIOR = "lying"     # wird nicht gestapelt, steckt im Rest zu 100 %
+
+
+def _build_daily(folder_path: str, resolution: int, hours: range) -> pd.DataFrame:
+    level = get_level(folder_path, resolution)
+    if level.empty:
+        return pd.DataFrame()
+    buckets = window_buckets(resolution, hours)
+    idx = pd.MultiIndex.from_product([cube_dates(folder_path), buckets], names=["date", "bucket"])
+    counts = level["count"].reindex(idx, fill_value=0)
+    counts = counts[sorted(counts.columns)]
+    return counts.div(counts.sum(axis=1), axis=0).fillna(0) * 100
+
+
+def daily_budgets(folder_path: str, resolution: int = 60, hours: range = DEFAULT_HOURS) -> pd.DataFrame:
+    """
+    Anteile an Frames (%) je (date, bucket) für alle Tage; Spalten = Verhalten (alphabetisch).
+    Leerer Frame, wenn keine Daten vorhanden sind. Nicht verändern (gecacht).
+    """
+    name = f"budget:{int(resolution)}:{hours.start}-{hours.stop}"
+    return get_derived(folder_path, name,
+                       lambda _frames: _build_daily(folder_path, int(resolution), hours))
+
+
+def _stack(pct: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    stacked = pct.drop(columns=BASE_BEHAVIOR, errors="ignore")
+    rest = (100 - stacked.sum(axis=1)).clip(lower=0)
+    return stacked, rest
+
+
+def day_budget(folder_path: str, date_str, resolution: int = 60,
+               hours: range = DEFAULT_HOURS) -> Optional[Tuple[pd.DataFrame, pd.Series]]:
+    """(gestapelte Anteile je Bucket, Rest zu 100 %) für einen Tag; None = Tag unbekannt."""
+    table = daily_budgets(folder_path, resolution, hours)
+    day = pd.to_datetime(date_str).date()
+    if table.empty or day not in table.index.get_level_values("date"):
+        return None
+    return _stack(table.xs(day, level="date"))
+
+
+def aggregated_budget(folder_path: str, resolution: int = 60,
+                      hours: range = DEFAULT_HOURS) -> Optional[Tuple[pd.DataFrame, pd.Series]]:
+    """Wie day_budget, aber Ø der Tagesanteile je Bucket über alle Tage; None = keine Daten."""
+    table = daily_budgets(folder_path, resolution, hours)
+    if table.empty:
+        return None
+    return _stack(table.groupby(level="bucket").mean())
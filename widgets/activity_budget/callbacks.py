@@ -1,11 +1,14 @@
 from dash import Input, Output, html
-from widgets.activity_budget.plot_budget import (
-    generate_single_day_plot,      # nur für die Vorschaukachel (Legacy)
-    generate_aggregated_plot,      # nur für die Vorschaukachel (Legacy)
-    generate_single_day_figure,    # interaktives Balkendiagramm (Tag)
-    generate_aggregated_figure,    # interaktives Balkendiagramm (Ø alle Tage)
-    generate_behavior_heatmap,     # Heatmap nach Verhalten (Ø, alle Tage)
-)
+from widgets.lazy import lazy_callable
+from widgets.image_store import image_src, is_image_src
+
+# matplotlib erst beim ersten Callback importieren
+_BUDGET = "widgets.activity_budget.plot_budget"
+generate_single_day_plot = lazy_callable(_BUDGET, "generate_single_day_plot")          # nur für die Vorschaukachel (Legacy)
+generate_aggregated_plot = lazy_callable(_BUDGET, "generate_aggregated_plot")          # nur für die Vorschaukachel (Legacy)
+generate_single_day_figure = lazy_callable(_BUDGET, "generate_single_day_figure")      # interaktives Balkendiagramm (Tag)
+generate_aggregated_figure = lazy_callable(_BUDGET, "generate_aggregated_figure")      # interaktives Balkendiagramm (Ø alle Tage)
+generate_behavior_heatmap = lazy_callable(_BUDGET, "generate_behavior_heatmap")        # Heatmap nach Verhalten (Ø, alle Tage)
 
 def register_callbacks(app):
     """Callbacks für Aktivitätsbudget."""
@@ -18,17 +21,18 @@ def register_callbacks(app):
     )
     def update_budget_preview(mode, date):
         img = generate_single_day_plot(date) if mode == "single" else generate_aggregated_plot()
-        if isinstance(img, str) and img.startswith("data:image"):
-            return html.Img(src=img, style={"maxWidth": "100%"})
+        if is_image_src(img):
+            return html.Img(src=image_src(img), style={"maxWidth": "100%"})
         return html.P(img, style={"color": "red"})
 
-    # --- Block 1: Heatmap (nur Verhalten steuert) ---
+    # --- Block 1: Heatmap (Verhalten + Auflösung steuern) ---
     @app.callback(
         Output("ab-heatmap", "figure"),
         Input("behavior-select", "value"),
+        Input("ab-resolution-select", "value"),
     )
-    def update_heatmap(behavior):
-        fig = generate_behavior_heatmap(behavior)
+    def update_heatmap(behavior, resolution):
+        fig = generate_behavior_heatmap(behavior, resolution or 60)
         if isinstance(fig, str):
             from plotly.graph_objects import Figure
             return Figure(layout={"annotations": [{"text": fig, "showarrow": False}]})
@@ -39,9 +43,12 @@ def register_callbacks(app):
         Output("ab-budget-graph", "figure"),
         Input("budget-mode-select", "value"),
         Input("date-select", "value"),
+        Input("ab-resolution-select", "value"),
     )
-    def update_budget_graph(mode, date):
-        fig = generate_single_day_figure(date) if mode == "single" else generate_aggregated_figure()
+    def update_budget_graph(mode, date, resolution):
+        resolution = resolution or 60
+        fig = (generate_single_day_figure(date, resolution) if mode == "single"
+               else generate_aggregated_figure(resolution))
         if isinstance(fig, str):
             from plotly.graph_objects import Figure
             return Figure(layout={"annotations": [{"text": fig, "showarrow": False}]})
@@ -1,7 +1,9 @@
 from dash import html, dcc
 import dash_bootstrap_components as dbc
 
-from widgets.utils import load_behavior_data, BEHAVIORS
+from widgets.behavior_cube import RESOLUTION_LABELS
+from widgets.catalog import catalog_dates
+from widgets.utils import BEHAVIORS
 
 PKL_FOLDER = "data/action_detection/loaded"
 
@@ -12,16 +14,23 @@ def layout():
       -> Steuert sich NUR über 'behavior-select'.
     - Unterer Block: Aktivitätsbudget als Balkendiagramm (aggregiert ODER tagesbasiert)
       -> Steuert sich über 'budget-mode-select' und 'date-select'.
+    - 'ab-resolution-select' (Bucketgröße 1/5/15/60 min oder Tag) gilt für beide Blöcke.
     """
-    df = load_behavior_data(PKL_FOLDER)
-    if df.empty:
+    dates = catalog_dates(PKL_FOLDER)
+    if not dates:
         return dbc.Alert("Keine Daten verfügbar.", color="danger", className="mb-3")
 
-    dates = sorted({str(d) for d in df["date"].unique()})
     first_date = dates[0] if dates else None
 
     return html.Div([
         html.H4("AKTIVITÄTSBUDGET & TAGESMUSTER"),
+        dbc.RadioItems(
+            id="ab-resolution-select",
+            options=[{"label": label, "value": m} for m, label in RESOLUTION_LABELS.items()],
+            value=60,
+            inline=True,
+            className="mb-2",
+        ),
 
         # --- Block 1: Heatmap (nur Verhaltenswahl hier!) ---
         dbc.Row([
@@ -0,0 +1,181 @@
+"""
+Hintergrund-Callbacks (Dash background callbacks) für langsame Renderpfade.
+
+Funktionen:
+- background_callback(app, *outputs_inputs, folder_path, progress, running, cancel, preload)
+                                          # wie app.callback, läuft aber in einem Worker-Prozess
+- get_background_manager(folder_path)     # DiskcacheManager pro Datenordner oder None
+- disk_cache()                            # diskcache.Cache unter DISK_DIR (prozessübergreifend) oder None
+- configure_background(enabled, disk_dir, expire_s, interval_ms)
+
+Design:
+- Zonenlernen (KMeans pro Tag), Hüllen der Stallübersicht und die Positionsbilder können
+  einen Flask-Worker sekundenlang blockieren. Als Background-Callback läuft die Funktion in
+  einem eigenen Prozess (DiskcacheManager); der Browser fragt alle interval_ms nach dem
+  Ergebnis, der Request-Thread ist sofort wieder frei.
+- Abbruch: Ändern sich die Inputs, beendet Dash den laufenden Job selbst und startet neu;
+  cancel= bricht zusätzlich bei weiteren Inputs ab (z. B. Seitenwechsel über url.pathname).
+- Ergebnis-Cache: Schlüssel aus Funktionsquelltext, Argumenten und frame_store.data_version
+  des Ordners (cache_by). Neue Daten -> neuer Schlüssel; Einträge verfallen nach expire_s.
+- Fortschritt: Mit progress= bekommt die Funktion set_progress als erstes Argument (ohne
+  Manager ein No-op), damit derselbe Code in beiden Modi läuft. Die Funktion wird nicht
+  umhüllt, weil Dash ihren Quelltext in den Cache-Schlüssel nimmt.
+- Der Worker-Prozess ist ein Fork: Bereits geladene Frames und Tageszusammenfassungen sind
+  dort vorhanden, was der Worker in den Speicher legt, geht mit ihm verloren. Deshalb:
+  - Zonenmodelle legt zone_learning zusätzlich in disk_cache() ab (Schlüssel wie im
+    In-Memory-Cache, also inkl. Datenversion) – der nächste Worker lädt statt neu zu fitten.
+  - Mit einem Manager schaltet figure_cache.share_between_processes() eine Plattenstufe
+    hinter den Speicher-Cache: Im Worker gerenderte Figuren sind für Hauptprozess und
+    weitere Worker da. Bilder selbst liegen ohnehin in der Dateiablage des image_store.
+  - preload: Module (z. B. matplotlib, scikit-learn über die plot_*-Module) werden vor dem
+    ersten Job im Hauptprozess importiert, damit jeder Fork sie schon geladen erbt. Das
+    passiert im Request des ersten Jobs (cache_by läuft dort vor dem Fork), nicht beim Start:
+    der App-Import bleibt leicht (benchmarks/check_startup.py).
+- Messung (widgets.metrics): Im Worker läuft die Funktion unter track(..., "worker"), die
+  Messwerte kommen über den Spool in /metrics. Ohne Manager misst instrument_app.
+- Fehlen diskcache, multiprocess oder psutil (oder ist enabled=False), sind es still normale
+  Callbacks (running= funktioniert dort auch, cancel= entfällt).
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib
+import os
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+from widgets.metrics import callback_label, timed
+
+ENABLED = True
+DISK_DIR = os.path.join("data", "_derived", "callbacks")
+EXPIRE_S = 24 * 3600
+INTERVAL_MS = 250        # Abfrageintervall des Browsers (Dash-Standard: 1000)
+
+# folder_path -> DiskcacheManager (None = nicht verfügbar)
+_MANAGERS: Dict[str, object] = {}
+_MANAGERS_LOCK = threading.Lock()
+# gemeinsamer diskcache.Cache (diskcache verbindet sich nach einem Fork selbst neu)
+_DISK_CACHE = None
+_DISK_LOCK = threading.Lock()
+# Module, die vor dem ersten Worker im Hauptprozess importiert werden; bereits versucht
+_PRELOAD: set = set()
+_PRELOADED: set = set()
+_PRELOAD_LOCK = threading.Lock()
+
+
+def configure_background(enabled: Optional[bool] = None, disk_dir: Optional[str] = None,
+                         expire_s: Optional[float] = None, interval_ms: Optional[int] = None) -> None:
+    """Setzt die Optionen (None = unverändert); gilt für danach registrierte Callbacks."""
+    global ENABLED, DISK_DIR, EXPIRE_S, INTERVAL_MS, _DISK_CACHE
+    with _MANAGERS_LOCK:
+        ENABLED = enabled if enabled is not None else ENABLED
+        DISK_DIR = disk_dir or DISK_DIR
+        EXPIRE_S = expire_s if expire_s is not None else EXPIRE_S
+        INTERVAL_MS = interval_ms if interval_ms is not None else INTERVAL_MS
+        _MANAGERS.clear()
+        _DISK_CACHE = None
+
+
+def disk_cache():
+    """diskcache.Cache unter DISK_DIR, gemeinsam für Hauptprozess und Worker; None = aus/nicht verfügbar."""
+    global _DISK_CACHE
+    if not ENABLED:
+        return None
+    if _DISK_CACHE is None:
+        with _DISK_LOCK:
+            if _DISK_CACHE is None:
+                try:
+                    import diskcache
+
+                    _DISK_CACHE = diskcache.Cache(DISK_DIR)
+                except Exception:
+                    _DISK_CACHE = False  # diskcache fehlt oder Ordner nicht beschreibbar
+    return _DISK_CACHE if _DISK_CACHE is not False else None
+
+
+def _preload() -> None:
+    """Importiert vorgemerkte Module (einmal je Modul; Fehler zeigt später der Worker)."""
+    pending = _PRELOAD - _PRELOADED
+    if not pending:
+        return
+    with _PRELOAD_LOCK:
+        for name in sorted(pending - _PRELOADED):
+            _PRELOADED.add(name)
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass
+
+
+def _create_manager(folder_path: str):
+    try:
+        from dash import DiskcacheManager
+
+        from widgets.figure_cache import share_between_processes
+        from widgets.frame_store import data_version
+
+        def version_key() -> str:
+            # läuft im Request vor dem Fork des Workers
+            _preload()
+            return data_version(folder_path)
+
+        cache = disk_cache()
+        if cache is None:
+            return None
+        manager = DiskcacheManager(cache, cache_by=[version_key], expire=EXPIRE_S)
+    except Exception:
+        return None  # Abhängigkeiten fehlen oder Ordner nicht beschreibbar
+    share_between_processes()
+    return manager
+
+
+def get_background_manager(folder_path: str):
+    """DiskcacheManager mit Ergebnis-Cache je Datenversion von folder_path; None = aus/nicht verfügbar."""
+    if not ENABLED:
+        return None
+    with _MANAGERS_LOCK:
+        if folder_path not in _MANAGERS:
+            _MANAGERS[folder_path] = _create_manager(folder_path)
+        return _MANAGERS[folder_path]
+
+
+def _no_progress(*_args) -> None:
+    pass
+
+
+def background_callback(app, *args, folder_path: str, progress=None, running=None,
+                        cancel=None, preload: Iterable[str] = (), **kwargs) -> Callable:
+    """
+    Decorator wie app.callback(*args, **kwargs). Mit Manager als Background-Callback,
+    sonst als normaler Callback. Mit progress= erhält die Funktion set_progress als erstes
+    Argument. preload: Modulnamen, die vor dem ersten Worker im Hauptprozess importiert werden.
+    """
+    manager = get_background_manager(folder_path)
+    if manager is not None:
+        with _PRELOAD_LOCK:
+            _PRELOAD.update(preload)
+    if running is not None:
+        kwargs["running"] = running
+
+    def decorator(func: Callable) -> Callable:
+        if manager is None:
+            if progress is None:
+                return app.callback(*args, **kwargs)(func)
+
+            @functools.wraps(func)
+            def plain(*inputs):
+                return func(_no_progress, *inputs)
+
+            return app.callback(*args, **kwargs)(plain)
+
+        if progress is not None:
+            kwargs["progress"] = progress
+        if cancel is not None:
+            kwargs["cancel"] = cancel
+        # functools.wraps: Dash nimmt den Quelltext der eigentlichen Funktion in den Cache-Schlüssel
+        worker = timed(callback_label(func), "worker")(func)
+        return app.callback(*args, background=True, manager=manager,
+                            interval=INTERVAL_MS, **kwargs)(worker)
+
+    return decorator
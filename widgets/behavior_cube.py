@@ -0,0 +1,218 @@
+"""
+Vorberechnete Aggregate Datum × Zeit-Bucket × Verhalten über alle Action-Detection-Frames
+(Rollup-Pyramide mit mehreren Auflösungen).
+
+Funktionen:
+- build_pyramid(df)                      # alle Stufen aus einem Frame-DataFrame
+- get_level(folder_path, minutes)        # Stufe mit count/mean, Index (date, bucket)
+- get_cube(folder_path)                  # Stundenstufe mit Index (date, hour)
+- bucket_counts(folder_path, minutes, date=None)  # Bucket × Verhalten: Anzahl Frames (dominant)
+- hour_counts(folder_path, date=None)    # wie bucket_counts auf Stundenebene (Index hour)
+- mean_pivot(folder_path, behavior, minutes=60)   # Datum × Bucket: Ø Wahrscheinlichkeit
+- cube_dates(folder_path)                # alle Tage mit Frames
+- window_buckets(minutes, hours)         # Bucket-Starts eines Tagesfensters (z. B. 6–19 Uhr)
+- bucket_label(bucket, minutes)          # Achsenbeschriftung ('6:15', 'Tag')
+
+Design:
+- Auflösungen: RESOLUTIONS = 1, 5, 15, 60 Minuten und DAY (ganzer Tag). bucket ist die
+  Startminute im Tag (0 … 1439), bei DAY immer 0.
+- Nur die feinste Stufe (1 Minute) wird aus den Frames berechnet, in einem Durchgang mit
+  np.bincount über (Tag, Minute, Verhalten). Jede gröbere Stufe entsteht durch Summieren
+  der nächstfeineren (1 -> 5 -> 15 -> 60 -> Tag), nie aus den Rohdaten.
+- Gespeichert werden summierbare Größen: ("count", b) = Frames mit dominantem Verhalten b,
+  ("sum", b) und ("n", b) = Summe und Anzahl gültiger Wahrscheinlichkeiten. Nach außen gibt
+  es ("count", b) und ("mean", b) = sum / n (NaN ausgelassen, wie groupby.mean).
+- Nur belegte (Tag, Bucket)-Kombinationen sind enthalten.
+- Die Pyramide hängt über frame_store.get_derived an der Datenversion: einmal pro Version,
+  danach lesen Heatmaps, Aktivitätsbudget und Polarplots nur noch wenige tausend Zeilen.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from widgets.frame_store import get_derived
+from widgets.utils import BEHAVIORS
+
+DAY = 1440
+BUCKET_MINUTES = (1, 5, 15, 60)
+RESOLUTIONS = BUCKET_MINUTES + (DAY,)
+# Beschriftungen für Auswahlfelder in den Layouts
+RESOLUTION_LABELS = {1: "1 min", 5: "5 min", 15: "15 min", 60: "Stunde", DAY: "Tag"}
+
+_NAME = "rollup_pyramid"
+
+
+def _empty_level(kinds=("count", "sum", "n")) -> pd.DataFrame:
+    index = pd.MultiIndex.from_arrays([[], []], names=["date", "bucket"])
+    columns = pd.MultiIndex.from_product([list(kinds), BEHAVIORS])
+    return pd.DataFrame(index=index, columns=columns, dtype=np.float64)
+
+
+def _base_level(df: pd.DataFrame) -> pd.DataFrame:
+    """Minutenstufe direkt aus den Frames."""
+    if df.empty or 't' not in df.columns:
+        return _empty_level()
+
+    date_codes, dates = pd.factorize(df['date'], sort=True)
+    dates = list(dates)
+    t = df['t'].to_numpy(dtype="datetime64[ns]")
+    minute = ((t - t.astype("datetime64[D]")) // np.timedelta64(1, "m")).astype(np.int64)
+    beh = df['dominant_behavior']
+    beh_codes = (beh.cat.codes.to_numpy() if isinstance(beh.dtype, pd.CategoricalDtype)
+                 and list(beh.cat.categories) == BEHAVIORS
+                 else pd.Categorical(beh, categories=BEHAVIORS).codes).astype(np.int64)
+
+    n_beh = len(BEHAVIORS)
+    n_cells = len(dates) * DAY
+    cell = date_codes.astype(np.int64) * DAY + minute
+
+    frames = np.bincount(cell, minlength=n_cells)
+    used = np.flatnonzero(frames)
+
+    valid = beh_codes >= 0
+    counts = np.bincount(cell[valid] * n_beh + beh_codes[valid],
+                         minlength=n_cells * n_beh).reshape(n_cells, n_beh)[used]
+    sums = np.empty((len(used), n_beh), dtype=np.float64)
+    valid_n = np.empty((len(used), n_beh), dtype=np.float64)
+    for j, b in enumerate(BEHAVIORS):
+        p = df[b].to_numpy(dtype=np.float64)
+        ok = ~np.isnan(p)
+        sums[:, j] = np.bincount(cell, weights=np.where(ok, p, 0.0), minlength=n_cells)[used]
+        valid_n[:, j] = np.bincount(cell, weights=ok, minlength=n_cells)[used]
+
+    index = pd.MultiIndex.from_arrays(
+        [pd.Index([dates[i] for i in used // DAY], dtype=object), used % DAY],
+        names=["date", "bucket"])
+    columns = pd.MultiIndex.from_product([["count", "sum", "n"], BEHAVIORS])
+    level = pd.DataFrame(np.hstack([counts, sums, valid_n]), index=index, columns=columns)
+    return level.astype({("count", b): np.int64 for b in BEHAVIORS})
+
+
+def _rollup(level: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """Gröbere Stufe durch Summieren der feineren: bucket -> Start des minutes-Buckets."""
+    if level.empty:
+        return level.copy()
+    bucket = level.index.get_level_values("bucket")
+    coarse = np.zeros(len(level), dtype=np.int64) if minutes >= DAY else bucket // minutes * minutes
+    keys = [level.index.get_level_values("date"), pd.Index(coarse, name="bucket")]
+    return level.groupby(keys, sort=True).sum()
+
+
+def build_pyramid(df: pd.DataFrame) -> dict:
+    """
+    {minutes: Stufe} für alle RESOLUTIONS. Die Minutenstufe kommt aus den Frames,
+    jede weitere aus der nächstfeineren.
+    """
+    levels = {1: _base_level(df)}
+    finer = 1
+    for minutes in RESOLUTIONS[1:]:
+        levels[minutes] = _rollup(levels[finer], minutes)
+        finer = minutes
+    return {"levels": levels, "views": {}}
+
+
+def _pyramid(folder_path: str) -> dict:
+    return get_derived(folder_path, _NAME, build_pyramid)
+
+
+def _check_minutes(minutes: int) -> int:
+    minutes = int(minutes)
+    if minutes not in RESOLUTIONS:
+        raise ValueError(f"Auflösung {minutes} min nicht unterstützt, erlaubt: {RESOLUTIONS}")
+    return minutes
+
+
+def _view(folder_path: str, minutes: int) -> pd.DataFrame:
+    """Stufe mit ("count", b) und ("mean", b); pro Datenversion und Stufe einmal berechnet."""
+    minutes = _check_minutes(minutes)
+    pyramid = _pyramid(folder_path)
+    view = pyramid["views"].get(minutes)
+    if view is None:
+        level = pyramid["levels"][minutes]
+        if level.empty:
+            view = _empty_level(("count", "mean"))
+        else:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = level["sum"].to_numpy() / level["n"].to_numpy()
+            view = pd.concat(
+                {"count": level["count"],
+                 "mean": pd.DataFrame(mean, index=level.index, columns=BEHAVIORS)}, axis=1)
+        pyramid["views"][minutes] = view
+    return view
+
+
+def get_level(folder_path: str, minutes: int = 60) -> pd.DataFrame:
+    """Stufe der aktuellen Datenversion (Kopie, klein): Index (date, bucket), count/mean."""
+    return _view(folder_path, minutes).copy()
+
+
+def get_cube(folder_path: str) -> pd.DataFrame:
+    """Stundenstufe mit Index (date, hour) – Kopie, klein."""
+    cube = _view(folder_path, 60).copy()
+    cube.index = cube.index.set_levels(cube.index.levels[1] // 60, level="bucket") \
+        .set_names("hour", level="bucket")
+    return cube
+
+
+def bucket_counts(folder_path: str, minutes: int = 60, date=None,
+                  buckets: Optional[list] = None) -> pd.DataFrame:
+    """
+    Anzahl Frames je (Bucket, dominantes Verhalten): Index bucket, Spalten BEHAVIORS (int).
+    date=None -> Summe über alle Tage; buckets -> nur diese Buckets (fehlende mit 0).
+    Unbekannter Tag -> leerer Frame (bzw. nur Nullen, wenn buckets gesetzt ist).
+    """
+    counts = _view(folder_path, minutes)["count"]
+    if date is not None:
+        day = pd.to_datetime(date).date()
+        counts = counts.xs(day, level="date") if day in counts.index.get_level_values("date") \
+            else counts.iloc[0:0].droplevel("date")
+    else:
+        counts = counts.groupby(level="bucket").sum()
+    counts = counts.astype(np.int64)
+    if buckets is not None:
+        counts = counts.reindex(pd.Index(buckets, name="bucket"), fill_value=0)
+    return counts
+
+
+def hour_counts(folder_path: str, date=None, hours: Optional[range] = None) -> pd.DataFrame:
+    """bucket_counts auf Stundenebene, Index hour (0–23)."""
+    buckets = None if hours is None else [h * 60 for h in hours]
+    counts = bucket_counts(folder_path, 60, date=date, buckets=buckets)
+    counts.index = pd.Index(counts.index // 60, name="hour")
+    return counts
+
+
+def mean_pivot(folder_path: str, behavior: str, minutes: int = 60) -> pd.DataFrame:
+    """
+    Ø Wahrscheinlichkeit von behavior: Index date (sortiert), Spalten bucket
+    (bei minutes=60 die Stunde 0–23); NaN = keine Frames.
+    """
+    pivot = _view(folder_path, minutes)[("mean", behavior)].unstack("bucket")
+    if int(minutes) == 60:
+        pivot.columns = pd.Index(pivot.columns // 60, name="hour")
+    return pivot
+
+
+def cube_dates(folder_path: str) -> list:
+    """Alle Tage mit Frames (datetime.date, sortiert)."""
+    index = _view(folder_path, DAY).index
+    return sorted(set(index.get_level_values("date")))
+
+
+def window_buckets(minutes: int, hours: range = range(0, 24)) -> list:
+    """Bucket-Starts im Tagesfenster hours (Stunden); bei DAY genau ein Bucket (0)."""
+    minutes = _check_minutes(minutes)
+    if minutes == DAY:
+        return [0]
+    return list(range(hours.start * 60, hours.stop * 60, minutes))
+
+
+def bucket_label(bucket: int, minutes: int) -> str:
+    """'6:00', '6:15' … bzw. 'Tag' für die Tagesstufe."""
+    if int(minutes) == DAY:
+        return "Tag"
+    return f"{int(bucket) // 60}:{int(bucket) % 60:02d}"
@@ -1,17 +1,30 @@
 from dash import Input, Output
-from widgets.behavior_flow.plot_behavior_flow import generate_behavior_dfg
-from widgets.behavior_flow.plot_top_sequences import get_top_behavior_sequences
+from widgets.day_summary import ref_date, summary_ref
+from widgets.lazy import lazy_callable
+
+# networkx/plotly erst beim ersten Callback importieren
+generate_behavior_dfg = lazy_callable("widgets.behavior_flow.plot_behavior_flow", "generate_behavior_dfg")
+get_top_behavior_sequences = lazy_callable("widgets.behavior_flow.plot_top_sequences", "get_top_behavior_sequences")
 
 PKL_FOLDER = "data/action_detection/loaded"
 
 def register_callbacks(app):
+    # Datumswahl -> Tageszusammenfassung (serverseitig, Store hält Schlüssel + Kennzahlen)
+    @app.callback(
+        Output("flow-day-summary", "data"),
+        Input("flow-date-selector", "value"),
+    )
+    def select_flow_day(date):
+        return summary_ref(PKL_FOLDER, date)
+
     @app.callback(
         Output("behavior-flow-graph", "figure"),
         Output("behavior-flow-text", "children"),
         Output("behavior-top-sequences", "children"),  # NEU
-        Input("flow-date-selector", "value")
+        Input("flow-day-summary", "data")
     )
-    def update_flow(date):
+    def update_flow(ref):
+        date = ref_date(ref)
         fig, report = generate_behavior_dfg(PKL_FOLDER, date)
         sequences_text = get_top_behavior_sequences(PKL_FOLDER, date)
 
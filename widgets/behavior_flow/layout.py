@@ -1,24 +1,24 @@
 from dash import html, dcc
 import dash_bootstrap_components as dbc
-import pandas as pd
 
-from widgets.utils import load_behavior_data
+from widgets.catalog import catalog_dates
 
 PKL_FOLDER = "data/action_detection/loaded"
 
 
 def layout():
-    df = load_behavior_data(PKL_FOLDER)
-    if df.empty:
+    # Datumswerte als Strings für stabile Dropdown-Values (aus dem Datenkatalog)
+    dates = catalog_dates(PKL_FOLDER)
+    if not dates:
         return dbc.Alert("Keine Daten verfügbar.", color="danger", className="mb-3")
 
-    # Datumswerte als Strings für stabile Dropdown-Values
-    dates = sorted({str(d) for d in df["date"].unique()})
     first_date = dates[0] if dates else None
 
     return html.Div(
         [
             html.H4("Verhaltensabläufe – Process Mining"),
+            # Tageszusammenfassung des gewählten Datums (siehe widgets/day_summary.py)
+            dcc.Store(id="flow-day-summary"),
 
             # --- Steuerung: Datum ---
             dbc.Row(
@@ -1,24 +1,27 @@
-import pandas as pd
 import plotly.graph_objects as go
 import networkx as nx
-from widgets.utils import load_behavior_data
+from widgets.day_summary import get_day_summary, transition_counts
+from widgets.utils import load_behavior_slice
+from widgets.figure_cache import memoize_figure
 
 PKL_FOLDER = "data/action_detection/loaded"
 
+@memoize_figure(source_arg="folder_path")
 def generate_behavior_dfg(folder_path, date=None):
-    df = load_behavior_data(folder_path)
-
     if date:
-        df = df[df['date'] == pd.to_datetime(date).date()]
-    if df.empty:
-        return "Keine Daten geladen.", ""
-
-    df = df.sort_values("t")
-    df['next_behavior'] = df['dominant_behavior'].shift(-1)
-    transitions = df[df['dominant_behavior'] != df['next_behavior']]
-
-    # Übergänge zählen
-    dfg_counts = transitions.groupby(['dominant_behavior', 'next_behavior']).size().reset_index(name='count')
+        # Übergänge aus der Tageszusammenfassung (pro Datenversion und Tag einmal gezählt)
+        summary = get_day_summary(folder_path, date)
+        if summary["frames"].empty:
+            return "Keine Daten geladen.", ""
+        dfg_counts = summary["transitions"]
+    else:
+        df = load_behavior_slice(folder_path, columns=['t', 'dominant_behavior'])
+        if df.empty:
+            return "Keine Daten geladen.", ""
+        # Store liefert zeitlich sortiert; nur sonst (z. B. Parquet-Fallback) sortieren
+        if not df['t'].is_monotonic_increasing:
+            df = df.sort_values("t")
+        dfg_counts = transition_counts(df)
 
     # Graph erzeugen
     G = nx.DiGraph()
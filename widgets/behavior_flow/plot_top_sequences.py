@@ -1,25 +1,30 @@
-import pandas as pd
 from collections import Counter
 
-from widgets.utils import load_behavior_data
+from widgets.day_summary import get_day_summary, in_source_order, sequence_counts
+from widgets.utils import load_behavior_slice
+from widgets.figure_cache import memoize_figure
 
+@memoize_figure(source_arg="folder_path")
 def get_top_behavior_sequences(folder_path, date=None, n=3, top_k=5):
-    df = load_behavior_data(folder_path)
-    
     if date:
-        df = df[df['date'] == pd.to_datetime(date).date()]
-    if df.empty or len(df) < n:
-        return "Keine ausreichenden Daten vorhanden."
+        # n-Gramme aus der Tageszusammenfassung (3-Gramme vorberechnet)
+        summary = get_day_summary(folder_path, date)
+        if len(summary["frames"]) < n:
+            return "Keine ausreichenden Daten vorhanden."
+        most_common = sequence_counts(summary, n)[:top_k]
+    else:
+        df = load_behavior_slice(folder_path, columns=['dominant_behavior', 'source'])
+        if df.empty or len(df) < n:
+            return "Keine ausreichenden Daten vorhanden."
 
-    # Nur relevante Spalte
-    behaviors = df['dominant_behavior'].tolist()
+        # Nur relevante Spalte, in Dateireihenfolge (keine buchtübergreifenden Folgen)
+        behaviors = in_source_order(df)['dominant_behavior'].tolist()
 
-    # Erzeuge n-gramme: z. B. ("feeding", "lying", "feeding")
-    sequences = zip(*[behaviors[i:] for i in range(n)])
-    sequence_counts = Counter(sequences)
+        # Erzeuge n-gramme: z. B. ("feeding", "lying", "feeding")
+        sequences = zip(*[behaviors[i:] for i in range(n)])
 
-    # Sortiere nach Häufigkeit
-    most_common = sequence_counts.most_common(top_k)
+        # Sortiere nach Häufigkeit
+        most_common = Counter(sequences).most_common(top_k)
 
     lines = [f"Top-{top_k} {n}-er Verhaltensequenzen am {date}:\n"]
     for i, (seq, count) in enumerate(most_common, 1):
@@ -1,68 +1,86 @@
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 from dash import Input, Output, html
 
-from widgets.utils import load_behavior_data
-from widgets.behavior_position.plot_position_image import generate_behavior_position_image
-from widgets.behavior_position.plot_zone_duration import generate_zone_duration_image
-from widgets.behavior_position.plot_zone_overview import generate_zone_overview_image
-from widgets.behavior_position.plot_zone_hour_heatmap import generate_zone_hour_heatmap  # ⬅️ wieder Matrix
+from widgets.background import background_callback
+from widgets.catalog import catalog_dates
+from widgets.day_summary import summary_from_ref, summary_ref
+from widgets.lazy import lazy_callable
+from widgets.metrics import bind
+from widgets.image_store import image_src, is_image_src
+
+# matplotlib/scikit-learn/scipy erst beim ersten Callback importieren (Background: preload vor dem ersten Worker)
+_PKG = "widgets.behavior_position"
+generate_behavior_position_image = lazy_callable(f"{_PKG}.plot_position_image", "generate_behavior_position_image")
+generate_zone_duration_image = lazy_callable(f"{_PKG}.plot_zone_duration", "generate_zone_duration_image")
+generate_zone_overview_image = lazy_callable(f"{_PKG}.plot_zone_overview", "generate_zone_overview_image")
+generate_zone_hour_heatmap = lazy_callable(f"{_PKG}.plot_zone_hour_heatmap", "generate_zone_hour_heatmap")  # ⬅️ wieder Matrix
 
 PKL_FOLDER = "data/action_detection/loaded"
 
 
-def _available_dates(folder_path: str, behavior: str | None) -> list[str]:
-    df = load_behavior_data(folder_path)
-    if behavior:
-        df = df[df["dominant_behavior"] == behavior]
-    if df.empty:
-        return []
-    return sorted({d.strftime("%Y-%m-%d") for d in df["date"]})
+def _day(ref):
+    """(Datum, Tagesausschnitt) zum Inhalt eines Tageszusammenfassungs-Stores."""
+    summary = summary_from_ref(PKL_FOLDER, ref)
+    if summary is None:
+        return None, None
+    return summary["date"], summary["frames"]
 
 
 def register_callbacks(app):
-    # --- Position / Aufenthaltsdauer / Stallübersicht ---
-    @app.callback(
+    # --- Position / Aufenthaltsdauer / Stallübersicht (Hintergrund-Callback mit Fortschritt) ---
+    @background_callback(
+        app,
         Output("position-image-output", "children"),
         Output("zone-image-output", "children"),
         Output("zone-overview-image-output", "children"),
         Input("position-behavior-selector", "value"),
-        Input("position-date-selector", "value"),
+        Input("position-day-summary", "data"),
+        Input("position-render-mode", "value"),
+        folder_path=PKL_FOLDER,
+        progress=[Output("position-progress", "value"), Output("position-progress", "max")],
+        running=[(Output("position-progress", "style"), {"width": "100%"}, {"display": "none"})],
+        cancel=[Input("url", "pathname")],
+        preload=[f"{_PKG}.plot_position_image", f"{_PKG}.plot_zone_duration",
+                 f"{_PKG}.plot_zone_overview", "matplotlib.backends.backend_agg"],
     )
-    def update_plots(behavior, date):
-        # Positionen (mit Sampling)
-        scatter_src = generate_behavior_position_image(
-            PKL_FOLDER, behavior, date,
-            sample_fraction=0.10, max_points=10000
-        )
-        scatter_element = (
-            html.Img(src=scatter_src, style={"maxWidth": "100%"})
-            if isinstance(scatter_src, str) and scatter_src.startswith("data:image")
-            else html.P(scatter_src, style={"color": "red"})
-        )
+    def update_plots(set_progress, behavior, ref, render_mode):
+        # Tagesausschnitt aus der Zusammenfassung (alle Verhalten); alle drei Bilder filtern selbst
+        date, day_frames = _day(ref)
 
-        # Aufenthaltsdauer je Zone (tagesweises Zonenmodell)
-        zone_src = generate_zone_duration_image(
-            PKL_FOLDER, behavior, date,
-            n_clusters=4, fit_sample_fraction=0.20, predict_sample_fraction=0.25
-        )
-        zone_element = (
-            html.Img(src=zone_src, style={"maxWidth": "100%"})
-            if isinstance(zone_src, str) and zone_src.startswith("data:image")
-            else html.P(zone_src, style={"color": "red"})
-        )
+        jobs = [
+            # Positionen (Dichteraster über alle Frames oder Stichprobe als Punktwolke)
+            lambda: generate_behavior_position_image(
+                PKL_FOLDER, behavior, date,
+                sample_fraction=0.10, max_points=10000, mode=render_mode or "density",
+                day_frames=day_frames,
+            ),
+            # Aufenthaltsdauer je Zone (tagesweises Zonenmodell)
+            lambda: generate_zone_duration_image(
+                PKL_FOLDER, behavior, date,
+                n_clusters=4, fit_sample_fraction=0.20, predict_sample_fraction=0.25,
+                day_frames=day_frames,
+            ),
+            # Stallübersicht (tagesweises Zonenmodell)
+            lambda: generate_zone_overview_image(
+                PKL_FOLDER, date, behavior_filter=behavior,
+                n_clusters=4, fit_sample_fraction=0.20,
+                day_frames=day_frames,
+            ),
+        ]
+        # gleichzeitig rendern (matplotlib ohne pyplot, thread-sicher)
+        set_progress((0, len(jobs)))
+        with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="position-plot") as pool:
+            futures = [pool.submit(bind(job)) for job in jobs]
+            for done, _ in enumerate(as_completed(futures), 1):
+                set_progress((done, len(jobs)))
+            sources = [f.result() for f in futures]
 
-        # Stallübersicht (tagesweises Zonenmodell)
-        overview_src = generate_zone_overview_image(
-            PKL_FOLDER, date, behavior_filter=behavior,
-            n_clusters=4, fit_sample_fraction=0.20
+        return tuple(
+            html.Img(src=image_src(src), style={"maxWidth": "100%"}) if is_image_src(src)
+            else html.P(src, style={"color": "red"})
+            for src in sources
         )
-        overview_element = (
-            html.Img(src=overview_src, style={"maxWidth": "100%"})
-            if isinstance(overview_src, str) and overview_src.startswith("data:image")
-            else html.P(overview_src, style={"color": "red"})
-        )
-
-        return scatter_element, zone_element, overview_element
 
     # --- Dropdown für Position-Datum dynamisch füllen ---
     @app.callback(
@@ -71,7 +89,7 @@ def register_callbacks(app):
         Input("position-behavior-selector", "value"),
     )
     def sync_position_dates(behavior):
-        dates = _available_dates(PKL_FOLDER, behavior)
+        dates = catalog_dates(PKL_FOLDER, behavior)
         value = dates[-1] if dates else None
         return [{"label": d, "value": d} for d in dates], value
 
@@ -82,19 +100,41 @@ def register_callbacks(app):
         Input("zone-hour-behavior-selector", "value"),
     )
     def sync_zonehour_dates(behavior):
-        dates = _available_dates(PKL_FOLDER, behavior)
+        dates = catalog_dates(PKL_FOLDER, behavior)
         value = dates[-1] if dates else None
         return [{"label": d, "value": d} for d in dates], value
 
-    # --- Matrix-Heatmap: Zone × Stunde ---
+    # --- Datumswahl -> Tageszusammenfassung (serverseitig berechnet, Store hält nur den Schlüssel) ---
+    @app.callback(
+        Output("position-day-summary", "data"),
+        Input("position-date-selector", "value"),
+    )
+    def select_position_day(date):
+        return summary_ref(PKL_FOLDER, date)
+
     @app.callback(
+        Output("zone-hour-day-summary", "data"),
+        Input("zone-hour-date-selector", "value"),
+    )
+    def select_zonehour_day(date):
+        return summary_ref(PKL_FOLDER, date)
+
+    # --- Matrix-Heatmap: Zone × Stunde (Hintergrund-Callback, Zonenlernen kann dauern) ---
+    @background_callback(
+        app,
         Output("zone-hour-heatmap", "figure"),
         Input("zone-hour-behavior-selector", "value"),
-        Input("zone-hour-date-selector", "value"),
+        Input("zone-hour-day-summary", "data"),
+        folder_path=PKL_FOLDER,
+        running=[(Output("zone-hour-status", "children"), "Zonenmodell wird berechnet …", "")],
+        cancel=[Input("url", "pathname")],
+        preload=[f"{_PKG}.plot_zone_hour_heatmap"],
     )
-    def update_zone_hour_heatmap(behavior, date):
+    def update_zone_hour_heatmap(behavior, ref):
+        date, day_frames = _day(ref)
         fig = generate_zone_hour_heatmap(
             PKL_FOLDER, behavior, date,
-            n_clusters=4, fit_sample_fraction=0.20, predict_sample_fraction=0.25
+            n_clusters=4, fit_sample_fraction=0.20, predict_sample_fraction=0.25,
+            day_frames=day_frames,
         )
         return fig
@@ -6,6 +6,10 @@ from widgets.utils import BEHAVIORS
 def layout():
     return html.Div(
         [
+            # Tageszusammenfassungen (Schlüssel + Kennzahlen, siehe widgets/day_summary.py)
+            dcc.Store(id="position-day-summary"),
+            dcc.Store(id="zone-hour-day-summary"),
+
             # === Positionen (ganze Breite) ===
             dbc.Row(
                 [
@@ -37,6 +41,19 @@ def layout():
                                         ],
                                         className="g-2 mb-3"
                                     ),
+                                    dbc.RadioItems(
+                                        id="position-render-mode",
+                                        options=[
+                                            {"label": "Dichte (alle Frames)", "value": "density"},
+                                            {"label": "Punkte (Stichprobe)", "value": "scatter"},
+                                        ],
+                                        value="density",
+                                        inline=True,
+                                        className="mb-2",
+                                    ),
+                                    # Fortschritt der drei Bilder (nur während der Berechnung sichtbar)
+                                    html.Progress(id="position-progress", value="0", max="3",
+                                                  style={"display": "none"}),
                                     html.Div(id="position-image-output", style={"minHeight": "420px"}),
                                 ]
                             )
@@ -99,6 +116,7 @@ def layout():
                             ],
                             className="g-2 mb-3"
                         ),
+                        html.Small(id="zone-hour-status", className="text-muted"),
                         dcc.Graph(id="zone-hour-heatmap", style={"height": "520px"}),
                     ]
                 ),
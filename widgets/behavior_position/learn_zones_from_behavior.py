@@ -1,12 +1,10 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-import io
-import base64
-from scipy.stats import mode
 from sklearn.cluster import DBSCAN
+from matplotlib.lines import Line2D
 
 from widgets.utils import BEHAVIORS
+from widgets.image_store import figure_url, new_figure
 
 # Verhalten → Farbe
 BEHAVIOR_COLORS = {
@@ -43,7 +41,8 @@ def generate_zone_map_image_for_date(df, date_str, behavior_filter=None, eps=40,
 
     print(f"🧮 Cluster gefunden: {df_day['cluster'].nunique() - (-1 in df_day['cluster'].unique())}")
 
-    fig, ax = plt.subplots(figsize=(10, 7))
+    fig = new_figure((10, 7))
+    ax = fig.subplots()
     ax.set_title(f"Zonenkarte am {date_str} (DBSCAN)")
     ax.set_xlabel("x (Pixel)")
     ax.set_ylabel("y (Pixel)")
@@ -52,7 +51,7 @@ def generate_zone_map_image_for_date(df, date_str, behavior_filter=None, eps=40,
     clusters = df_day[df_day['cluster'] != -1].groupby('cluster')
     for cluster_id, group in clusters:
         # Dominantes Verhalten im Cluster
-        behavior = mode(group['dominant_behavior'], keepdims=True)[0][0]
+        behavior = group['dominant_behavior'].mode().iloc[0]
         color = BEHAVIOR_COLORS.get(behavior, "#cccccc")
 
         # Punkte
@@ -64,18 +63,11 @@ def generate_zone_map_image_for_date(df, date_str, behavior_filter=None, eps=40,
 
     # Legende nur mit verwendeten Verhalten
     used_behaviors = sorted(df_day['dominant_behavior'].unique(), key=lambda b: BEHAVIORS.index(b) if b in BEHAVIORS else 999)
-    handles = [plt.Line2D([0], [0], marker='o', linestyle='None',
+    handles = [Line2D([0], [0], marker='o', linestyle='None',
                color=BEHAVIOR_COLORS.get(b, "#ccc"), label=b)
                for b in used_behaviors]
     ax.legend(handles=handles, title="Verhalten", bbox_to_anchor=(1.05, 1), loc="upper left")
 
-    plt.tight_layout()
-
-    # Encode to base64
-    buf = io.BytesIO()
-    plt.savefig(buf, format="png")
-    plt.close(fig)
-    buf.seek(0)
-    encoded = base64.b64encode(buf.read()).decode('utf-8')
+    url = figure_url(fig)
     print("✅ Zonenbild erfolgreich generiert.")
-    return f"data:image/png;base64,{encoded}"
+    return url
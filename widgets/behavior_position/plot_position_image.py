@@ -1,53 +1,96 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
 import matplotlib
-import io, base64
-from widgets.utils import load_behavior_data
-
-matplotlib.use("Agg")
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Normalize
+from matplotlib.ticker import FuncFormatter
+from widgets.utils import load_behavior_slice
+from widgets.figure_cache import memoize_figure
+from widgets.image_store import figure_url, new_figure
 
 STALL_X_MIN, STALL_X_MAX = 50, 820
 STALL_Y_MIN, STALL_Y_MAX = 80, 460
+MARGIN = 20                 # Rand um den Stall (wie die Achsengrenzen)
+CELL_PX = 2                 # Kantenlänge einer Rasterzelle in Pixeln (Modus "density")
+DENSITY_CMAP = "inferno"
+
+def density_grid(x, y, cell_px=CELL_PX):
+    """
+    Zählt alle Punkte in einem festen Raster über den Stallbereich (inkl. Rand).
+    Rückgabe: (Matrix Zeilen=y, Spalten=x, extent für imshow). Punkte außerhalb fallen weg.
+    """
+    x0, x1 = STALL_X_MIN - MARGIN, STALL_X_MAX + MARGIN
+    y0, y1 = STALL_Y_MIN - MARGIN, STALL_Y_MAX + MARGIN
+    nx = int(np.ceil((x1 - x0) / cell_px))
+    ny = int(np.ceil((y1 - y0) / cell_px))
+
+    ix = np.floor((np.asarray(x, dtype=np.float64) - x0) / cell_px)
+    iy = np.floor((np.asarray(y, dtype=np.float64) - y0) / cell_px)
+    ok = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)      # NaN ist hier automatisch False
+    cell = iy[ok].astype(np.int64) * nx + ix[ok].astype(np.int64)
+    grid = np.bincount(cell, minlength=nx * ny).reshape(ny, nx)
+    # Zeile 0 = kleinstes y oben (y-Achse wie im Kamerabild nach unten)
+    return grid, (x0, x0 + nx * cell_px, y0 + ny * cell_px, y0)
 
+def _draw_density(fig, ax, grid, extent):
+    """
+    Raster als fertiges RGBA-Bild (Farbe = log10 Anzahl, leere Zellen transparent) plus
+    Farbskala mit Dekaden-Ticks. Kosten hängen nur von der Rastergröße ab.
+    """
+    top = max(np.log10(max(int(grid.max()), 1)), 1.0)
+    norm = Normalize(0, top)
+    rgba = matplotlib.colormaps[DENSITY_CMAP](norm(np.log10(np.maximum(grid, 1))), bytes=True)
+    rgba[grid == 0] = 0
+    ax.imshow(rgba, extent=extent, interpolation="nearest", aspect="auto")
+    bar = fig.colorbar(ScalarMappable(norm=norm, cmap=DENSITY_CMAP), ax=ax,
+                       ticks=np.arange(0, np.floor(top) + 1), label="Frames je Zelle")
+    bar.ax.yaxis.set_major_formatter(FuncFormatter(lambda v, _: f"{10 ** v:.0f}"))
+
+@memoize_figure(source_arg="folder_path", ignore=("day_frames",))
 def generate_behavior_position_image(
     folder_path,
     behavior='feeding',
     date=None,
     sample_fraction: float = 0.10,
     max_points: int = 10000,
-    random_state: int = 42
+    random_state: int = 42,
+    mode: str = "density",
+    day_frames=None,
 ):
-    df = load_behavior_data(folder_path)
-    if df.empty:
-        return "Keine Daten geladen."
-
-    if date:
-        df = df[df['date'] == pd.to_datetime(date).date()]
-    if behavior:
-        df = df[df['dominant_behavior'] == behavior]
-
+    """
+    mode="density": alle Frames im Raster (CELL_PX) gezählt, Farbe = Anzahl (log10);
+                    Renderzeit hängt von der Rastergröße ab, nicht von der Zeilenzahl.
+    mode="scatter": Punktwolke aus einer Stichprobe (sample_fraction, höchstens max_points).
+    day_frames: schon geladener Tagesausschnitt von date (x_center, y_center,
+                dominant_behavior), z. B. vom Callback geteilt; None = selbst laden.
+    """
+    if day_frames is not None:
+        df = day_frames[day_frames['dominant_behavior'] == behavior] if behavior else day_frames
+    else:
+        # nur Tag, Verhalten und Koordinaten laden
+        df = load_behavior_slice(folder_path, date=date or None, behavior=behavior,
+                                 columns=['x_center', 'y_center'])
     if df.empty:
         return f"Keine Daten für {behavior} am {date}"
 
-    # 🔹 Sampling für schnelleres Plotten
-    if 0 < sample_fraction < 1.0:
-        n = min(max_points, max(1, int(len(df) * sample_fraction)))
-        if n < len(df):
-            df = df.sample(n=n, random_state=random_state)
+    fig = new_figure((8, 6))
+    ax = fig.subplots()
+    if mode == "density":
+        grid, extent = density_grid(df['x_center'].to_numpy(), df['y_center'].to_numpy())
+        _draw_density(fig, ax, grid, extent)
+        ax.set_title(f"Aktivitätsdichte: {behavior} am {date} ({len(df):,} Frames)".replace(",", "."))
+    else:
+        # 🔹 Sampling für schnelleres Plotten
+        if 0 < sample_fraction < 1.0:
+            n = min(max_points, max(1, int(len(df) * sample_fraction)))
+            if n < len(df):
+                df = df.sample(n=n, random_state=random_state)
+        ax.scatter(df['x_center'], df['y_center'], alpha=0.3, s=10)
+        ax.set_title(f"Aktivitätspositionen: {behavior} am {date}")
 
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.scatter(df['x_center'], df['y_center'], alpha=0.3, s=10)
-
-    ax.set_title(f"Aktivitätspositionen: {behavior} am {date}")
     ax.set_xlabel("x-Position (Pixel)")
     ax.set_ylabel("y-Position (Pixel)")
-    ax.set_xlim(STALL_X_MIN - 20, STALL_X_MAX + 20)
-    ax.set_ylim(STALL_Y_MAX + 20, STALL_Y_MIN - 20)
-    ax.grid(True)
-
-    buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format="png")
-    plt.close(fig)
-    buf.seek(0)
-    return f"data:image/png;base64,{base64.b64encode(buf.read()).decode('utf-8')}"
+    ax.set_xlim(STALL_X_MIN - MARGIN, STALL_X_MAX + MARGIN)
+    ax.set_ylim(STALL_Y_MAX + MARGIN, STALL_Y_MIN - MARGIN)
+    ax.grid(True, alpha=0.3 if mode == "density" else 1.0)
+
+    return figure_url(fig)
@@ -1,9 +1,9 @@
 import os
 import numpy as np
-import pandas as pd
 import plotly.graph_objects as go
 
-from widgets.utils import load_behavior_data
+from widgets.utils import load_behavior_slice
+from widgets.figure_cache import memoize_figure
 
 # Stallrahmen (wie in deinen anderen Plots)
 STALL_X_MIN, STALL_X_MAX = 50, 820
@@ -14,6 +14,7 @@ ASSETS_BG = "assets/stall_topview.png"  # optionales Top-View-Bild
 def _has_bg():
     return os.path.exists(ASSETS_BG)
 
+@memoize_figure(source_arg="folder_path")
 def generate_spatial_hour_heatmap(
     folder_path: str,
     behavior: str,
@@ -25,18 +26,10 @@ def generate_spatial_hour_heatmap(
     smoothing_sigma: float | None = 1.0,     # optionales Glätten (requires scipy)
     random_state: int = 42,
 ):
-    df = load_behavior_data(folder_path)
-    if df.empty:
-        return _empty_fig("Keine Daten geladen.")
-
-    # Filtern
-    day = pd.to_datetime(date).date() if date else None
-    if day is not None:
-        df = df[df["date"] == day]
-    if behavior:
-        df = df[df["dominant_behavior"] == behavior]
-    if hour is not None:
-        df = df[df["hour"] == int(hour)]
+    # Filtern (Tag + Stunde per Offset-Index, Verhalten schon beim Laden)
+    df = load_behavior_slice(folder_path, date=date or None, behavior=behavior,
+                             hour=None if hour is None else int(hour),
+                             columns=["x_center", "y_center", "hour"])
 
     if df.empty:
         return _empty_fig(f"Keine Daten für {behavior} – {date} Stunde {hour}")
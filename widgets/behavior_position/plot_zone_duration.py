@@ -7,26 +7,22 @@ Aufenthaltsdauer je Zone (Barplot) auf Basis eines *tagesweit* gelernten Zonenmo
 - Optionales Sampling beim Zählen beschleunigt die Aggregation; die Ergebnisse werden
   auf die Gesamtmenge hochskaliert.
 
-Rückgabe: data:image/png;base64,...  (oder ein Fehlertext)
+Rückgabe: Bild-URL /img/<sha1>.png (widgets.image_store) oder ein Fehlertext
 """
 
 from __future__ import annotations
 
-import io
-import base64
-import matplotlib
-import matplotlib.pyplot as plt
-import pandas as pd
 
-from widgets.utils import load_behavior_data
+from widgets.utils import load_behavior_slice
 from widgets.behavior_position.zone_learning import (
     get_or_fit_kmeans_for_date,
     assign_zone_labels,
 )
-
-matplotlib.use("Agg")
+from widgets.figure_cache import memoize_figure
+from widgets.image_store import figure_url, new_figure
 
 
+@memoize_figure(source_arg="folder_path", ignore=("day_frames",))
 def generate_zone_duration_image(
     folder_path: str,
     behavior: str,
@@ -36,6 +32,7 @@ def generate_zone_duration_image(
     predict_sample_fraction: float | None = 0.25,  # Sampling fürs Zählen (None = alle)
     max_fit_points: int = 20_000,
     random_state: int = 42,
+    day_frames=None,
 ) -> str:
     """
     Erzeugt einen Balkenplot der Aufenthaltsdauer (in Stunden) je automatisch gelernter Zone
@@ -44,7 +41,7 @@ def generate_zone_duration_image(
     Parameters
     ----------
     folder_path : str
-        Ordner mit den geladenen Pickle-Dateien (load_behavior_data liest daraus).
+        Ordner mit den geladenen Pickle-Dateien (load_behavior_slice liest daraus).
     behavior : str
         Verhalten, für das die Dauer je Zone berechnet werden soll.
     date : str
@@ -59,23 +56,22 @@ def generate_zone_duration_image(
         Obergrenze der Punkte beim Fitten (Performance).
     random_state : int
         RNG für reproduzierbares Sampling.
+    day_frames : DataFrame | None
+        Schon geladener Tagesausschnitt (x_center, y_center, dominant_behavior), z. B. vom
+        Callback geteilt; None = selbst laden. Geht nicht in den Cache-Schlüssel ein.
 
     Returns
     -------
     str
-        "data:image/png;base64,..." oder ein Fehlertext.
+        Bild-URL "/img/<sha1>.png" oder ein Fehlertext.
     """
     if not date:
         return "Kein Datum gewählt."
 
     # Tagesdaten (ohne Verhaltensfilter fürs Modell)
-    df_all = load_behavior_data(folder_path)
-    if df_all is None or df_all.empty:
-        return "Keine Daten geladen."
-
-    day = pd.to_datetime(date).date()
-    df_day = df_all[df_all["date"] == day]
-    if df_day.empty:
+    df_day = day_frames if day_frames is not None else load_behavior_slice(
+        folder_path, date=date, columns=["x_center", "y_center", "dominant_behavior"])
+    if df_day is None or df_day.empty:
         return f"Keine Daten am {date}"
 
     # Tages-Zonenmodell (ohne Verhaltensfilter) -> stabil über Verhalten
@@ -86,6 +82,7 @@ def generate_zone_duration_image(
         sample_fraction=fit_sample_fraction,
         max_points=max_fit_points,
         random_state=random_state,
+        day_frames=df_day,
     )
     if kmeans is None:
         return "Zonenlernen fehlgeschlagen."
@@ -119,7 +116,8 @@ def generate_zone_duration_image(
     hours.index = [f"Zone {int(z)}" for z in hours.index]
 
     # Plotten
-    fig, ax = plt.subplots(figsize=(8, 4))
+    fig = new_figure((8, 4))
+    ax = fig.subplots()
     hours.plot(kind="bar", ax=ax)
 
     ax.set_ylabel("Zeit in Stunden")
@@ -127,11 +125,4 @@ def generate_zone_duration_image(
     ax.set_title(f"{behavior} am {date} – Aufenthaltsdauer je Zone")
     ax.grid(axis="y", alpha=0.3)
 
-    buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format="png", dpi=120)
-    plt.close(fig)
-    buf.seek(0)
-
-    data_uri = "data:image/png;base64," + base64.b64encode(buf.read()).decode("utf-8")
-    return data_uri
+    return figure_url(fig, dpi=120)
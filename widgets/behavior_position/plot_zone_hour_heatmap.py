@@ -1,12 +1,13 @@
-import pandas as pd
 import plotly.express as px
 
-from widgets.utils import load_behavior_data
+from widgets.utils import load_behavior_slice
 from widgets.behavior_position.zone_learning import (
     get_or_fit_kmeans_for_date,
     assign_zone_labels,
 )
+from widgets.figure_cache import memoize_figure
 
+@memoize_figure(source_arg="folder_path", ignore=("day_frames",))
 def generate_zone_hour_heatmap(
     folder_path: str,
     behavior: str,
@@ -16,17 +17,17 @@ def generate_zone_hour_heatmap(
     predict_sample_fraction: float | None = 0.25,  # Sampling fürs Zählen (None = alle)
     max_fit_points: int = 20_000,
     random_state: int = 42,
+    day_frames=None,                             # Tagesausschnitt (z. B. aus day_summary), sonst laden
 ):
     if not date:
         return _err("Kein Datum gewählt.")
 
-    df_all = load_behavior_data(folder_path)
-    if df_all is None or df_all.empty:
-        return _err("Keine Daten geladen.")
-
-    day = pd.to_datetime(date).date()
-    df_day = df_all[df_all["date"] == day]
-    if df_day.empty:
+    # nur die Partition des Tages und die benötigten Spalten
+    df_day = day_frames
+    if df_day is None:
+        df_day = load_behavior_slice(folder_path, date=date,
+                                     columns=["x_center", "y_center", "hour", "dominant_behavior"])
+    if df_day is None or df_day.empty:
         return _err(f"Keine Daten am {date}")
 
     # 🔒 Zonenmodell PRO TAG (ohne Verhaltensfilter) -> Zonen bleiben bei Verhaltenswechsel konstant
@@ -37,6 +38,7 @@ def generate_zone_hour_heatmap(
         sample_fraction=fit_sample_fraction,
         max_points=max_fit_points,
         random_state=random_state,
+        day_frames=df_day,
     )
     if kmeans is None:
         return _err("Zonenlernen fehlgeschlagen.")
@@ -1,15 +1,13 @@
 import os
-import io
-import base64
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 import matplotlib
+from matplotlib.image import imread
+from matplotlib.lines import Line2D
 
-from widgets.utils import load_behavior_data
+from widgets.utils import load_behavior_slice
 from widgets.behavior_position.zone_learning import learn_zones_kmeans
-
-matplotlib.use("Agg")
+from widgets.figure_cache import memoize_figure
+from widgets.image_store import figure_url, new_figure
 
 # Optionales Hintergrundbild (Top‑View des Stalls).
 # Lege z.B. ein Foto oder Schema als PNG hier ab:
@@ -38,7 +36,7 @@ def name_from_centroid(cx, cy):
 def _load_bg_image(ax):
     if os.path.exists(ASSETS_BG):
         try:
-            img = plt.imread(ASSETS_BG)
+            img = imread(ASSETS_BG)
             ax.imshow(img, extent=[STALL_X_MIN, STALL_X_MAX, STALL_Y_MAX, STALL_Y_MIN])  # invert y
             return True
         except Exception:
@@ -50,6 +48,7 @@ def _load_bg_image(ax):
     )
     return False
 
+@memoize_figure(source_arg="folder_path", ignore=("day_frames",))
 def generate_zone_overview_image(
     folder_path,
     date: str | None,
@@ -57,17 +56,20 @@ def generate_zone_overview_image(
     n_clusters: int = 4,
     fit_sample_fraction: float = 0.2,
     max_fit_points: int = 20000,
-    random_state: int = 42
+    random_state: int = 42,
+    day_frames=None,
 ):
-    """Erstellt ein Bild: Hintergrund (Stall) + gelernten Zonen (als farbige Flächen) + Legende."""
-    df = load_behavior_data(folder_path)
-    if df.empty:
-        return "Keine Daten geladen."
-
-    if date:
-        df = df[df["date"] == pd.to_datetime(date).date()]
-    if behavior_filter:
-        df = df[df["dominant_behavior"] == behavior_filter]
+    """
+    Erstellt ein Bild: Hintergrund (Stall) + gelernten Zonen (als farbige Flächen) + Legende.
+    day_frames: schon geladener Tagesausschnitt von date (x_center, y_center,
+                dominant_behavior); None = selbst laden.
+    """
+    if day_frames is not None:
+        df = (day_frames[day_frames["dominant_behavior"] == behavior_filter]
+              if behavior_filter else day_frames)
+    else:
+        df = load_behavior_slice(folder_path, date=date or None, behavior=behavior_filter,
+                                 columns=["x_center", "y_center"])
     if df.empty:
         return f"Keine Daten für Filter am {date}"
 
@@ -93,12 +95,13 @@ def generate_zone_overview_image(
         use_hull = False
 
     # Für die Hüllen brauchen wir ein paar Punkte pro Cluster
-    labels = kmeans.predict(df[feat_cols].values)
+    labels = kmeans.predict(df[feat_cols].to_numpy(dtype=np.float64))
     df_plot = df.copy()
     df_plot["zone_id"] = labels  # 0..K-1
 
     # Plot
-    fig, ax = plt.subplots(figsize=(8, 6))
+    fig = new_figure((8, 6))
+    ax = fig.subplots()
     ax.set_xlim(STALL_X_MIN - 20, STALL_X_MAX + 20)
     ax.set_ylim(STALL_Y_MAX + 20, STALL_Y_MIN - 20)  # invert y
     ax.set_xlabel("x (Pixel)")
@@ -108,7 +111,7 @@ def generate_zone_overview_image(
     _load_bg_image(ax)
 
     # Farben pro Zone (wiederverwendbar)
-    cmap = plt.get_cmap("tab10")
+    cmap = matplotlib.colormaps["tab10"]
     handles = []
     for zid in range(len(centers)):
         color = cmap(zid % 10)
@@ -130,15 +133,10 @@ def generate_zone_overview_image(
         ax.text(cx, cy, f"Zone {zid+1}", ha="center", va="center", fontsize=9, weight="bold")
 
         # Legenden-Handle sammeln
-        handles.append(plt.Line2D([0],[0], marker='s', linestyle='None', color=color, label=f"Zone {zid+1} – {zone_names[zid]}"))
+        handles.append(Line2D([0],[0], marker='s', linestyle='None', color=color, label=f"Zone {zid+1} – {zone_names[zid]}"))
 
     # Legende rechts außen
     if handles:
         ax.legend(handles=handles, title="Zonenzuordnung", bbox_to_anchor=(1.02, 1), loc="upper left")
 
-    buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format="png", dpi=120)
-    plt.close(fig)
-    buf.seek(0)
-    return f"data:image/png;base64,{base64.b64encode(buf.read()).decode('utf-8')}"
+    return figure_url(fig, dpi=120)
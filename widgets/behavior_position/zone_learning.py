@@ -4,16 +4,24 @@ Zonenlernen & Zuweisung für behavior_position.
 Funktionen:
 - learn_zones_kmeans(df, ...)
 - assign_zone_labels(df, kmeans, feature_cols=("x_center", "y_center"))
-- get_or_fit_kmeans_for_date(folder_path, date, ...)  # lernt EIN Modell pro Tag (ohne Verhaltensfilter)
+- get_or_fit_kmeans_for_date(folder_path, date, ..., day_frames=None)  # EIN Modell pro Tag (ohne Verhaltensfilter)
 - clear_zone_model_cache(date: Optional[str] = None)  # Cache (global) leeren
 
 Design:
 - Zonen werden *pro Tag* gelernt und gecacht, damit sich die Stallübersicht nicht bei Verhaltenswechsel ändert.
 - Für Darstellung/Counting kann weiterhin nach Verhalten gefiltert werden, die Zonen bleiben jedoch gleich.
+- Cache-Schlüssel enthält Ordner und Datenversion (frame_store.data_version): neue Daten -> neues Modell.
+  Modelle älterer Versionen eines Ordners werden verworfen, sobald frame_store die neue Version sieht.
+- Hat der Aufrufer den Tag schon geladen (day_frames), wird bei einem Cache-Fehlschlag nicht erneut geladen.
+- Hinter dem In-Memory-Cache liegt background.disk_cache() (gleicher Schlüssel): Background-
+  Callbacks laufen in kurzlebigen Worker-Prozessen, ein dort gefittetes Modell steht so dem
+  nächsten Worker und dem Hauptprozess zur Verfügung. Ohne diskcache nur im Speicher.
 """
 
 from __future__ import annotations
 
+import os
+import threading
 from typing import Dict, Tuple, Optional, List
 import pandas as pd
 import numpy as np
@@ -24,7 +32,10 @@ try:
 except Exception as e:
     raise ImportError("scikit-learn wird benötigt (sklearn.cluster.KMeans).") from e
 
-from widgets.utils import load_behavior_data
+from widgets import background
+from widgets.frame_store import data_version, on_new_version
+from widgets.metrics import count_rows, stage
+from widgets.utils import load_behavior_slice
 
 
 # ------------------------------
@@ -74,7 +85,9 @@ def learn_zones_kmeans(
             feats = feats.sample(n=n, random_state=random_state)
 
     km = _make_kmeans(n_clusters=n_clusters, random_state=random_state)
-    km.fit(feats.values)
+    with stage("kmeans"):
+        km.fit(feats.to_numpy(dtype=np.float64))
+    count_rows(len(feats))
     return km, feature_cols
 
 
@@ -90,7 +103,7 @@ def assign_zone_labels(
     if df is None or df.empty or kmeans is None:
         return pd.Series(dtype="int64", name="zone_label")
 
-    X = df[list(feature_cols)].values
+    X = df[list(feature_cols)].to_numpy(dtype=np.float64)  # Kompakt-Schema: float32
     labels = kmeans.predict(X)
     return pd.Series(labels + 1, index=df.index, name="zone_label")
 
@@ -99,28 +112,50 @@ def assign_zone_labels(
 # Tages-Modell + In-Memory Cache
 # ------------------------------
 
-# key: (date_iso, n_clusters, random_state) -> KMeans
-_MODEL_CACHE: Dict[Tuple[str, int, int], KMeans] = {}
+# key: (date_iso, folder_path, data_version, n_clusters, random_state) -> KMeans
+_MODEL_CACHE: Dict[Tuple[str, str, str, int, int], KMeans] = {}
+_MODEL_LOCK = threading.Lock()
 
 
-def _cache_key(day_iso: str, n_clusters: int, random_state: int) -> Tuple[str, int, int]:
-    return (day_iso, n_clusters, random_state)
+def _cache_key(day_iso: str, folder_path: str, n_clusters: int,
+               random_state: int) -> Tuple[str, str, str, int, int]:
+    return (day_iso, folder_path, data_version(folder_path), n_clusters, random_state)
+
+
+def _drop_stale_models(folder_key: str, version: str) -> None:
+    """frame_store.on_new_version: Modelle älterer Datenversionen des Ordners verwerfen."""
+    with _MODEL_LOCK:
+        stale = [k for k in _MODEL_CACHE
+                 if os.path.normpath(k[1]) == folder_key and k[2] != version]
+        for k in stale:
+            _MODEL_CACHE.pop(k, None)
+
+
+on_new_version(_drop_stale_models)
 
 
 def clear_zone_model_cache(date: Optional[str] = None) -> None:
     """
-    Leert den gesamten Cache oder (wenn date gesetzt) nur Einträge für dieses Datum.
+    Leert den gesamten Cache oder (wenn date gesetzt) nur Einträge für dieses Datum
+    (Speicher und Platte).
     """
-    if not _MODEL_CACHE:
-        return
-    if date is None:
-        _MODEL_CACHE.clear()
-        return
+    prefix = "zone_model:("
+    if date is not None:
+        prefix += repr(pd.to_datetime(date).date().isoformat())
+    disk = background.disk_cache()
+    if disk is not None:
+        for k in [k for k in disk if isinstance(k, str) and k.startswith(prefix)]:
+            disk.delete(k)
+
+    with _MODEL_LOCK:
+        if date is None:
+            _MODEL_CACHE.clear()
+            return
 
-    day_iso = pd.to_datetime(date).date().isoformat()
-    keys_to_del = [k for k in _MODEL_CACHE if k[0] == day_iso]
-    for k in keys_to_del:
-        _MODEL_CACHE.pop(k, None)
+        day_iso = pd.to_datetime(date).date().isoformat()
+        keys_to_del = [k for k in _MODEL_CACHE if k[0] == day_iso]
+        for k in keys_to_del:
+            _MODEL_CACHE.pop(k, None)
 
 
 def get_or_fit_kmeans_for_date(
@@ -130,11 +165,13 @@ def get_or_fit_kmeans_for_date(
     sample_fraction: float = 0.2,
     max_points: int = 20_000,
     random_state: int = 42,
+    day_frames: Optional[pd.DataFrame] = None,
 ) -> Tuple[Optional[KMeans], List[str]]:
     """
     Liefert ein KMeans-Modell, das auf *allen Frames des Tages* (ohne Verhaltensfilter)
     gelernt wurde. Ergebnis wird im In-Memory-Cache gehalten, damit alle Module
     konsistente Zonen für diesen Tag sehen.
+    day_frames: bereits geladener Tagesausschnitt (alle Verhalten, mind. x_center/y_center).
 
     Rückgabe: (kmeans, feature_cols)
     """
@@ -143,20 +180,27 @@ def get_or_fit_kmeans_for_date(
         return None, feature_cols
 
     day = pd.to_datetime(date).date()
-    key = _cache_key(day.isoformat(), n_clusters, random_state)
+    key = _cache_key(day.isoformat(), folder_path, n_clusters, random_state)
 
-    # Cache hit?
+    # Cache hit? (Speicher, dann Platte)
     km = _MODEL_CACHE.get(key)
     if km is not None:
         return km, feature_cols
-
-    # Daten des Tages laden (ohne Verhaltensfilter)
-    df = load_behavior_data(folder_path)
-    if df is None or df.empty:
-        return None, feature_cols
-
-    df_day = df[df["date"] == day]
-    if df_day.empty:
+    disk = background.disk_cache()
+    disk_key = f"zone_model:{key!r}"
+    if disk is not None:
+        km = disk.get(disk_key)
+        if km is not None:
+            with _MODEL_LOCK:
+                km = _MODEL_CACHE.setdefault(key, km)
+            return km, feature_cols
+
+    # Daten des Tages (ohne Verhaltensfilter, nur Koordinaten)
+    if day_frames is not None:
+        df_day = day_frames[feature_cols]
+    else:
+        df_day = load_behavior_slice(folder_path, date=day, columns=feature_cols)
+    if df_day is None or df_day.empty:
         return None, feature_cols
 
     # Fit auf Stichprobe aller Tagespunkte
@@ -169,7 +213,12 @@ def get_or_fit_kmeans_for_date(
             feats = feats.sample(n=n, random_state=random_state)
 
     km = _make_kmeans(n_clusters=n_clusters, random_state=random_state)
-    km.fit(feats.values)
-
-    _MODEL_CACHE[key] = km
+    with stage("kmeans"):
+        km.fit(feats.to_numpy(dtype=np.float64))
+    count_rows(len(feats))
+
+    if disk is not None:
+        disk.set(disk_key, km, expire=background.EXPIRE_S)
+    with _MODEL_LOCK:
+        km = _MODEL_CACHE.setdefault(key, km)
     return km, feature_cols
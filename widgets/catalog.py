@@ -0,0 +1,203 @@
+"""
+Persistenter Datenkatalog eines Action-Detection-Ordners: Tage, Stunden, Frames je Tag und
+Verhalten, Zeitbereich je Datei – ohne die Frames selbst zu laden.
+
+Funktionen:
+- get_catalog(folder_path)                 # aggregierter Katalog der aktuellen Datenversion
+- catalog_dates(folder_path, behavior)     # Tage 'YYYY-MM-DD' (optional nur mit diesem Verhalten)
+- catalog_hours(folder_path)               # alle vorkommenden Stunden
+- latest_date(folder_path)                 # letzter Tag oder None
+- record_ingest(file_list, frames)         # Einträge aus frisch gelesenen Frames (aus widgets.ingest)
+- catalog_path(folder_path) / clear_catalog()
+
+Design:
+- Ablage: <ordner>/_derived/catalog.json (neben den Sidecars von widgets.ingest), ein Eintrag
+  pro Datei mit mtime/Größe, Zeilen, t_min/t_max und pro Tag Frames je Verhalten + Stunden.
+- Aktualisiert beim Ingest: frame_store liest die Dateien über ingest_files, das danach
+  record_ingest aufruft (Zählungen über bincount auf den abgeleiteten Spalten).
+- get_catalog prüft nur die Datenversion (stat der *.pkl). Für neue oder geänderte Dateien
+  werden die abgeleiteten Spalten gelesen (Sidecar, sonst Pickle), gelöschte fallen weg.
+  Das Aggregat liegt pro Version im Speicher; Layouts und Dropdowns lesen daraus.
+- Ist der Ordner nicht beschreibbar, bleibt der Katalog nur im Speicher.
+- Ergebnisse nicht verändern (gecacht, wie bei frame_store.get_derived).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from widgets.frame_store import _list_files, _version_of
+from widgets.ingest import SIDECAR_DIR, derived_columns
+from widgets.utils import BEHAVIORS
+
+CATALOG_FILE = "catalog.json"
+# erhöhen, wenn sich der Inhalt der Einträge ändert
+CATALOG_SCHEMA = 1
+
+# folder_path (normalisiert) -> (version, aggregierter Katalog)
+_CATALOGS: Dict[str, tuple] = {}
+_CATALOG_LOCK = threading.RLock()
+
+
+def catalog_path(folder_path: str) -> str:
+    return os.path.join(folder_path, SIDECAR_DIR, CATALOG_FILE)
+
+
+def _file_entry(st: os.stat_result, cols: Optional[dict]) -> dict:
+    """Katalogeintrag einer Datei aus ihren abgeleiteten Spalten (t, hour, day, dominant_code)."""
+    entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "rows": 0,
+             "t_min": None, "t_max": None, "days": {}}
+    if cols is None or not len(cols["t"]):
+        return entry
+    t = np.asarray(cols["t"]).view("datetime64[ns]")
+    day = np.asarray(cols["day"], dtype=np.int64)
+    hour = np.asarray(cols["hour"], dtype=np.int64)
+    code = np.asarray(cols["dominant_code"], dtype=np.int64)
+
+    first = int(day.min())
+    n_days = int(day.max()) - first + 1
+    offset = day - first
+    n_b = len(BEHAVIORS)
+    counts = np.bincount(offset * n_b + code, minlength=n_days * n_b).reshape(n_days, n_b)
+    hours = np.bincount(offset * 24 + hour, minlength=n_days * 24).reshape(n_days, 24)
+
+    entry.update(rows=int(len(t)), t_min=str(t.min()), t_max=str(t.max()))
+    for i in np.flatnonzero(counts.sum(axis=1)):
+        entry["days"][str(np.datetime64(first + int(i), "D"))] = {
+            "counts": counts[i].tolist(),
+            "hours": np.flatnonzero(hours[i]).tolist(),
+        }
+    return entry
+
+
+def _read_file(folder_path: str) -> dict:
+    try:
+        with open(catalog_path(folder_path), "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        if data.get("schema") == CATALOG_SCHEMA and isinstance(data.get("files"), dict):
+            return data["files"]
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def _write_file(folder_path: str, files: dict) -> None:
+    target = catalog_path(folder_path)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"schema": CATALOG_SCHEMA, "files": files}, fh)
+        os.replace(tmp, target)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _aggregate(version: str, files: dict) -> dict:
+    day_counts: Dict[str, np.ndarray] = {}
+    day_hours: Dict[str, set] = {}
+    for entry in files.values():
+        for day, info in entry["days"].items():
+            day_counts[day] = day_counts.get(day, 0) + np.asarray(info["counts"], dtype=np.int64)
+            day_hours.setdefault(day, set()).update(info["hours"])
+    dates = sorted(day_counts)
+    return {
+        "version": version,
+        "rows": int(sum(e["rows"] for e in files.values())),
+        "dates": dates,
+        "hours": sorted(set().union(*day_hours.values())) if day_hours else [],
+        "day_counts": {d: {b: int(c) for b, c in zip(BEHAVIORS, day_counts[d]) if c}
+                       for d in dates},
+        "day_hours": {d: sorted(day_hours[d]) for d in dates},
+        "files": {name: {"rows": e["rows"], "t_min": e["t_min"], "t_max": e["t_max"]}
+                  for name, e in sorted(files.items())},
+    }
+
+
+def get_catalog(folder_path: str) -> dict:
+    """
+    Katalog der aktuellen Datenversion: {"version", "rows", "dates", "hours", "day_counts"
+    (Tag -> {Verhalten: Frames}), "day_hours" (Tag -> Stunden), "files" (Name -> rows/t_min/t_max)}.
+    """
+    key = os.path.normpath(folder_path)
+    file_list = _list_files(folder_path)
+    version = _version_of(file_list)
+    cached = _CATALOGS.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with _CATALOG_LOCK:
+        cached = _CATALOGS.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        stored = _read_file(folder_path)
+        files, changed = {}, False
+        for path in file_list:
+            name = os.path.basename(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entry = stored.get(name)
+            if entry is None or entry["mtime_ns"] != st.st_mtime_ns or entry["size"] != st.st_size:
+                entry, changed = _file_entry(st, derived_columns(path)), True
+            files[name] = entry
+        if changed or len(files) != len(stored):
+            _write_file(folder_path, files)
+        catalog = _aggregate(version, files)
+        _CATALOGS[key] = (version, catalog)
+        return catalog
+
+
+def record_ingest(file_list: List[str], frames: list) -> None:
+    """Übernimmt frisch gelesene Dateien (Frames mit abgeleiteten Spalten) in ihre Kataloge."""
+    by_folder: Dict[str, dict] = {}
+    for path, df in zip(file_list, frames):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        cols = None if df is None else {c: df[c].to_numpy() for c in ("t", "day", "hour", "dominant_code")}
+        by_folder.setdefault(os.path.dirname(path), {})[os.path.basename(path)] = _file_entry(st, cols)
+
+    with _CATALOG_LOCK:
+        for folder_path, entries in by_folder.items():
+            files = _read_file(folder_path)
+            present = {os.path.basename(p) for p in _list_files(folder_path)}
+            files = {n: e for n, e in files.items() if n in present}
+            files.update(entries)
+            _write_file(folder_path, files)
+            _CATALOGS.pop(os.path.normpath(folder_path), None)
+
+
+def catalog_dates(folder_path: str, behavior: Optional[str] = None) -> List[str]:
+    """Tage ('YYYY-MM-DD', sortiert) mit mindestens einem Frame des Verhaltens (None = alle Tage)."""
+    catalog = get_catalog(folder_path)
+    if not behavior:
+        return list(catalog["dates"])
+    return [d for d in catalog["dates"] if catalog["day_counts"][d].get(behavior)]
+
+
+def catalog_hours(folder_path: str) -> List[int]:
+    """Alle Stunden (0–23), zu denen es Frames gibt."""
+    return list(get_catalog(folder_path)["hours"])
+
+
+def latest_date(folder_path: str) -> Optional[str]:
+    """Letzter Tag mit Frames ('YYYY-MM-DD') oder None."""
+    dates = get_catalog(folder_path)["dates"]
+    return dates[-1] if dates else None
+
+
+def clear_catalog() -> None:
+    """Verwirft die Kataloge im Speicher (die Dateien bleiben)."""
+    with _CATALOG_LOCK:
+        _CATALOGS.clear()
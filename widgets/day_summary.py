@@ -0,0 +1,165 @@
+"""
+Kompakte Tageszusammenfassungen für die datumsgesteuerten Seiten (/position, /flow).
+
+Funktionen:
+- get_day_summary(folder_path, date)        # serverseitig, pro Datenversion und Tag einmal
+- summary_ref(folder_path, date)            # kleines JSON für dcc.Store (Datum + Kennzahlen)
+- summary_from_ref(folder_path, ref)        # Zusammenfassung zum Store-Inhalt (oder None)
+- ref_date(ref)                             # geprüftes Datum 'YYYY-MM-DD' aus dem Store-Inhalt (oder None)
+- sequence_counts(summary, n)               # n-Gramme der Verhaltensfolge, sortiert wie Counter.most_common
+- in_source_order(frames)                   # Frames in Dateireihenfolge (Folge je Quelldatei/Bucht)
+- transition_counts(frames)                 # Übergänge A -> B mit Anzahl (zeitlich sortierte Frames)
+
+Design:
+- Die Datumsauswahl schreibt summary_ref in einen dcc.Store: Datum plus Frames je Verhalten
+  (wenige hundert Bytes). Der schwere Teil bleibt serverseitig in
+  frame_store.get_derived (Name "day_summary:<date>", needs_frames=False): Tagesausschnitt
+  (t, hour, x/y, dominant_behavior), Übergangszählungen für den DFG und die 3-Gramme für die
+  Top-Sequenzen. Der Tag wird über load_behavior_slice geladen (Parquet, falls aktuell) –
+  der ganze Frame-Store wird für /position und /flow nicht geladen.
+- Reihenfolgen: Der DFG zählt Übergänge in zeitlicher Folge über alle Frames des Tages (wie
+  bisher sort_values("t")). Die n-Gramme laufen in Dateireihenfolge (Spalte source, je Datei
+  zeitlich), damit sich bei mehreren Buchten pro Tag deren Frames nicht zu buchtübergreifenden
+  "Sequenzen" mischen.
+- Nachgelagerte Callbacks hängen am Store statt am Datum und holen die Zusammenfassung per
+  summary_from_ref – ein Dict-Zugriff, solange sich die Datenversion nicht ändert, sonst
+  wird der Tag für die aktuelle Version berechnet (die Kennzahlen im Store können bis zur
+  nächsten Auswahl veraltet sein).
+- Der Store-Inhalt kommt vom Client: Er enthält keinen Ordner (den gibt der Callback selbst
+  vor, sonst ließen sich beliebige Verzeichnisse einlesen und im Figuren-Cache unter dem
+  echten Ordner ablegen), und das Datum wird vor der Verwendung geprüft (ref_date).
+- Ergebnisse nicht verändern (gecacht, wie bei get_derived).
+"""
+
+from __future__ import annotations
+
+import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from widgets.frame_store import get_derived
+from widgets.utils import BEHAVIORS, load_behavior_slice
+
+SUMMARY_COLUMNS = ["t", "hour", "x_center", "y_center", "dominant_behavior", "source"]
+SEQUENCE_N = 3      # vorberechnete n-Gramm-Länge (Top-Sequenzen)
+
+
+def _codes(behavior: pd.Series) -> np.ndarray:
+    """Verhaltenscodes (Index in BEHAVIORS), -1 = unbekannt/fehlend."""
+    if isinstance(behavior.dtype, pd.CategoricalDtype) and list(behavior.cat.categories) == BEHAVIORS:
+        return behavior.cat.codes.to_numpy().astype(np.int64)
+    return pd.Categorical(behavior, categories=BEHAVIORS).codes.astype(np.int64)
+
+
+def transition_counts(frames: pd.DataFrame) -> pd.DataFrame:
+    """Übergänge dominant_behavior -> next_behavior mit Anzahl (wie im DFG)."""
+    df = frames[["dominant_behavior"]].copy()
+    df["next_behavior"] = df["dominant_behavior"].shift(-1)
+    changes = df[df["dominant_behavior"] != df["next_behavior"]]
+    return (changes.groupby(["dominant_behavior", "next_behavior"], observed=True)
+            .size().reset_index(name="count"))
+
+
+def in_source_order(frames: pd.DataFrame) -> pd.DataFrame:
+    """
+    Frames in der Reihenfolge der Quelldateien (stabil nach 'source', innerhalb einer Datei
+    zeitlich) – wie eine Verkettung der Dateien. Ohne Spalte 'source' unverändert.
+    """
+    if "source" not in frames.columns or frames["source"].is_monotonic_increasing:
+        return frames
+    return frames.iloc[np.argsort(frames["source"].to_numpy(), kind="stable")]
+
+
+def _ngram_counts(codes: np.ndarray, n: int) -> list:
+    """
+    [(Verhaltens-Tupel, Anzahl)] absteigend nach Anzahl, bei Gleichstand in der Reihenfolge
+    des ersten Auftretens (= Counter.most_common). n-Gramme mit unbekanntem Verhalten fallen weg.
+    """
+    if len(codes) < n:
+        return []
+    base = len(BEHAVIORS)
+    windows = np.lib.stride_tricks.sliding_window_view(codes, n)
+    windows = windows[(windows >= 0).all(axis=1)]
+    if not len(windows):
+        return []
+    gram = windows @ (base ** np.arange(n - 1, -1, -1))
+    uniq, first, counts = np.unique(gram, return_index=True, return_counts=True)
+    order = np.lexsort((first, -counts))
+    result = []
+    for g, c in zip(uniq[order], counts[order]):
+        digits = [(int(g) // base ** p) % base for p in range(n - 1, -1, -1)]
+        result.append((tuple(BEHAVIORS[d] for d in digits), int(c)))
+    return result
+
+
+def _build_summary(folder_path: str, date: str) -> dict:
+    frames = load_behavior_slice(folder_path, date=date, columns=SUMMARY_COLUMNS)
+    if frames is None or frames.empty:
+        return {"date": date, "frames": pd.DataFrame(columns=SUMMARY_COLUMNS),
+                "behavior_frames": {}, "transitions": pd.DataFrame(), "codes": np.empty(0, np.int64),
+                "sequences": {}}
+    # Store liefert zeitlich sortiert; nur sonst (z. B. Parquet-Fallback) sortieren
+    if not frames["t"].is_monotonic_increasing:
+        frames = frames.sort_values("t", kind="stable")
+    frames = frames.reset_index(drop=True)
+    codes = _codes(in_source_order(frames)["dominant_behavior"])
+    counts = np.bincount(codes[codes >= 0], minlength=len(BEHAVIORS))
+    return {
+        "date": date,
+        "frames": frames,
+        "behavior_frames": {b: int(c) for b, c in zip(BEHAVIORS, counts) if c},
+        "transitions": transition_counts(frames),
+        "codes": codes,
+        "sequences": {SEQUENCE_N: _ngram_counts(codes, SEQUENCE_N)},
+    }
+
+
+def get_day_summary(folder_path: str, date) -> dict:
+    """
+    Zusammenfassung eines Tages: {"date", "frames", "behavior_frames", "transitions",
+    "codes" (Dateireihenfolge), "sequences": {3: [...]}}. Pro Datenversion und Tag einmal berechnet.
+    """
+    day = str(pd.to_datetime(date).date())
+    return get_derived(folder_path, f"day_summary:{day}",
+                       lambda _frames: _build_summary(folder_path, day), needs_frames=False)
+
+
+def ref_date(ref) -> Optional[str]:
+    """Datum 'YYYY-MM-DD' aus dem Store-Inhalt; None ohne Tag oder bei ungültigem Wert."""
+    if not isinstance(ref, dict) or not isinstance(ref.get("date"), str):
+        return None
+    try:
+        return datetime.date.fromisoformat(ref["date"]).isoformat()
+    except ValueError:
+        return None
+
+
+def summary_ref(folder_path: str, date) -> Optional[dict]:
+    """Inhalt für den dcc.Store: {"date", "frames", "behavior_frames"}; None ohne Datum."""
+    if not date:
+        return None
+    summary = get_day_summary(folder_path, date)
+    return {
+        "date": summary["date"],
+        "frames": len(summary["frames"]),
+        "behavior_frames": summary["behavior_frames"],
+    }
+
+
+def summary_from_ref(folder_path: str, ref: Optional[dict]) -> Optional[dict]:
+    """
+    Serverseitige Zusammenfassung (aktuelle Datenversion von folder_path) zum Tag im
+    Store-Inhalt; None, wenn kein gültiger Tag gewählt ist.
+    """
+    date = ref_date(ref)
+    if date is None:
+        return None
+    return get_day_summary(folder_path, date)
+
+
+def sequence_counts(summary: dict, n: int) -> list:
+    """n-Gramme des Tages (vorberechnet für SEQUENCE_N, sonst aus den Codes)."""
+    cached = summary["sequences"].get(n)
+    return cached if cached is not None else _ngram_counts(summary["codes"], n)
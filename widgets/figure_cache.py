@@ -0,0 +1,312 @@
+"""
+Memoisierung der generate_*-Funktionen aller Widgets (Figuren, Bild-URLs, Texte).
+
+Funktionen:
+- memoize_figure(source=..., source_arg=..., ignore=...)   # Decorator für generate_*-Funktionen
+- configure_figure_cache(backend, max_entries, ttl_s, disk_dir, disk_size_mb)
+- share_between_processes()                    # Plattenstufe hinter "memory" (für Worker-Prozesse)
+- figure_cache_stats()                         # Treffer/Fehlschläge je Funktion + Summe
+- clear_figure_cache()                         # alle Einträge + Statistik verwerfen
+- source_version(path)                         # Datenversion eines Ordners bzw. einer Datei
+
+Design:
+- Schlüssel = (Modul.Funktion, alle Argumente inkl. Defaults, Datenversion der Quelle).
+  Quelle ist ein Ordner mit *.pkl (Version aus frame_store.data_version) oder eine Datei
+  (mtime + Größe, z. B. das XES). Ändern sich die Daten, entsteht ein neuer Schlüssel;
+  alte Einträge fallen über LRU/TTL heraus.
+- ignore: Argumente, die nicht in den Schlüssel gehören, weil sie aus Quelle + übrigen
+  Argumenten folgen (z. B. ein vom Callback schon geladener Tagesausschnitt day_frames).
+- Backends: "memory" (LRU im Prozess, Standard) oder "disk" (diskcache, prozessübergreifend,
+  überlebt Neustarts). Fehlt diskcache, wird still auf "memory" zurückgefallen.
+- Grenzen: max_entries (memory), disk_size_mb (disk), ttl_s (beide; None = unbegrenzt).
+- share_between_processes (von widgets.background bei aktiven Worker-Prozessen): Beim
+  memory-Backend kommt eine diskcache-Stufe unter disk_dir dahinter. Fehlschlag im Speicher
+  -> Platte (Treffer wandern in den Speicher), neue Ergebnisse in beide. So gehen in einem
+  Worker gerenderte Figuren nicht mit dem Prozess verloren.
+- Das memory-Backend gibt das gespeicherte Objekt selbst zurück: Ergebnisse wie bei
+  frame_store.get_derived nicht verändern (die Callbacks reichen sie nur an Dash weiter).
+- Bild-URLs (image_store) im Ergebnis werden bei jedem Treffer geprüft (image_available):
+  Hat prune_disk das Bild gelöscht, zählt der Treffer als Fehlschlag und es wird neu gerendert.
+- Exceptions werden nicht gecacht. Bei gleichzeitigen Fehlschlägen auf denselben Schlüssel
+  rechnen beide Aufrufer (kein Lock während des Renderns).
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from widgets.image_store import image_available
+from widgets.metrics import count_cache
+
+# Standard-Konfiguration (änderbar über configure_figure_cache)
+BACKEND = "memory"
+MAX_ENTRIES = 256
+TTL_S: Optional[float] = None
+DISK_DIR = os.path.join("data", "_derived", "figure_cache")
+DISK_SIZE_MB = 512
+
+_MISS = object()
+
+
+class _MemoryBackend:
+    """LRU mit optionaler TTL."""
+
+    def __init__(self, max_entries: int, ttl_s: Optional[float]):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISS
+            expires, value = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return _MISS
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value) -> None:
+        expires = time.monotonic() + self.ttl_s if self.ttl_s else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class _DiskBackend:
+    """diskcache.Cache; Größenlimit und Verdrängung übernimmt diskcache."""
+
+    def __init__(self, directory: str, size_mb: float, ttl_s: Optional[float]):
+        import diskcache
+
+        self.ttl_s = ttl_s
+        self._cache = diskcache.Cache(directory, size_limit=int(size_mb * 1024 * 1024))
+
+    def get(self, key: str):
+        return self._cache.get(key, default=_MISS)
+
+    def set(self, key: str, value) -> None:
+        self._cache.set(key, value, expire=self.ttl_s)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def evictions(self) -> int:
+        return 0
+
+
+_BACKEND = None
+_BACKEND_LOCK = threading.Lock()
+_SHARED = None      # _DiskBackend hinter dem memory-Backend (share_between_processes) oder None
+_SHARE = False
+# Modul.Funktion -> {"hits", "misses", "errors", "seconds_saved", "render_s"}
+_STATS: Dict[str, Dict[str, float]] = {}
+_STATS_LOCK = threading.Lock()
+
+
+def configure_figure_cache(backend: Optional[str] = None, max_entries: Optional[int] = None,
+                           ttl_s: Optional[float] = None, disk_dir: Optional[str] = None,
+                           disk_size_mb: Optional[float] = None) -> str:
+    """
+    Setzt Backend und Grenzen neu (bestehende Einträge des alten Backends verfallen).
+    Nicht übergebene Werte bleiben wie konfiguriert. ttl_s=0 schaltet die TTL ab.
+    Rückgabe: tatsächlich aktives Backend ("memory" oder "disk").
+    """
+    global BACKEND, MAX_ENTRIES, TTL_S, DISK_DIR, DISK_SIZE_MB, _BACKEND, _SHARED
+    with _BACKEND_LOCK:
+        BACKEND = backend or BACKEND
+        MAX_ENTRIES = max_entries if max_entries is not None else MAX_ENTRIES
+        TTL_S = (ttl_s or None) if ttl_s is not None else TTL_S
+        DISK_DIR = disk_dir or DISK_DIR
+        DISK_SIZE_MB = disk_size_mb if disk_size_mb is not None else DISK_SIZE_MB
+        backend = _create_backend()
+        _SHARED = _create_shared(backend)
+        _BACKEND = backend
+        return "disk" if isinstance(_BACKEND, _DiskBackend) else "memory"
+
+
+def share_between_processes() -> None:
+    """Plattenstufe hinter dem memory-Backend einschalten (no-op bei "disk" oder ohne diskcache)."""
+    global _SHARE, _SHARED
+    with _BACKEND_LOCK:
+        _SHARE = True
+        if _BACKEND is not None:
+            _SHARED = _create_shared(_BACKEND)
+
+
+def _create_shared(backend):
+    if not _SHARE or isinstance(backend, _DiskBackend):
+        return None
+    try:
+        return _DiskBackend(DISK_DIR, DISK_SIZE_MB, TTL_S)
+    except Exception:
+        return None  # diskcache fehlt oder Ordner nicht beschreibbar
+
+
+def _create_backend():
+    if BACKEND == "disk":
+        try:
+            return _DiskBackend(DISK_DIR, DISK_SIZE_MB, TTL_S)
+        except Exception:
+            pass  # diskcache fehlt oder Ordner nicht beschreibbar
+    return _MemoryBackend(MAX_ENTRIES, TTL_S)
+
+
+def _backend():
+    global _BACKEND, _SHARED
+    if _BACKEND is None:
+        with _BACKEND_LOCK:
+            if _BACKEND is None:
+                # _SHARED zuerst: Leser ohne Lock prüfen nur _BACKEND
+                backend = _create_backend()
+                _SHARED = _create_shared(backend)
+                _BACKEND = backend
+    return _BACKEND
+
+
+def source_version(path: str) -> str:
+    """Datenversion eines Ordners (*.pkl) bzw. mtime/Größe einer Datei; '-' wenn nicht vorhanden."""
+    if os.path.isdir(path):
+        from widgets.frame_store import data_version
+
+        return data_version(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "-"
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+def _count(name: str, field: str, value: float = 1) -> None:
+    with _STATS_LOCK:
+        stats = _STATS.setdefault(name, {"hits": 0, "misses": 0, "errors": 0,
+                                         "render_s": 0.0, "seconds_saved": 0.0})
+        stats[field] += value
+
+
+def memoize_figure(source=None, source_arg: Optional[str] = None, ignore=()) -> Callable:
+    """
+    Decorator: Ergebnis pro (Funktion, Argumente, Datenversion) cachen.
+
+    source:     Pfad (str) oder Funktion ohne Argumente, die den Pfad liefert
+                (z. B. lambda: PKL_FOLDER, damit spätere Änderungen der Konstante greifen).
+    source_arg: Name des Parameters, der den Pfad enthält (z. B. "folder_path").
+    ignore:     Namen von Parametern, die nicht in den Schlüssel eingehen.
+    """
+    def decorator(func: Callable) -> Callable:
+        name = f"{func.__module__}.{func.__qualname__}"
+        signature = inspect.signature(func)
+
+        def _source(arguments) -> Optional[str]:
+            if source_arg is not None:
+                return arguments.get(source_arg)
+            return source() if callable(source) else source
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            path = _source(bound.arguments)
+            version = source_version(path) if path else "-"
+            key_args = sorted((k, v) for k, v in bound.arguments.items() if k not in ignore)
+            raw = f"{name}|{path}|{version}|{key_args!r}"
+            key = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+            backend = _backend()
+            shared = _SHARED
+            value = backend.get(key)
+            if value is _MISS and shared is not None:
+                value = shared.get(key)
+                if value is not _MISS:
+                    backend.set(key, value)
+            if value is not _MISS and not image_available(value):
+                value = _MISS  # Bild inzwischen aus der Dateiablage gelöscht -> neu rendern
+            if value is not _MISS:
+                _count(name, "hits")
+                count_cache(True)
+                stats = _STATS[name]
+                if stats["misses"]:
+                    _count(name, "seconds_saved", stats["render_s"] / stats["misses"])
+                return value
+
+            count_cache(False)
+            t0 = time.perf_counter()
+            try:
+                value = func(*args, **kwargs)
+            except Exception:
+                _count(name, "errors")
+                raise
+            _count(name, "misses")
+            _count(name, "render_s", time.perf_counter() - t0)
+            backend.set(key, value)
+            if shared is not None:
+                try:
+                    shared.set(key, value)
+                except Exception:
+                    pass  # nicht picklebar oder Platte voll: bleibt nur im Speicher
+            return value
+
+        wrapper.cache_name = name
+        return wrapper
+
+    return decorator
+
+
+def figure_cache_stats() -> dict:
+    """
+    {"backend", "entries", "evictions", "total": {...}, "functions": {name: {...}}}
+    Je Funktion: hits, misses, errors, hit_rate, render_s (Summe Renderzeit der Fehlschläge),
+    seconds_saved (Schätzung: Treffer × mittlere Renderzeit).
+    """
+    backend = _backend()
+    with _STATS_LOCK:
+        functions = {n: dict(s) for n, s in _STATS.items()}
+    total = {"hits": 0, "misses": 0, "errors": 0, "render_s": 0.0, "seconds_saved": 0.0}
+    for stats in functions.values():
+        calls = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / calls if calls else 0.0
+        for k in total:
+            total[k] += stats[k]
+    calls = total["hits"] + total["misses"]
+    total["hit_rate"] = total["hits"] / calls if calls else 0.0
+    return {
+        "backend": "disk" if isinstance(backend, _DiskBackend) else "memory",
+        "entries": len(backend),
+        "evictions": backend.evictions,
+        "total": total,
+        "functions": functions,
+    }
+
+
+def clear_figure_cache() -> None:
+    """Verwirft alle Einträge des aktiven Backends (inkl. Plattenstufe) und die Statistik."""
+    _backend().clear()
+    if _SHARED is not None:
+        _SHARED.clear()
+    with _STATS_LOCK:
+        _STATS.clear()
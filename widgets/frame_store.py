@@ -0,0 +1,425 @@
+"""
+Prozessweiter Frame-Store für die Action-Detection-Daten.
+
+Funktionen:
+- data_version(folder_path)         # Datenversion aus Dateiliste + mtime + Größe
+- get_frames(folder_path)           # aufbereitetes DataFrame (View auf den Cache)
+- cached_frames(folder_path)        # wie get_frames, aber None statt Laden (kalter Cache)
+- get_day_slice(folder_path, date, hour=None)  # Tag / Tag+Stunde als Zero-Copy-Slice
+- day_ranges(folder_path)           # Tag -> (start, stop) im zeitsortierten Frame
+- load_report(folder_path)          # Zeiten/Zeilen des letzten Ladevorgangs (parallel, s. ingest)
+- get_derived(folder_path, name, build, needs_frames)  # abgeleitetes Ergebnis, einmal je Version
+- on_new_version(callback)          # callback(folder_path, version) bei neuer Datenversion
+- clear_frame_store(folder_path)    # Cache (global oder pro Ordner) leeren
+- schema_report(folder_path)        # Speicher + Filterzeit: Standard- vs. Kompakt-Schema
+
+Design:
+- Alle *.pkl eines Ordners werden genau EINMAL gelesen und aufbereitet (t, hour, date,
+  dominant_behavior, dominant_confidence, x/y-Mittelpunkte; siehe widgets.ingest).
+  Callbacks und Layouts teilen sich dieses Ergebnis.
+- Der Cache ist auf die Datenversion geschlüsselt: Ändern sich Dateien (neu, gelöscht,
+  mtime/Größe), wird beim nächsten Zugriff neu geladen, sonst nie.
+- Die Spaltenarrays des gecachten Frames sind schreibgeschützt (writeable=False), ausgegeben
+  werden flache Kopien: Aufrufer dürfen Spalten setzen, ersetzen oder filtern; ein Schreiben
+  in vorhandene Werte (z. B. df.loc[...] = ...) löst ValueError aus, statt still den Cache zu
+  ändern. Die globale pandas-Option mode.copy_on_write bleibt unberührt.
+- Die Spalte 'source' hält den Index der Quelldatei in der sortierten Dateiliste. Reihenfolge-
+  abhängige Auswertungen pro Datei/Bucht (n-Gramme) stellen damit die Dateireihenfolge wieder her.
+- Der Frame ist nach 't' sortiert. Dazu gibt es einen Offset-Index Tag -> (start, stop) und
+  (Tag, Stunde) -> (start, stop): Tages- und Stundenfilter sind damit iloc-Slices (Views)
+  statt Vollscans über die date-Spalte.
+- Abgeleitete Strukturen (Aggregat-Würfel usw.) hängen über get_derived an derselben
+  Datenversion und werden mit dem Frame-Store gemeinsam ungültig. Sobald eine neue Version
+  eines Ordners geladen oder abgeleitet wird, fallen dessen Ableitungen älterer Versionen
+  weg (viele sind Views auf den alten Frame und hielten ihn sonst im Speicher); Module mit
+  eigenen versionierten Caches (z. B. Zonenmodelle) melden sich über on_new_version an.
+- Jede Ableitung (Ordner, Schema, name) hat ihr eigenes Build-Lock: Ein kalter Würfel-Aufbau
+  hält weder andere Ableitungen (z. B. Tageszusammenfassungen) noch data_version auf.
+- needs_frames=False: Die Ableitung lädt selbst, was sie braucht (z. B. nur einen Tag über
+  load_behavior_slice, ggf. aus Parquet); geschlüsselt wird trotzdem auf die Datenversion,
+  der ganze Store wird dafür nicht geladen.
+
+Kompakt-Schema (COMPACT_SCHEMA = True, Standard):
+- Wahrscheinlichkeiten und Koordinaten float32, hour int8.
+- date ist kategorial (Codes = Tagesnummern in die sortierte Liste der Tage, Kategorien sind
+  datetime.date). `df['date'] == day` vergleicht damit nur Integer-Codes statt Python-Objekte,
+  Werte und str(d) bleiben für Layouts/Dropdowns unverändert.
+- dominant_behavior ist kategorial mit den Kategorien BEHAVIORS (int8-Codes).
+- Gruppierungen über date/dominant_behavior sollten observed=True setzen.
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from widgets.metrics import count_rows, stage
+from widgets.utils import BEHAVIORS
+
+# Standard für alle Loader; False = ursprüngliches Schema (float64, object-Spalten)
+COMPACT_SCHEMA = True
+
+PROB_COLS = BEHAVIORS
+COORD_COLS = ["x1", "x2", "y1", "y2", "x_center", "y_center"]
+
+# key: (folder_path normalisiert, compact) -> (version, DataFrame, Offset-Index)
+_STORE: Dict[Tuple[str, bool], Tuple[str, pd.DataFrame, dict]] = {}
+# key: folder_path (normalisiert) -> Report des letzten Ladevorgangs
+_REPORTS: Dict[str, dict] = {}
+_LOCK = threading.Lock()
+# key: (folder_path normalisiert, compact, name) -> (version, Ergebnis)
+_DERIVED: Dict[Tuple[str, bool, str], Tuple[str, object]] = {}
+# kurz gehalten: nur Änderungen an _DERIVED, _BUILD_LOCKS und _SEEN_VERSIONS
+_DERIVED_LOCK = threading.Lock()
+# ein Lock je Ableitung (Schlüssel wie _DERIVED): langsame builds blockieren nur denselben
+# Schlüssel; reentrant, build darf selbst get_derived aufrufen (auf einer anderen Ableitung aufbauen)
+_BUILD_LOCKS: Dict[Tuple[str, bool, str], threading.RLock] = {}
+# folder_path (normalisiert) -> zuletzt gesehene Version; Rückrufe bei neuer Version
+_SEEN_VERSIONS: Dict[str, str] = {}
+_VERSION_LISTENERS: List[Callable[[str, str], None]] = []
+
+
+def _list_files(folder_path: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(folder_path, "*.pkl")))
+
+
+def _version_of(file_list: List[str]) -> str:
+    h = hashlib.sha1()
+    for f in file_list:
+        try:
+            st = os.stat(f)
+        except OSError:
+            continue
+        h.update(f"{os.path.basename(f)}|{st.st_mtime_ns}|{st.st_size};".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def on_new_version(callback: Callable[[str, str], None]) -> None:
+    """Registriert callback(folder_path normalisiert, version) für neue Datenversionen."""
+    _VERSION_LISTENERS.append(callback)
+
+
+def _note_version(folder_key: str, version: str) -> None:
+    """Bei neuer Version: Ableitungen älterer Versionen des Ordners verwerfen, Listener rufen."""
+    if _SEEN_VERSIONS.get(folder_key) == version:
+        return
+    with _DERIVED_LOCK:
+        if _SEEN_VERSIONS.get(folder_key) == version:
+            return
+        _SEEN_VERSIONS[folder_key] = version
+        for k in [k for k, (v, _) in _DERIVED.items() if k[0] == folder_key and v != version]:
+            _DERIVED.pop(k, None)
+    for callback in list(_VERSION_LISTENERS):
+        callback(folder_key, version)
+
+
+def data_version(folder_path: str) -> str:
+    """
+    Liefert die aktuelle Datenversion des Ordners (kurzer Hash über Dateiname,
+    mtime und Größe aller *.pkl). Geeignet als Cache-Schlüssel für abgeleitete Ergebnisse.
+    Eine neu gesehene Version räumt veraltete Ableitungen des Ordners ab (_note_version).
+    """
+    version = _version_of(_list_files(folder_path))
+    _note_version(os.path.normpath(folder_path), version)
+    return version
+
+
+def date_categorical(t: pd.Series) -> pd.Categorical:
+    """Kategoriale date-Spalte aus Zeitstempeln (Codes = Index in die sortierten Tage)."""
+    day_num = t.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+    return _date_categorical_from_days(day_num)
+
+
+def _date_categorical_from_days(day_num: np.ndarray) -> pd.Categorical:
+    uniq, codes = np.unique(day_num, return_inverse=True)
+    days = [d.date() for d in pd.to_datetime(uniq.astype("datetime64[D]"))]
+    return pd.Categorical.from_codes(codes.reshape(-1), categories=days)
+
+
+def source_dtype(n_files: int) -> type:
+    """dtype der Spalte 'source' für n_files Quelldateien."""
+    return np.int16 if n_files <= np.iinfo(np.int16).max else np.int32
+
+
+def _load_frames(
+    file_list: List[str],
+    compact: bool = False,
+    progress: Optional[Callable[[int, int, str], None]] = None,
+) -> Tuple[pd.DataFrame, dict]:
+    """
+    Liest die Dateien parallel über widgets.ingest (abgeleitete Spalten aus dem Sidecar oder
+    vektorisiert berechnet) und setzt date/dominant_behavior im gewünschten Schema.
+    Rückgabe: (DataFrame, Lade-Report)
+    """
+    from widgets.ingest import concat_frames, ingest_files
+
+    frames, report = ingest_files(file_list, progress=progress)
+    sources = [i for i, df in enumerate(frames) if df is not None]
+    frames = [df for df in frames if df is not None]
+    if not frames:
+        return pd.DataFrame(), report
+
+    t0 = time.perf_counter()
+    dtypes = {c: np.float32 for c in PROB_COLS + COORD_COLS} if compact else None
+    lengths = [len(df) for df in frames]
+    df = concat_frames(frames, dtypes=dtypes)
+    del frames
+    df['source'] = np.repeat(np.asarray(sources, dtype=source_dtype(len(file_list))), lengths)
+    # zeitlich sortieren (Voraussetzung für den Offset-Index), meist schon der Fall
+    if not df['t'].is_monotonic_increasing:
+        order = np.argsort(df['t'].to_numpy(), kind="stable")
+        df = df.take(order).reset_index(drop=True)
+    day = df.pop('day').to_numpy()
+    code = df.pop('dominant_code').to_numpy()
+
+    if compact:
+        df['date'] = _date_categorical_from_days(day)
+        df['dominant_behavior'] = pd.Categorical.from_codes(code, categories=BEHAVIORS)
+    else:
+        df['hour'] = df['hour'].astype(np.int32)
+        df['x_center'] = df['x_center'].astype(np.float64)
+        df['y_center'] = df['y_center'].astype(np.float64)
+        df['date'] = _date_categorical_from_days(day).astype(object)
+        df['dominant_behavior'] = np.asarray(BEHAVIORS, dtype=object)[code]
+
+    report["concat_s"] = time.perf_counter() - t0
+    report["wall_s"] += report["concat_s"]
+    return df, report
+
+
+def _readonly(df: pd.DataFrame) -> pd.DataFrame:
+    """Gleicher Frame (ohne Kopie der Daten), aber jede Spalte mit schreibgeschütztem Array."""
+    columns = {}
+    for name in df.columns:
+        col = df[name]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            codes = col.cat.codes.to_numpy()
+            codes.flags.writeable = False
+            columns[name] = pd.Categorical.from_codes(codes, dtype=col.dtype)
+        else:
+            values = col.to_numpy()
+            values.flags.writeable = False
+            columns[name] = values
+    # copy=False: ein Block je Spalte, die Arrays werden übernommen statt kopiert
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def _build_index(df: pd.DataFrame) -> dict:
+    """Offset-Index über den nach 't' sortierten Frame: Tag bzw. (Tag, Stunde) -> (start, stop)."""
+    if df.empty:
+        return {"days": {}, "hours": {}}
+    day_num = df['t'].to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+    hour = df['hour'].to_numpy().astype(np.int64)
+    n = len(df)
+
+    def _ranges(keys: np.ndarray):
+        uniq, starts = np.unique(keys, return_index=True)
+        stops = np.append(starts[1:], n)
+        return uniq, starts, stops
+
+    uniq, starts, stops = _ranges(day_num)
+    dates = [d.date() for d in pd.to_datetime(uniq.astype("datetime64[D]"))]
+    days = {d: (int(a), int(b)) for d, a, b in zip(dates, starts, stops)}
+    by_num = dict(zip(uniq.tolist(), dates))
+
+    uniq_h, starts_h, stops_h = _ranges(day_num * 24 + hour)
+    hours = {(by_num[int(k) // 24], int(k) % 24): (int(a), int(b))
+             for k, a, b in zip(uniq_h, starts_h, stops_h)}
+    return {"days": days, "hours": hours}
+
+
+def _entry(folder_path: str, compact: Optional[bool]) -> Optional[Tuple[str, pd.DataFrame, dict]]:
+    """Store-Eintrag für die aktuelle Datenversion (lädt bei Bedarf). None = keine Dateien."""
+    compact = COMPACT_SCHEMA if compact is None else compact
+    key = (os.path.normpath(folder_path), compact)
+    file_list = _list_files(folder_path)
+    if not file_list:
+        return None
+    version = _version_of(file_list)
+
+    entry = _STORE.get(key)
+    if entry is None or entry[0] != version:
+        with _LOCK:
+            # erneut prüfen: ein anderer Thread kann inzwischen geladen haben
+            entry = _STORE.get(key)
+            if entry is None or entry[0] != version:
+                with stage("load"):
+                    df, report = _load_frames(file_list, compact=compact)
+                    df = _readonly(df)
+                    entry = (version, df, _build_index(df))
+                count_rows(len(df))
+                _STORE[key] = entry
+                _REPORTS[key[0]] = report
+        _note_version(key[0], version)
+    return entry
+
+
+def get_frames(folder_path: str, compact: Optional[bool] = None) -> pd.DataFrame:
+    """
+    Liefert alle aufbereiteten Frames des Ordners (nach 't' sortiert). Geladen wird nur,
+    wenn sich die Datenversion seit dem letzten Zugriff geändert hat.
+    compact=None -> COMPACT_SCHEMA.
+
+    Rückgabe: flache Kopie auf schreibgeschützte Arrays – neue Spalten sind erlaubt,
+    Schreiben in vorhandene Werte löst ValueError aus.
+    """
+    entry = _entry(folder_path, compact)
+    if entry is None:
+        return pd.DataFrame()
+    return entry[1].copy(deep=False)
+
+
+def get_day_slice(folder_path: str, date, hour: Optional[int] = None,
+                  compact: Optional[bool] = None) -> pd.DataFrame:
+    """
+    Frames eines Tages (optional nur einer Stunde) als Zero-Copy-Slice über den Offset-Index.
+    date: 'YYYY-MM-DD' oder datetime.date. Unbekannter Tag -> leerer Frame (gleiche Spalten).
+    """
+    entry = _entry(folder_path, compact)
+    if entry is None:
+        return pd.DataFrame()
+    _, df, index = entry
+    day = pd.to_datetime(date).date()
+    if hour is None:
+        start, stop = index["days"].get(day, (0, 0))
+    else:
+        start, stop = index["hours"].get((day, int(hour)), (0, 0))
+    return df.iloc[start:stop]
+
+
+def day_ranges(folder_path: str, compact: Optional[bool] = None) -> Dict[object, Tuple[int, int]]:
+    """Tag (datetime.date) -> (start, stop) im zeitsortierten Frame, chronologisch."""
+    entry = _entry(folder_path, compact)
+    return dict(entry[2]["days"]) if entry is not None else {}
+
+
+def cached_frames(folder_path: str, compact: Optional[bool] = None) -> Optional[pd.DataFrame]:
+    """
+    Liefert die Frames nur, wenn sie für die aktuelle Datenversion bereits im Speicher liegen.
+    Sonst None – der Aufrufer kann dann eine günstigere Quelle (z. B. Parquet) wählen.
+    """
+    compact = COMPACT_SCHEMA if compact is None else compact
+    entry = _STORE.get((os.path.normpath(folder_path), compact))
+    if entry is None or entry[0] != data_version(folder_path):
+        return None
+    return entry[1].copy(deep=False)
+
+
+def get_derived(folder_path: str, name: str, build: Callable[[Optional[pd.DataFrame]], object],
+                compact: Optional[bool] = None, needs_frames: bool = True):
+    """
+    Ergebnis von build(frames) für die aktuelle Datenversion. build läuft pro Version und
+    name genau einmal; danach kommt das gespeicherte Objekt zurück (nicht kopiert –
+    Aufrufer dürfen es nicht verändern). Keine Dateien -> build(leerer Frame).
+    Parameter der Ableitung gehören in name (z. B. "budget:60").
+    needs_frames=False: build(None), der Store wird dafür nicht geladen.
+    """
+    compact = COMPACT_SCHEMA if compact is None else compact
+    folder_key = os.path.normpath(folder_path)
+    if needs_frames:
+        entry = _entry(folder_path, compact)
+        if entry is None:
+            return build(pd.DataFrame())
+        version, df, _ = entry
+    else:
+        file_list = _list_files(folder_path)
+        if not file_list:
+            return build(None)
+        version, df = _version_of(file_list), None
+        _note_version(folder_key, version)
+    key = (folder_key, compact, name)
+
+    cached = _DERIVED.get(key)
+    if cached is None or cached[0] != version:
+        with _DERIVED_LOCK:
+            build_lock = _BUILD_LOCKS.setdefault(key, threading.RLock())
+        with build_lock:
+            cached = _DERIVED.get(key)
+            if cached is None or cached[0] != version:
+                with stage("derive"):
+                    cached = (version, build(None if df is None else df.copy(deep=False)))
+                with _DERIVED_LOCK:
+                    # nicht eintragen, wenn inzwischen eine neuere Version gesehen wurde
+                    if _SEEN_VERSIONS.get(folder_key, version) == version:
+                        _DERIVED[key] = cached
+    return cached[1]
+
+
+def load_report(folder_path: str) -> Optional[dict]:
+    """
+    Report des letzten Ladevorgangs für den Ordner (oder None):
+    files, rows, workers, wall_s, read_s, concat_s, per_file [(name, rows, s)].
+    """
+    return _REPORTS.get(os.path.normpath(folder_path))
+
+
+def clear_frame_store(folder_path: Optional[str] = None) -> None:
+    """
+    Leert den gesamten Store oder (wenn folder_path gesetzt) nur den Eintrag dieses Ordners.
+    """
+    # Locks nacheinander, nie verschachtelt (build in get_derived kann _LOCK brauchen)
+    for lock, store in ((_LOCK, _STORE), (_DERIVED_LOCK, _DERIVED), (_DERIVED_LOCK, _BUILD_LOCKS)):
+        with lock:
+            if folder_path is None:
+                store.clear()
+            else:
+                key = os.path.normpath(folder_path)
+                for k in [k for k in store if k[0] == key]:
+                    store.pop(k, None)
+    with _DERIVED_LOCK:
+        if folder_path is None:
+            _SEEN_VERSIONS.clear()
+        else:
+            _SEEN_VERSIONS.pop(os.path.normpath(folder_path), None)
+
+
+def schema_report(folder_path: str, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """
+    Vergleicht Standard- und Kompakt-Schema auf den echten Daten des Ordners:
+    Speicherbedarf (deep) sowie Zeit für einen Tagesfilter und einen Tag+Verhalten-Filter.
+    Nutzt den Store nicht (lädt beide Varianten frisch).
+    """
+    file_list = _list_files(folder_path)
+    report: Dict[str, Dict[str, float]] = {}
+    for name, compact in (("standard", False), ("compact", True)):
+        df, _ = _load_frames(file_list, compact=compact)
+        if df.empty:
+            return {}
+        day = df['date'].iloc[len(df) // 2]
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            df[df['date'] == day]
+        t_day = (time.perf_counter() - t0) / repeat
+
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            df[(df['date'] == day) & (df['dominant_behavior'] == "feeding")]
+        t_both = (time.perf_counter() - t0) / repeat
+
+        report[name] = {
+            "rows": float(len(df)),
+            "memory_mb": df.memory_usage(deep=True).sum() / 1e6,
+            "filter_date_ms": t_day * 1e3,
+            "filter_date_behavior_ms": t_both * 1e3,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+
+    folder = sys.argv[1] if len(sys.argv) > 1 else "data/action_detection/loaded"
+    rep = schema_report(folder)
+    for name, vals in rep.items():
+        print(f"{name:9s} " + "  ".join(f"{k}={v:,.2f}" for k, v in vals.items()))
+    if len(rep) == 2:
+        print(f"Speicher: -{1 - rep['compact']['memory_mb'] / rep['standard']['memory_mb']:.0%}  "
+              f"Tagesfilter: x{rep['standard']['filter_date_ms'] / rep['compact']['filter_date_ms']:.1f}")
@@ -0,0 +1,313 @@
+"""
+Inhaltsadressierte Ablage für gerenderte Bilder (matplotlib-PNGs) und die Flask-Route,
+die sie ausliefert.
+
+Funktionen:
+- new_figure(figsize)                    # Figure + FigureCanvasAgg, ohne pyplot
+- figure_url(fig, **savefig_kwargs)      # Figur rendern, ablegen, URL '/img/<sha1>.png' zurückgeben
+- store_image(data, fmt="png")           # fertige Bytes ablegen -> URL
+- get_image(name)                        # (Bytes, MIME-Typ) zu '<sha1>.<ext>' oder None
+- is_image_src(value)                    # True für Bild-URLs und (alte) data:image-URIs
+- image_available(value)                 # False, wenn eine Bild-URL in value nicht mehr auslieferbar ist
+- image_src(value)                       # Bild-URL mit Pfad-Präfix der Dash-App (für html.Img)
+- register_image_route(app)              # GET <prefix>img/<name> auf dem Flask-Server der Dash-App
+- prune_disk(max_mb, max_age_days)       # Dateiablage auf Größe/Alter begrenzen
+- configure_image_store(fmt, max_memory_mb, disk_dir, max_disk_mb, max_disk_age_days)
+
+Design:
+- Der Name ist der SHA-1 der Bytes: gleiche Grafik -> gleiche URL. Deshalb darf der Browser
+  ewig cachen (Cache-Control: immutable); das ETag ist der Hash, If-None-Match -> 304.
+  Callbacks liefern nur noch die URL statt eines base64-Data-URIs (~33 % größer, bei jedem
+  Aufruf erneut über den Callback-Response).
+- Ablage im Speicher (LRU, Grenze in MB) und zusätzlich als Datei unter DISK_DIR. Die Datei
+  sorgt dafür, dass URLs aus dem Figuren-Cache (auch dem diskcache-Backend) nach Verdrängung
+  oder Neustart gültig bleiben. Ist der Ordner nicht beschreibbar, bleibt es still beim
+  Speicher.
+- Die Dateiablage ist begrenzt (MAX_DISK_MB, MAX_DISK_AGE_DAYS): prune_disk löscht beim Start
+  (register_image_route) und danach jeweils nach PRUNE_FRACTION der Grenze an neu
+  geschriebenen Bytes die ältesten Dateien. "Alt" heißt lange nicht geschrieben oder
+  ausgeliefert (mtime wird bei beidem erneuert). Der Figuren-Cache prüft bei jedem Treffer
+  image_available: Das erneuert die mtime auch für Bilder, die der Browser nur noch aus seinem
+  Cache zeigt, und ein inzwischen gelöschtes Bild wird neu gerendert statt als tote URL
+  ausgeliefert.
+- URLs: generate_* liefern und Caches speichern "/img/<name>" ohne Präfix (gültig unabhängig
+  davon, unter welchem Pfad die App läuft). Erst image_src setzt beim Bauen des html.Img das
+  requests_pathname_prefix der App davor (app.get_relative_path); die Route hängt am
+  routes_pathname_prefix.
+- Rendern ohne pyplot: Jede Figur gehört nur dem Aufrufer (kein globaler Zustand wie
+  plt.gcf/plt.tight_layout), damit parallele Callbacks in Thread-Workern sich nicht
+  gegenseitig die Figur verändern. Geschlossen werden muss nichts (kein Figure-Manager).
+- Format: IMAGE_FORMAT = "png" (Standard) oder "webp" (kleiner; braucht Pillow, sonst still
+  PNG).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from widgets.metrics import stage
+
+ROUTE = "/img/"
+IMAGE_FORMAT = "png"
+MAX_MEMORY_MB = 128
+DISK_DIR = os.path.join("data", "_derived", "images")
+MAX_DISK_MB = 1024
+MAX_DISK_AGE_DAYS = 30
+PRUNE_FRACTION = 0.1     # nach so viel neu geschriebenen Bytes (Anteil an MAX_DISK_MB) aufräumen
+# Browser-Cache: ein Jahr, Inhalt ändert sich unter derselben URL nie
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_MIME = {"png": "image/png", "webp": "image/webp"}
+_NAME_RE = re.compile(r"^([0-9a-f]{40})\.(png|webp)$")
+
+# name ('<sha1>.<ext>') -> Bytes
+_IMAGES: "OrderedDict[str, bytes]" = OrderedDict()
+_IMAGES_BYTES = 0
+_IMAGES_LOCK = threading.Lock()
+# seit dem letzten prune_disk geschriebene Bytes
+_DISK_WRITTEN = 0
+_PRUNE_LOCK = threading.Lock()
+# Präfix für image_src, gesetzt von register_image_route (requests_pathname_prefix + "img/")
+_URL_PREFIX = ROUTE
+
+
+def configure_image_store(fmt: Optional[str] = None, max_memory_mb: Optional[float] = None,
+                          disk_dir: Optional[str] = None, max_disk_mb: Optional[float] = None,
+                          max_disk_age_days: Optional[float] = None) -> str:
+    """
+    Setzt Format, Speichergrenze, Ordner und Grenzen der Dateiablage (None = unverändert;
+    disk_dir="" schaltet die Dateiablage ab). Rückgabe: tatsächlich verwendetes Format.
+    """
+    global IMAGE_FORMAT, MAX_MEMORY_MB, DISK_DIR, MAX_DISK_MB, MAX_DISK_AGE_DAYS
+    if fmt is not None:
+        IMAGE_FORMAT = fmt if fmt in _MIME else "png"
+    if max_memory_mb is not None:
+        MAX_MEMORY_MB = max_memory_mb
+    if disk_dir is not None:
+        DISK_DIR = disk_dir
+    if max_disk_mb is not None:
+        MAX_DISK_MB = max_disk_mb
+    if max_disk_age_days is not None:
+        MAX_DISK_AGE_DAYS = max_disk_age_days
+    if IMAGE_FORMAT == "webp":
+        try:
+            from PIL import features
+
+            if not features.check("webp"):
+                IMAGE_FORMAT = "png"
+        except Exception:
+            IMAGE_FORMAT = "png"
+    return IMAGE_FORMAT
+
+
+def _disk_path(name: str) -> Optional[str]:
+    return os.path.join(DISK_DIR, name) if DISK_DIR else None
+
+
+def _remember(name: str, data: bytes) -> None:
+    global _IMAGES_BYTES
+    limit = MAX_MEMORY_MB * 1024 * 1024
+    with _IMAGES_LOCK:
+        if name in _IMAGES:
+            _IMAGES.move_to_end(name)
+            return
+        _IMAGES[name] = data
+        _IMAGES_BYTES += len(data)
+        while _IMAGES_BYTES > limit and len(_IMAGES) > 1:
+            _, old = _IMAGES.popitem(last=False)
+            _IMAGES_BYTES -= len(old)
+
+
+def _touch(path: str) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune_disk(max_mb: Optional[float] = None, max_age_days: Optional[float] = None) -> int:
+    """
+    Löscht in DISK_DIR Bilder, die älter als max_age_days sind, und danach die ältesten, bis
+    höchstens max_mb übrig sind (None = MAX_DISK_MB/MAX_DISK_AGE_DAYS). Rückgabe: gelöschte Dateien.
+    """
+    global _DISK_WRITTEN
+    if not DISK_DIR:
+        return 0
+    max_bytes = (MAX_DISK_MB if max_mb is None else max_mb) * 1024 * 1024
+    max_age_s = (MAX_DISK_AGE_DAYS if max_age_days is None else max_age_days) * 86400
+    with _PRUNE_LOCK:
+        _DISK_WRITTEN = 0
+        files = []
+        try:
+            with os.scandir(DISK_DIR) as it:
+                for item in it:
+                    if _NAME_RE.match(item.name) or item.name.endswith(".tmp"):
+                        try:
+                            st = item.stat()
+                        except OSError:
+                            continue
+                        files.append((st.st_mtime, st.st_size, item.path))
+        except OSError:
+            return 0
+        files.sort()  # älteste zuerst
+        total = sum(size for _, size, _ in files)
+        cutoff = time.time() - max_age_s
+        removed = 0
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+def store_image(data: bytes, fmt: str = "png") -> str:
+    """Legt die Bytes ab und gibt die URL '/img/<sha1>.<fmt>' zurück (ohne Pfad-Präfix, s. image_src)."""
+    global _DISK_WRITTEN
+    name = f"{hashlib.sha1(data).hexdigest()}.{fmt}"
+    _remember(name, data)
+    path = _disk_path(name)
+    if path and os.path.exists(path):
+        _touch(path)
+    elif path:
+        try:
+            os.makedirs(DISK_DIR, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+            _DISK_WRITTEN += len(data)
+        except OSError:
+            pass  # nur im Speicher
+        if _DISK_WRITTEN > MAX_DISK_MB * 1024 * 1024 * PRUNE_FRACTION:
+            prune_disk()
+    return ROUTE + name
+
+
+def new_figure(figsize, **kwargs):
+    """matplotlib-Figure mit eigener Agg-Canvas (thread-sicher, nicht in pyplot registriert)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize, **kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def figure_url(fig, **savefig_kwargs) -> str:
+    """Rendert eine matplotlib-Figur (tight_layout + savefig) und legt sie ab."""
+    fmt = IMAGE_FORMAT
+    buf = io.BytesIO()
+    with stage("render"):
+        fig.tight_layout()
+        try:
+            fig.savefig(buf, format=fmt, **savefig_kwargs)
+        except Exception:
+            if fmt == "png":
+                raise
+            fmt = "png"  # webp-Export nicht verfügbar
+            buf = io.BytesIO()
+            fig.savefig(buf, format=fmt, **savefig_kwargs)
+    return store_image(buf.getvalue(), fmt)
+
+
+def get_image(name: str) -> Optional[Tuple[bytes, str]]:
+    """(Bytes, MIME-Typ) zu '<sha1>.<ext>' aus Speicher oder Datei; None = unbekannt."""
+    match = _NAME_RE.match(name)
+    if match is None:
+        return None
+    mime = _MIME[match.group(2)]
+    with _IMAGES_LOCK:
+        data = _IMAGES.get(name)
+        if data is not None:
+            _IMAGES.move_to_end(name)
+            return data, mime
+    path = _disk_path(name)
+    if not path:
+        return None
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read()
+    except OSError:
+        return None
+    _touch(path)
+    _remember(name, data)
+    return data, mime
+
+
+def is_image_src(value) -> bool:
+    """True, wenn value als src eines html.Img taugt (Bild-URL oder data:image-URI)."""
+    return isinstance(value, str) and (value.startswith(ROUTE) or value.startswith("data:image"))
+
+
+def image_available(value) -> bool:
+    """
+    True, wenn jede Bild-URL in value (str oder Liste/Tupel) ausgeliefert werden kann; andere
+    Werte gelten als vorhanden. Datei vorhanden -> mtime erneuern; nur noch im Speicher ->
+    Datei neu schreiben.
+    """
+    if isinstance(value, (list, tuple)):
+        return all(image_available(v) for v in value)
+    if not (isinstance(value, str) and value.startswith(ROUTE)):
+        return True
+    name = value[len(ROUTE):]
+    path = _disk_path(name)
+    if path and os.path.exists(path):
+        _touch(path)
+        return True
+    with _IMAGES_LOCK:
+        data = _IMAGES.get(name)
+    if data is None:
+        return False
+    if path:
+        store_image(data, name.rsplit(".", 1)[-1])
+    return True
+
+
+def image_src(value):
+    """src für html.Img: Bild-URLs bekommen das Pfad-Präfix der App, data:-URIs bleiben."""
+    if isinstance(value, str) and value.startswith(ROUTE):
+        return _URL_PREFIX + value[len(ROUTE):]
+    return value
+
+
+def register_image_route(app) -> None:
+    """
+    Registriert GET <routes_pathname_prefix>img/<name> auf dem Flask-Server der Dash-App
+    (ETag + 304), merkt sich das requests_pathname_prefix für image_src und räumt die
+    Dateiablage auf (prune_disk).
+    """
+    from flask import abort, request
+
+    global _URL_PREFIX
+    server = app.server
+    _URL_PREFIX = app.get_relative_path(ROUTE)
+    route = app.config.routes_pathname_prefix.rstrip("/") + ROUTE
+
+    def serve_image(name):
+        found = get_image(name)
+        if found is None:
+            abort(404)
+        data, mime = found
+        etag = name.split(".", 1)[0]
+        if request.if_none_match.contains(etag):
+            response = server.response_class(status=304)
+        else:
+            response = server.response_class(data, mimetype=mime)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        return response
+
+    server.add_url_rule(route + "<name>", "image_store", serve_image, methods=["GET"])
+    prune_disk()
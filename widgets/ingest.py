@@ -0,0 +1,272 @@
+"""
+Ingest einzelner Action-Detection-Pickles inkl. abgeleiteter Spalten.
+
+Funktionen:
+- derive_columns(df)        # dominantes Verhalten, Konfidenz, hour, day, x/y-Mittelpunkt (NumPy)
+- ingest_file(path)         # Pickle + abgeleitete Spalten (aus Sidecar oder frisch berechnet)
+- derived_columns(path)     # nur die abgeleiteten Spalten (Sidecar, sonst über ingest_file)
+- sidecar_path(path)        # Ablageort der abgeleiteten Spalten
+- ingest_files(file_list)   # mehrere Dateien parallel (Prozess-Pool) + Lade-Report
+- concat_frames(frames)     # spaltenweises Zusammenfügen mit genau einer Kopie
+
+Design:
+- Die abgeleiteten Spalten werden pro Datei genau einmal berechnet: argmax über eine
+  zusammenhängende Matrix der Verhaltenswahrscheinlichkeiten statt idxmax(axis=1).
+- Das Ergebnis wird neben der Quelle abgelegt (<ordner>/_derived/<name>.npz, inkl. mtime und
+  Größe der Quelle). Spätere Ladevorgänge übernehmen die Arrays direkt, solange die Quelle
+  unverändert ist; auch das Parsen von 't' entfällt dann.
+- Ist der Ordner nicht beschreibbar, wird ohne Sidecar weitergearbeitet.
+- Mehrere Dateien werden in einem Prozess-Pool gelesen (höchstens MAX_WORKERS gleichzeitig,
+  nie mehr als 2 Aufträge je Worker in der Warteschlange). Unter MIN_FILES_FOR_POOL Dateien
+  lohnt der Pool-Start nicht, dann wird sequentiell gelesen.
+- Nach dem Lesen trägt ingest_files die Dateien in den Datenkatalog ein (widgets.catalog:
+  Tage, Stunden, Frames je Verhalten), damit Layouts ohne Laden der Frames auskommen.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from widgets.utils import BEHAVIORS
+
+SIDECAR_DIR = "_derived"
+# erhöhen, wenn sich Inhalt/Bedeutung der abgeleiteten Spalten ändert
+SIDECAR_SCHEMA = 1
+
+# Prozess-Pool: None = Anzahl CPUs (gedeckelt auf 8)
+MAX_WORKERS: Optional[int] = None
+MIN_FILES_FOR_POOL = 4
+
+DERIVED_COLS = ["t", "hour", "day", "dominant_code", "dominant_confidence", "x_center", "y_center"]
+
+
+def sidecar_path(path: str) -> str:
+    folder, name = os.path.split(path)
+    return os.path.join(folder, SIDECAR_DIR, os.path.splitext(name)[0] + ".npz")
+
+
+def derive_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    Berechnet alle abgeleiteten Spalten vektorisiert.
+
+    - dominant_code:       int8, Index in BEHAVIORS (erstes Maximum wie idxmax)
+    - dominant_confidence: float32, Wahrscheinlichkeit des dominanten Verhaltens
+    - t:                   datetime64[ns]
+    - hour:                int8
+    - day:                 int32, Tage seit 1970-01-01
+    - x_center/y_center:   float32
+    """
+    probs = np.ascontiguousarray(df[BEHAVIORS].to_numpy(dtype=np.float64))
+    if np.isnan(probs).any():
+        probs = np.where(np.isnan(probs), -np.inf, probs)
+    code = probs.argmax(axis=1)
+    conf = probs[np.arange(len(probs)), code]
+
+    t = pd.to_datetime(df['t'])
+    if t.dt.tz is not None:
+        t = t.dt.tz_localize(None)  # Wanduhrzeit behalten (wie .dt.hour)
+    t = t.to_numpy(dtype="datetime64[ns]")
+    day = t.astype("datetime64[D]")
+    hour = (t - day).astype("timedelta64[h]").astype(np.int8)
+
+    x = (df['x1'].to_numpy(dtype=np.float32) + df['x2'].to_numpy(dtype=np.float32)) / 2
+    y = (df['y1'].to_numpy(dtype=np.float32) + df['y2'].to_numpy(dtype=np.float32)) / 2
+
+    return {
+        "t": t,
+        "hour": hour,
+        "day": day.astype(np.int64).astype(np.int32),
+        "dominant_code": code.astype(np.int8),
+        "dominant_confidence": conf.astype(np.float32),
+        "x_center": x,
+        "y_center": y,
+    }
+
+
+def _read_sidecar(path: str, st: os.stat_result, n_rows: Optional[int]) -> Optional[Dict[str, np.ndarray]]:
+    try:
+        with np.load(sidecar_path(path)) as npz:
+            meta = npz["meta"]
+            if (int(meta[0]) != SIDECAR_SCHEMA or int(meta[1]) != st.st_mtime_ns
+                    or int(meta[2]) != st.st_size):
+                return None
+            cols = {c: npz[c] for c in DERIVED_COLS}
+    except (OSError, KeyError, ValueError):
+        return None
+    if n_rows is not None and len(cols["t"]) != n_rows:
+        return None
+    cols["t"] = cols["t"].view("datetime64[ns]")
+    return cols
+
+
+def _write_sidecar(path: str, st: os.stat_result, cols: Dict[str, np.ndarray]) -> None:
+    target = sidecar_path(path)
+    tmp = target + ".tmp.npz"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        meta = np.array([SIDECAR_SCHEMA, st.st_mtime_ns, st.st_size], dtype=np.int64)
+        arrays = {c: cols[c] for c in DERIVED_COLS}
+        arrays["t"] = arrays["t"].view(np.int64)  # ns seit Epoche
+        np.savez(tmp, meta=meta, **arrays)
+        os.replace(tmp, target)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def ingest_file(path: str) -> Optional[pd.DataFrame]:
+    """
+    Liest eine Pickle-Datei und hängt die abgeleiteten Spalten an (siehe derive_columns).
+    Rückgabe: None, wenn die Datei keine Zeitspalte 't' hat.
+    """
+    st = os.stat(path)
+    df = pd.read_pickle(path)
+
+    # sicherstellen, dass Zeitspalte existiert
+    if 't' not in df.columns:
+        return None
+
+    cols = _read_sidecar(path, st, len(df))
+    if cols is None:
+        cols = derive_columns(df)
+        _write_sidecar(path, st, cols)
+
+    for c in DERIVED_COLS:
+        df[c] = cols[c]
+    return df
+
+
+def derived_columns(path: str) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Nur die abgeleiteten Spalten (DERIVED_COLS) einer Datei: aus dem Sidecar, wenn er zur
+    Quelle passt, sonst über ingest_file (legt den Sidecar dabei an). None = keine Zeitspalte.
+    """
+    try:
+        cols = _read_sidecar(path, os.stat(path), None)
+    except OSError:
+        return None
+    if cols is not None:
+        return cols
+    df = ingest_file(path)
+    return None if df is None else {c: df[c].to_numpy() for c in DERIVED_COLS}
+
+
+def _timed_ingest(path: str) -> Tuple[Optional[pd.DataFrame], float]:
+    t0 = time.perf_counter()
+    df = ingest_file(path)
+    return df, time.perf_counter() - t0
+
+
+def _worker_count(n_files: int, max_workers: Optional[int]) -> int:
+    limit = max_workers if max_workers is not None else MAX_WORKERS
+    if limit is None:
+        limit = min(os.cpu_count() or 1, 8)
+    return max(1, min(limit, n_files))
+
+
+def ingest_files(
+    file_list: List[str],
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int, str], None]] = None,
+) -> Tuple[List[Optional[pd.DataFrame]], dict]:
+    """
+    Liest mehrere Dateien (ingest_file) – ab MIN_FILES_FOR_POOL Dateien in einem Prozess-Pool.
+
+    progress(done, total, dateiname) wird nach jeder fertigen Datei aufgerufen.
+
+    Rückgabe: (Frames in Reihenfolge von file_list, Report)
+    Report: files, rows, workers, wall_s, read_s (Summe der Einzelzeiten), per_file [(name, rows, s)]
+    """
+    t0 = time.perf_counter()
+    n = len(file_list)
+    workers = _worker_count(n, max_workers) if n >= MIN_FILES_FOR_POOL else 1
+
+    frames: List[Optional[pd.DataFrame]] = [None] * n
+    seconds = [0.0] * n
+    done = 0
+
+    def _finish(i: int, df: Optional[pd.DataFrame], sec: float) -> None:
+        nonlocal done
+        frames[i], seconds[i] = df, sec
+        done += 1
+        if progress is not None:
+            progress(done, n, os.path.basename(file_list[i]))
+
+    if workers == 1:
+        for i, path in enumerate(file_list):
+            _finish(i, *_timed_ingest(path))
+    else:
+        # spawn: sicher auch aus einem Server mit laufenden Threads heraus
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            pending = {}
+            queue = iter(enumerate(file_list))
+            for i, path in queue:
+                pending[pool.submit(_timed_ingest, path)] = i
+                if len(pending) >= 2 * workers:
+                    break
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    _finish(pending.pop(fut), *fut.result())
+                    nxt = next(queue, None)
+                    if nxt is not None:
+                        pending[pool.submit(_timed_ingest, nxt[1])] = nxt[0]
+
+    report = {
+        "files": n,
+        "rows": int(sum(len(df) for df in frames if df is not None)),
+        "workers": workers,
+        "wall_s": time.perf_counter() - t0,
+        "read_s": float(sum(seconds)),
+        "per_file": [
+            (os.path.basename(f), 0 if df is None else len(df), sec)
+            for f, df, sec in zip(file_list, frames, seconds)
+        ],
+    }
+
+    from widgets.catalog import record_ingest
+
+    record_ingest(file_list, frames)
+    return frames, report
+
+
+def concat_frames(frames: List[pd.DataFrame], dtypes: Optional[Dict[str, object]] = None) -> pd.DataFrame:
+    """
+    Fügt Frames spaltenweise zusammen: pro Spalte ein vorab allokiertes Array, in das die
+    Teile direkt (ggf. schon im Ziel-dtype, z. B. float32) kopiert werden. Keine
+    Zwischen-Konsolidierung wie bei pd.concat, jede Zelle wird genau einmal kopiert.
+    Haben die Frames unterschiedliche Spalten, wird auf pd.concat zurückgefallen.
+    """
+    if not frames:
+        return pd.DataFrame()
+    columns = list(frames[0].columns)
+    if any(list(df.columns) != columns for df in frames[1:]):
+        return pd.concat(frames, ignore_index=True)
+
+    dtypes = dtypes or {}
+    total = sum(len(df) for df in frames)
+    data = {}
+    for col in columns:
+        if not all(isinstance(df[col].dtype, np.dtype) for df in frames):
+            # Extension-dtypes (kategorial, string, tz-aware) überlässt man pandas
+            data[col] = pd.concat([df[col] for df in frames], ignore_index=True)
+            continue
+        dtype = dtypes.get(col) or np.result_type(*[df[col].dtype for df in frames])
+        out = np.empty(total, dtype=dtype)
+        pos = 0
+        for df in frames:
+            k = len(df)
+            out[pos:pos + k] = df[col].to_numpy()
+            pos += k
+        data[col] = out
+    return pd.DataFrame(data, copy=False)
@@ -0,0 +1,36 @@
+"""
+Lazy-Import-Schicht für schwere Bibliotheken.
+
+Funktionen:
+- lazy_callable(module_name, attr)   # Funktion, deren Modul erst beim ersten Aufruf importiert wird
+
+Design:
+- app.py und die register_callbacks-Module binden die generate_*-Funktionen über lazy_callable.
+  Beim Start werden damit weder matplotlib, scikit-learn, scipy, networkx, plotly.express noch
+  pm4py geladen; das passiert erst, wenn das jeweilige Widget zum ersten Mal rendert.
+- Der Import läuft über importlib (thread-sicher durch den Import-Lock des Interpreters),
+  danach wird die echte Funktion direkt aufgerufen.
+- Importfehler treten beim ersten Aufruf auf, also dort, wo Callbacks/Preview sie ohnehin abfangen.
+"""
+
+from __future__ import annotations
+
+import importlib
+from typing import Any, Callable
+
+
+def lazy_callable(module_name: str, attr: str) -> Callable[..., Any]:
+    """
+    Platzhalter für `from module_name import attr`, der erst beim ersten Aufruf importiert.
+    """
+    resolved: list = []
+
+    def _call(*args, **kwargs):
+        if not resolved:
+            resolved.append(getattr(importlib.import_module(module_name), attr))
+        return resolved[0](*args, **kwargs)
+
+    _call.__name__ = attr
+    _call.__qualname__ = attr
+    _call.__doc__ = f"Lazy: {module_name}.{attr} (Import beim ersten Aufruf)"
+    return _call
@@ -0,0 +1,388 @@
+"""
+Laufzeitmessung der Callbacks (Stufen, Zeilen, Cache-Treffer, Antwortgröße) und ein
+/metrics-Endpunkt im Prometheus-Textformat.
+
+Funktionen:
+- instrument_app(app)                    # alle registrierten Callbacks messen (nach register_callbacks)
+- track(callback, phase) / timed(...)    # Kontextmanager/Decorator für einen Aufruf (Preview, Worker)
+- stage(name)                            # Kontextmanager: Zeit einer Stufe im laufenden Aufruf
+- count_rows(n) / count_cache(hit)       # Zeilen bzw. Figuren-Cache-Treffer im laufenden Aufruf
+- bind(func)                             # func im aktuellen Messkontext (für Thread-Pools)
+- register_metrics_route(server, folders) # GET /metrics auf dem Flask-Server
+- metrics_text(folders) / reset_metrics()
+
+Design:
+- Ein Aufruf ist ein Datensatz im contextvars-Kontext: Stufenzeiten (load, derive, filter,
+  kmeans, render, serialize), berührte Zeilen, Cache-Treffer/-Fehlschläge. Die Hooks in
+  frame_store, utils, zone_learning, image_store und figure_cache kosten außerhalb eines
+  Aufrufs nur ein ContextVar.get. Threads eines Pools sehen den Datensatz nur über bind(func).
+- Stufen aus parallelen Threads werden addiert (können zusammen länger sein als der Aufruf);
+  verschachtelte Stufen zählen doppelt (filter enthält ein ggf. nötiges load).
+- instrument_app umhüllt die Dispatch-Funktion jedes Eintrags in app.callback_map: gemessen
+  wird der ganze Request inkl. JSON-Serialisierung, die Antwortgröße ist die Länge des
+  JSON. "serialize" misst dash._callback.to_json (fehlt der Name, entfällt die Stufe).
+- Background-Callbacks: im Server nur Abgabe/Abfrage (phase="request"), die eigentliche
+  Arbeit im Worker-Prozess (phase="worker", über widgets.background). Worker schreiben ihre
+  Datensätze als JSON-Zeilen nach SPOOL_DIR; /metrics liest sie beim Abruf ein.
+- Nur Standardbibliothek (wird von frame_store, utils, image_store, figure_cache importiert).
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import glob
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+PREFIX = "pig"
+SPOOL_DIR = os.path.join("data", "_derived", "metrics")
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 3e5, 1e6, 3e6, 1e7)
+ROWS_BUCKETS = (1e2, 1e3, 1e4, 1e5, 1e6, 1e7)
+
+_HELP = {
+    "callback_seconds": ("histogram", "Dauer eines Callback-Aufrufs"),
+    "callback_stage_seconds": ("histogram", "Dauer je Stufe und Aufruf (Summe über Threads)"),
+    "callback_rows": ("histogram", "Berührte Zeilen je Aufruf"),
+    "callback_response_bytes": ("histogram", "Größe der JSON-Antwort"),
+    "callback_cache_total": ("counter", "Figuren-Cache-Treffer/-Fehlschläge in Callbacks"),
+    "callback_errors_total": ("counter", "Callbacks mit Exception"),
+}
+
+_OWNER_PID = os.getpid()
+_CURRENT: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("pig_metrics_call", default=None)
+_RECORD_LOCK = threading.Lock()
+
+# (Name, Labels) -> [Bucket-Zähler..., +Inf, Summe]
+_HISTOGRAMS: Dict[Tuple[str, Tuple], list] = {}
+_BUCKETS: Dict[str, tuple] = {}
+# (Name, Labels) -> Wert
+_COUNTERS: Dict[Tuple[str, Tuple], float] = {}
+_METRICS_LOCK = threading.Lock()
+# Spool-Datei -> bereits gelesene Bytes
+_SPOOL_OFFSETS: Dict[str, int] = {}
+
+
+# --- Registry ---
+
+def _observe(name: str, labels: Tuple, value: float, buckets: tuple) -> None:
+    key = (name, labels)
+    with _METRICS_LOCK:
+        _BUCKETS.setdefault(name, buckets)
+        counts = _HISTOGRAMS.get(key)
+        if counts is None:
+            counts = _HISTOGRAMS[key] = [0] * (len(buckets) + 1) + [0.0]
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                counts[i] += 1
+        counts[len(buckets)] += 1
+        counts[-1] += value
+
+
+def _inc(name: str, labels: Tuple, value: float = 1) -> None:
+    with _METRICS_LOCK:
+        _COUNTERS[(name, labels)] = _COUNTERS.get((name, labels), 0) + value
+
+
+def _apply(record: dict) -> None:
+    """Überträgt einen abgeschlossenen Aufruf in die Histogramme/Zähler."""
+    cb = (("callback", record["callback"]),)
+    _observe("callback_seconds", cb + (("phase", record["phase"]),), record["seconds"], SECONDS_BUCKETS)
+    for name, seconds in record["stages"].items():
+        _observe("callback_stage_seconds", cb + (("stage", name),), seconds, SECONDS_BUCKETS)
+    if record["rows"]:
+        _observe("callback_rows", cb, record["rows"], ROWS_BUCKETS)
+    if record.get("bytes") is not None:
+        _observe("callback_response_bytes", cb, record["bytes"], BYTES_BUCKETS)
+    for result in ("hit", "miss"):
+        if record["cache"][result]:
+            _inc("callback_cache_total", cb + (("result", result),), record["cache"][result])
+    if record["error"]:
+        _inc("callback_errors_total", cb + (("phase", record["phase"]),))
+
+
+def _spool(record: dict) -> None:
+    try:
+        os.makedirs(SPOOL_DIR, exist_ok=True)
+        with open(os.path.join(SPOOL_DIR, f"{os.getpid()}.jsonl"), "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record) + "\n")
+    except OSError:
+        pass  # Messung geht verloren, der Callback nicht
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _drain_spool() -> None:
+    """Liest neue Zeilen der Worker-Spools ein; Dateien beendeter Worker werden danach gelöscht."""
+    for path in glob.glob(os.path.join(SPOOL_DIR, "*.jsonl")):
+        try:
+            pid = int(os.path.basename(path).split(".", 1)[0])
+            with open(path, "r", encoding="utf-8") as fh:
+                fh.seek(_SPOOL_OFFSETS.get(path, 0))
+                chunk = fh.read()
+        except (OSError, ValueError):
+            continue
+        complete = chunk[:chunk.rfind("\n") + 1]
+        _SPOOL_OFFSETS[path] = _SPOOL_OFFSETS.get(path, 0) + len(complete.encode("utf-8"))
+        for line in complete.splitlines():
+            try:
+                _apply(json.loads(line))
+            except (ValueError, KeyError):
+                continue
+        if complete == chunk and not _pid_alive(pid):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            _SPOOL_OFFSETS.pop(path, None)
+
+
+# --- Messung eines Aufrufs ---
+
+class track:
+    """Kontextmanager: misst einen Aufruf von callback (phase: request, worker, preview)."""
+
+    def __init__(self, callback: str, phase: str = "request"):
+        self.record = {"callback": callback, "phase": phase, "seconds": 0.0, "stages": {},
+                       "rows": 0, "cache": {"hit": 0, "miss": 0}, "bytes": None, "error": False}
+
+    def __enter__(self) -> dict:
+        self._token = _CURRENT.set(self.record)
+        self._t0 = time.perf_counter()
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.record["seconds"] = time.perf_counter() - self._t0
+        _CURRENT.reset(self._token)
+        # PreventUpdate & Co. sind kein Fehler
+        self.record["error"] = exc_type is not None and not getattr(exc_type, "__module__", "").startswith("dash")
+        if os.getpid() == _OWNER_PID:
+            _apply(self.record)
+        else:
+            _spool(self.record)
+
+
+def timed(callback: str, phase: str = "request") -> Callable:
+    """Decorator-Form von track."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track(callback, phase):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class stage:
+    """Kontextmanager: Dauer der Stufe name im laufenden Aufruf (außerhalb: keine Messung)."""
+
+    __slots__ = ("name", "record", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.record = _CURRENT.get()
+        if self.record is not None:
+            self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        if self.record is not None:
+            seconds = time.perf_counter() - self.t0
+            with _RECORD_LOCK:
+                stages = self.record["stages"]
+                stages[self.name] = stages.get(self.name, 0.0) + seconds
+
+
+def count_rows(n: int) -> None:
+    record = _CURRENT.get()
+    if record is not None:
+        with _RECORD_LOCK:
+            record["rows"] += int(n)
+
+
+def count_cache(hit: bool) -> None:
+    record = _CURRENT.get()
+    if record is not None:
+        with _RECORD_LOCK:
+            record["cache"]["hit" if hit else "miss"] += 1
+
+
+def bind(func: Callable) -> Callable:
+    """func im aktuellen Kontext ausführen (z. B. pool.submit(bind(job)))."""
+    ctx = contextvars.copy_context()
+    return functools.partial(ctx.run, func)
+
+
+# --- Dash-Anbindung ---
+
+def callback_label(func: Callable) -> str:
+    """'<widget>.<funktion>' (z. B. behavior_position.update_plots), in app.py '<modul>.<funktion>'."""
+    module = getattr(func, "__module__", "") or ""
+    parts = module.split(".")
+    owner = parts[1] if parts[0] == "widgets" and len(parts) > 2 else parts[-1]
+    return f"{owner}.{getattr(func, '__name__', 'callback')}"
+
+
+def _timed_dispatch(name: str, dispatch: Callable) -> Callable:
+    @functools.wraps(dispatch)
+    def wrapper(*args, **kwargs):
+        with track(name) as record:
+            response = dispatch(*args, **kwargs)
+            if isinstance(response, (str, bytes)):
+                record["bytes"] = len(response.encode("utf-8") if isinstance(response, str) else response)
+            return response
+
+    wrapper._pig_metrics = True
+    return wrapper
+
+
+def _instrument_serialization() -> None:
+    try:
+        import dash._callback as dash_callback
+    except ImportError:
+        return
+    to_json = getattr(dash_callback, "to_json", None)
+    if to_json is None or getattr(to_json, "_pig_metrics", False):
+        return
+
+    @functools.wraps(to_json)
+    def timed_to_json(obj):
+        with stage("serialize"):
+            return to_json(obj)
+
+    timed_to_json._pig_metrics = True
+    dash_callback.to_json = timed_to_json
+
+
+def instrument_app(app) -> int:
+    """Umhüllt alle Server-Callbacks in app.callback_map (mehrfacher Aufruf unschädlich). Rückgabe: Anzahl."""
+    _instrument_serialization()
+    count = 0
+    for entry in app.callback_map.values():
+        dispatch = entry.get("callback")
+        if dispatch is None or getattr(dispatch, "_pig_metrics", False):
+            continue
+        entry["callback"] = _timed_dispatch(callback_label(dispatch), dispatch)
+        count += 1
+    return count
+
+
+# --- Ausgabe ---
+
+def _fmt_labels(labels: Iterable[Tuple[str, object]]) -> str:
+    parts = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _snapshot_lines(folders: Iterable[str]) -> list:
+    """Zustände der Caches (Figuren-Cache, Frame-Store, Vorschau) als Gauges/Counter."""
+    import sys
+
+    lines = []
+    figure_cache = sys.modules.get("widgets.figure_cache")
+    if figure_cache is not None:
+        stats = figure_cache.figure_cache_stats()
+        lines += [f"# HELP {PREFIX}_figure_cache_total Figuren-Cache je Funktion",
+                  f"# TYPE {PREFIX}_figure_cache_total counter"]
+        for func, s in sorted(stats.get("functions", {}).items()):
+            for result, field in (("hit", "hits"), ("miss", "misses")):
+                lines.append(f"{PREFIX}_figure_cache_total"
+                             f"{_fmt_labels([('function', func), ('result', result)])} {s.get(field, 0)}")
+    frame_store = sys.modules.get("widgets.frame_store")
+    preview_cache = sys.modules.get("widgets.preview_cache")
+    # Gauge -> [(Labels, Wert)]
+    gauges: Dict[str, list] = {"frame_store_rows": [], "frame_store_load_seconds": [],
+                               "preview_age_seconds": [], "preview_stale": []}
+    for folder in folders:
+        label = (("folder", folder),)
+        report = frame_store.load_report(folder) if frame_store is not None else None
+        if report:
+            gauges["frame_store_rows"].append((label, report["rows"]))
+            gauges["frame_store_load_seconds"].append((label, float(report["wall_s"])))
+        if preview_cache is not None:
+            status = preview_cache.preview_status(folder)
+            if status["age_s"] is not None:
+                gauges["preview_age_seconds"].append((label, float(status["age_s"])))
+            gauges["preview_stale"].append((label, int(bool(status["stale"]))))
+    for name, values in gauges.items():
+        if values:
+            lines.append(f"# TYPE {PREFIX}_{name} gauge")
+            lines += [f"{PREFIX}_{name}{_fmt_labels(labels)} {_fmt_value(v)}" for labels, v in values]
+    return lines
+
+
+def metrics_text(folders: Iterable[str] = ()) -> str:
+    """Alle Messwerte im Prometheus-Textformat (Version 0.0.4)."""
+    _drain_spool()
+    with _METRICS_LOCK:
+        histograms = {k: list(v) for k, v in _HISTOGRAMS.items()}
+        counters = dict(_COUNTERS)
+        buckets = dict(_BUCKETS)
+
+    lines = []
+    for name, (kind, help_text) in _HELP.items():
+        series = histograms if kind == "histogram" else counters
+        keys = sorted(k for k in series if k[0] == name)
+        if not keys:
+            continue
+        full = f"{PREFIX}_{name}"
+        lines += [f"# HELP {full} {help_text}", f"# TYPE {full} {kind}"]
+        for key in keys:
+            labels = key[1]
+            if kind == "counter":
+                lines.append(f"{full}{_fmt_labels(labels)} {_fmt_value(series[key])}")
+                continue
+            counts = series[key]
+            bounds = buckets[name]
+            for bound, n in zip(bounds, counts):
+                lines.append(f"{full}_bucket{_fmt_labels(labels + (('le', f'{bound:g}'),))} {n}")
+            lines.append(f"{full}_bucket{_fmt_labels(labels + (('le', '+Inf'),))} {counts[len(bounds)]}")
+            lines.append(f"{full}_sum{_fmt_labels(labels)} {_fmt_value(counts[-1])}")
+            lines.append(f"{full}_count{_fmt_labels(labels)} {counts[len(bounds)]}")
+    try:
+        lines += _snapshot_lines(folders)
+    except Exception:
+        pass  # Zustände sind Zusatz, die Histogramme sollen trotzdem raus
+    return "\n".join(lines) + "\n"
+
+
+def register_metrics_route(server, folders: Iterable[str] = ()) -> None:
+    """Registriert GET /metrics auf dem Flask-Server (app.server)."""
+    folders = tuple(folders)
+
+    def serve_metrics():
+        return server.response_class(metrics_text(folders),
+                                     mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+    server.add_url_rule("/metrics", "metrics", serve_metrics, methods=["GET"])
+
+
+def reset_metrics() -> None:
+    """Verwirft alle Messwerte (Spool-Dateien bleiben)."""
+    with _METRICS_LOCK:
+        _HISTOGRAMS.clear()
+        _COUNTERS.clear()
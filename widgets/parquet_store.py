@@ -0,0 +1,200 @@
+"""
+Datums-partitionierte Parquet-Ablage der Action-Detection-Daten.
+
+Funktionen:
+- dataset_path_for(folder_path)                      # Zielordner neben 'loaded'
+- convert_pkl_to_parquet(folder_path, dataset_path)  # *.pkl -> date=YYYY-MM-DD/*.parquet
+- dataset_is_fresh(folder_path, dataset_path)        # passt das Dataset zur Datenversion?
+- read_dataset(dataset_path, date, columns, behavior, hour)
+
+Design:
+- Pickles lassen sich nur vollständig lesen. Das Parquet-Dataset ist nach Datum partitioniert
+  (Hive-Layout), so dass eine Tagesabfrage nur die Dateien dieses Tages öffnet.
+- Gespeichert werden die bereits abgeleiteten Spalten (hour, dominant_behavior, x/y-Mittelpunkt);
+  Spaltenauswahl und Verhaltensfilter werden an pyarrow durchgereicht (Column/Predicate-Pushdown).
+- Eine Datei pro Partition, nach 't' sortiert (stabil, Quelldateien in Listenreihenfolge) –
+  dieselbe Zeilenfolge wie im Frame-Store, egal über welchen Pfad ein Tag gelesen wird.
+- '_manifest.json' hält die Datenversion der Quelle. Passt sie nicht mehr, gilt das Dataset als
+  veraltet und der Lader fällt auf den Frame-Store zurück.
+- pyarrow ist optional: Fehlt es, wird die Parquet-Ablage einfach nicht verwendet.
+
+Aufruf als Skript:
+    python -m widgets.parquet_store [data/action_detection/loaded]
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+import shutil
+import sys
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from widgets import frame_store
+from widgets.frame_store import (data_version, date_categorical, source_dtype, _list_files,
+                                 _load_frames)
+from widgets.utils import BEHAVIORS
+
+MANIFEST = "_manifest.json"
+# erhöhen, wenn sich Spalten oder Zeilenfolge des Datasets ändern
+DATASET_SCHEMA = 2
+
+
+def _pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+def dataset_path_for(folder_path: str) -> str:
+    """'data/action_detection/loaded' -> 'data/action_detection/parquet'"""
+    return os.path.join(os.path.dirname(os.path.normpath(folder_path)), "parquet")
+
+
+def _read_manifest(dataset_path: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(dataset_path, MANIFEST), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def dataset_is_fresh(folder_path: str, dataset_path: Optional[str] = None) -> bool:
+    """True, wenn ein Dataset existiert, das aus der aktuellen Datenversion erzeugt wurde."""
+    if not _pyarrow_available():
+        return False
+    dataset_path = dataset_path or dataset_path_for(folder_path)
+    manifest = _read_manifest(dataset_path)
+    return (bool(manifest)
+            and manifest.get("schema") == DATASET_SCHEMA
+            and manifest.get("version") == data_version(folder_path)
+            and manifest.get("compact", False) == frame_store.COMPACT_SCHEMA)
+
+
+def convert_pkl_to_parquet(folder_path: str, dataset_path: Optional[str] = None) -> str:
+    """
+    Schreibt alle *.pkl des Ordners als datums-partitioniertes Parquet-Dataset.
+    Jede Quelldatei wird einzeln verarbeitet, danach jede Partition zu einer nach 't'
+    sortierten Datei zusammengeführt (Speicherbedarf: höchstens ein Tag). Das Dataset wird
+    in einem temporären Ordner aufgebaut und erst am Ende ausgetauscht.
+
+    Rückgabe: Pfad des Datasets.
+    """
+    if not _pyarrow_available():
+        raise ImportError("pyarrow wird für die Parquet-Ablage benötigt.")
+
+    dataset_path = dataset_path or dataset_path_for(folder_path)
+    file_list = _list_files(folder_path)
+    version = data_version(folder_path)
+    compact = frame_store.COMPACT_SCHEMA
+
+    tmp_path = dataset_path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    dates = set()
+    for i, file in enumerate(file_list):
+        df, _ = _load_frames([file], compact=compact)
+        if df.empty:
+            continue
+        # Index in der gesamten Dateiliste (einzeln geladen wäre er immer 0)
+        df["source"] = np.full(len(df), i, dtype=source_dtype(len(file_list)))
+        stem = os.path.splitext(os.path.basename(file))[0]
+        for day, part in df.groupby("date", sort=True, observed=True):
+            part_dir = os.path.join(tmp_path, f"date={day.isoformat()}")
+            os.makedirs(part_dir, exist_ok=True)
+            part = part.drop(columns="date")
+            part.to_parquet(os.path.join(part_dir, f"{stem}.parquet"), index=False,
+                            engine="pyarrow")
+            dates.add(day.isoformat())
+
+    for day in dates:
+        _merge_partition(os.path.join(tmp_path, f"date={day}"))
+
+    with open(os.path.join(tmp_path, MANIFEST), "w", encoding="utf-8") as fh:
+        json.dump({"schema": DATASET_SCHEMA, "version": version, "compact": compact,
+                   "source": os.path.normpath(folder_path),
+                   "files": [os.path.basename(f) for f in file_list],
+                   "dates": sorted(dates)}, fh, indent=2)
+
+    shutil.rmtree(dataset_path, ignore_errors=True)
+    os.replace(tmp_path, dataset_path)
+    return dataset_path
+
+
+def _merge_partition(part_dir: str) -> None:
+    """Fasst die Dateien einer Partition zu 'part.parquet' zusammen, stabil nach 't' sortiert."""
+    files = sorted(glob.glob(os.path.join(part_dir, "*.parquet")))
+    df = pd.concat([pd.read_parquet(f, engine="pyarrow") for f in files], ignore_index=True)
+    if not df["t"].is_monotonic_increasing:
+        order = np.argsort(df["t"].to_numpy(), kind="stable")
+        df = df.take(order).reset_index(drop=True)
+    for f in files:
+        os.remove(f)
+    df.to_parquet(os.path.join(part_dir, "part.parquet"), index=False,
+                  engine="pyarrow", row_group_size=64_000)
+
+
+def read_dataset(
+    dataset_path: str,
+    date=None,
+    columns: Optional[List[str]] = None,
+    behavior: Optional[str] = None,
+    hour: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Liest nur die benötigten Partitionen (date) und Spalten (columns) des Datasets.
+    behavior/hour werden als Filter auf 'dominant_behavior'/'hour' an pyarrow übergeben.
+    Die Spalte 'date' wird aus der Partition wiederhergestellt (Schema wie im Frame-Store).
+    Zeilen sind nach 't' sortiert; ein Tag ohne Partition liefert einen leeren Frame mit
+    denselben Spalten.
+    """
+    import pyarrow.dataset as ds
+
+    day = pd.to_datetime(date).date() if date is not None else None
+    path = dataset_path if day is None else os.path.join(dataset_path, f"date={day.isoformat()}")
+    missing = not os.path.isdir(path)
+    dataset = ds.dataset(dataset_path if missing else path, format="parquet", partitioning="hive")
+    available = [c for c in dataset.schema.names if c != "date"]
+
+    want_date = columns is None or "date" in columns
+    read_cols = available if columns is None else [c for c in columns if c in available]
+    if want_date and day is None and "t" not in read_cols:
+        read_cols = read_cols + ["t"]
+
+    if missing:
+        df = dataset.schema.empty_table().select(read_cols).to_pandas()
+    else:
+        flt = None
+        if behavior:
+            flt = ds.field("dominant_behavior") == behavior
+        if hour is not None:
+            f_hour = ds.field("hour") == int(hour)
+            flt = f_hour if flt is None else flt & f_hour
+        df = dataset.to_table(columns=read_cols, filter=flt).to_pandas()
+
+    if frame_store.COMPACT_SCHEMA and "dominant_behavior" in df.columns:
+        # gleiche Kategorien wie im Frame-Store, auch für leere oder gefilterte Tage
+        df["dominant_behavior"] = df["dominant_behavior"].astype(pd.CategoricalDtype(BEHAVIORS))
+    if want_date:
+        if frame_store.COMPACT_SCHEMA:
+            df["date"] = (pd.Categorical.from_codes([0] * len(df), categories=[day])
+                          if day is not None else date_categorical(df["t"]))
+        else:
+            df["date"] = day if day is not None else df["t"].dt.date
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return df
+
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else "data/action_detection/loaded"
+    out = convert_pkl_to_parquet(folder)
+    print(f"Parquet-Dataset geschrieben: {out}")
@@ -1,9 +1,17 @@
-from dash import Input, Output, State, html
-from widgets.pig_behavior.plot_behavior_bar import generate_behavior_bar_plot
-from widgets.pig_behavior.plot_behavior_polar import generate_two_polar_charts
-from widgets.pig_behavior.plot_behavior_heatmap import generate_behavior_heatmap, generate_behavior_heatmap_for_day
+from dash import ClientsideFunction, Input, Output, State, html
+from widgets.lazy import lazy_callable
+from widgets.image_store import image_src, is_image_src
 from widgets.pig_behavior.layout import DEFAULT_XES_PATH, EXCLUDED_BEHAVIORS
 
+# Plot-Module (matplotlib, plotly.express, pm4py) erst beim ersten Callback importieren
+_BAR = "widgets.pig_behavior.plot_behavior_bar"
+_POLAR = "widgets.pig_behavior.plot_behavior_polar"
+_HEATMAP = "widgets.pig_behavior.plot_behavior_heatmap"
+generate_behavior_bar_plot = lazy_callable(_BAR, "generate_behavior_bar_plot")
+polar_counts = lazy_callable(_POLAR, "polar_counts")                  # Daten für assets/polar.js
+generate_behavior_heatmap = lazy_callable(_HEATMAP, "generate_behavior_heatmap")
+generate_behavior_heatmap_for_day = lazy_callable(_HEATMAP, "generate_behavior_heatmap_for_day")
+
 PKL_FOLDER = "data/action_detection/loaded"
 
 def register_callbacks(app):
@@ -13,32 +21,42 @@ def register_callbacks(app):
         State("behavior-thresholds", "data")
     )
     def update_bar_chart(behavior, thresholds):
-        image_src = generate_behavior_bar_plot(DEFAULT_XES_PATH, behavior, thresholds)
-        if isinstance(image_src, str) and image_src.startswith("data:image"):
-            return html.Img(src=image_src, style={"max-width": "100%"})
-        return html.P(image_src, style={"color": "red"})
+        img = generate_behavior_bar_plot(DEFAULT_XES_PATH, behavior, thresholds)
+        if is_image_src(img):
+            return html.Img(src=image_src(img), style={"max-width": "100%"})
+        return html.P(img, style={"color": "red"})
 
+    # Polarplots: Server liefert nur beim Datumswechsel die Zählungen Stunde × Verhalten,
+    # Stunde und Skala rechnet der Browser (assets/polar.js)
     @app.callback(
+        Output("polar-counts", "data"),
+        Input("polar-date-selector", "value")
+    )
+    def update_polar_counts(date):
+        return polar_counts(date)
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="polar", function_name="update"),
         Output("polar-graph-all", "figure"),
         Output("polar-graph-day", "figure"),
+        Input("polar-counts", "data"),
         Input("polar-hour-slider", "value"),
         Input("polar-scale-toggle", "value"),
-        Input("polar-date-selector", "value")
     )
-    def update_polar_plots(hour, scale, date):
-        return generate_two_polar_charts(hour, date, scale)
 
     @app.callback(
         Output("behavior-heatmap", "figure"),
         Input("heatmap-behavior-selector", "value"),
+        Input("heatmap-resolution-selector", "value"),
     )
-    def update_heatmap(behavior):
-        fig = generate_behavior_heatmap(PKL_FOLDER, behavior)
+    def update_heatmap(behavior, resolution):
+        fig = generate_behavior_heatmap(PKL_FOLDER, behavior, resolution or 60)
         return fig
     
     @app.callback(
         Output("single-day-heatmap", "figure"),
-        Input("heatmap-date-selector", "value")
+        Input("heatmap-date-selector", "value"),
+        Input("day-heatmap-resolution-selector", "value"),
     )
-    def update_single_day_heatmap(date_str):
-        return generate_behavior_heatmap_for_day(date_str)
\ No newline at end of file
+    def update_single_day_heatmap(date_str, resolution):
+        return generate_behavior_heatmap_for_day(date_str, resolution or 60)
\ No newline at end of file
@@ -1,10 +1,9 @@
 from dash import html, dcc
 import dash_bootstrap_components as dbc
-import pandas as pd
-import glob
-import os
 
 from widgets.pig_behavior.thresholds import get_behavior_thresholds
+from widgets.behavior_cube import RESOLUTION_LABELS
+from widgets.catalog import catalog_dates, catalog_hours
 from widgets.utils import get_available_behaviors, BEHAVIORS
 
 DEFAULT_XES_PATH = "data/clustered_log_10s.xes"
@@ -17,19 +16,12 @@ def layout():
     behaviors = get_available_behaviors(DEFAULT_XES_PATH, EXCLUDED_BEHAVIORS)
     thresholds = get_behavior_thresholds(DEFAULT_XES_PATH, behaviors)
 
-    # Stunden und Datum aus .pkl-Dateien extrahieren
-    file_list = sorted(glob.glob(os.path.join(PKL_FOLDER, "*.pkl")))
-    if not file_list:
+    # Stunden und Datum aus dem Datenkatalog (ohne die Frames zu laden)
+    dates = catalog_dates(PKL_FOLDER)
+    if not dates:
         return dbc.Alert("Keine PKL-Dateien gefunden!", color="danger", className="mb-3")
 
-    dfs = [pd.read_pickle(f) for f in file_list]
-    df = pd.concat(dfs)
-    df["t"] = pd.to_datetime(df["t"])
-    df["hour"] = df["t"].dt.hour
-    df["date"] = df["t"].dt.date
-
-    hours = sorted(df["hour"].unique())
-    dates = sorted({str(d) for d in df["date"].unique()})
+    hours = catalog_hours(PKL_FOLDER)
 
     return html.Div(
         [
@@ -123,6 +115,7 @@ def layout():
                     ),
                 ]
             ),
+            dcc.Store(id="polar-counts"),    # Stunde × Verhalten für assets/polar.js
 
             # ---------------- Section 3: Heatmap – Tagesmuster ----------------
             html.H5("Tagesmuster-Heatmap"),
@@ -141,6 +134,17 @@ def layout():
                         lg=4,
                         className="mb-3",
                     ),
+                    dbc.Col(
+                        dbc.RadioItems(
+                            id="heatmap-resolution-selector",
+                            options=[{"label": label, "value": m} for m, label in RESOLUTION_LABELS.items()],
+                            value=60,
+                            inline=True,
+                        ),
+                        xs=12,
+                        md=6,
+                        className="mb-3",
+                    ),
                 ]
             ),
             dbc.Card(dbc.CardBody(dcc.Graph(id="behavior-heatmap")), className="mb-4"),
@@ -162,6 +166,17 @@ def layout():
                         lg=4,
                         className="mb-3",
                     ),
+                    dbc.Col(
+                        dbc.RadioItems(
+                            id="day-heatmap-resolution-selector",
+                            options=[{"label": label, "value": m} for m, label in RESOLUTION_LABELS.items()],
+                            value=60,
+                            inline=True,
+                        ),
+                        xs=12,
+                        md=6,
+                        className="mb-3",
+                    ),
                 ]
             ),
             dbc.Card(dbc.CardBody(dcc.Graph(id="single-day-heatmap")), className="mb-2"),
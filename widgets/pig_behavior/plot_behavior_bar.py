@@ -1,26 +1,18 @@
-import matplotlib.pyplot as plt
-import io, base64
-import pandas as pd
-import matplotlib
 
-matplotlib.use("Agg")
+from widgets.pig_behavior.thresholds import daily_minutes_matrix
+from widgets.figure_cache import memoize_figure
+from widgets.image_store import figure_url, new_figure
 
+@memoize_figure(source_arg="xes_path")
 def generate_behavior_bar_plot(xes_path, behavior, thresholds):
-    from pm4py.objects.log.importer.xes import importer as xes_importer
-    import pm4py
-
-    log = xes_importer.apply(xes_path)
-    df = pm4py.convert_to_dataframe(log)
-    df['time:timestamp'] = pd.to_datetime(df['time:timestamp'])
-    df['duration_timedelta'] = pd.to_timedelta(df['duration'])
-    df['date'] = df['time:timestamp'].dt.date
-
-    df = df[df['concept:name'] == behavior]
-    if df.empty:
+    # Tagesminuten aus der gemeinsamen Datum × Verhalten-Matrix (siehe thresholds.py)
+    matrix = daily_minutes_matrix(xes_path)
+    if behavior not in matrix.columns:
         return f"Keine Daten für {behavior}"
 
-    daily_duration = df.groupby('date')['duration_timedelta'].sum()
-    daily_minutes = daily_duration.dt.total_seconds() / 60
+    daily_minutes = matrix[behavior].dropna()
+    if daily_minutes.empty:
+        return f"Keine Daten für {behavior}"
     t = thresholds[behavior]
 
     def colorize(v):
@@ -32,7 +24,8 @@ def generate_behavior_bar_plot(xes_path, behavior, thresholds):
 
     colors = daily_minutes.apply(colorize)
 
-    fig, ax = plt.subplots(figsize=(10, 4))
+    fig = new_figure((10, 4))
+    ax = fig.subplots()
     ax.bar(daily_minutes.index, daily_minutes.values, color=colors)
     ax.axhline(t["mean"], linestyle='-', color='black')
     ax.axhline(t["yellow_min"], linestyle='--', color='gray')
@@ -42,9 +35,4 @@ def generate_behavior_bar_plot(xes_path, behavior, thresholds):
     ax.set_title(f"{behavior} pro Tag")
     ax.set_ylabel("Minuten")
 
-    buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format="png")
-    plt.close(fig)
-    buf.seek(0)
-    return f"data:image/png;base64,{base64.b64encode(buf.read()).decode('utf-8')}"
+    return figure_url(fig)
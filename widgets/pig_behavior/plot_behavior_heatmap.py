@@ -1,34 +1,33 @@
-import pandas as pd
 import plotly.express as px
-from widgets.utils import load_behavior_data, BEHAVIORS
+from widgets.behavior_cube import bucket_counts, bucket_label, mean_pivot, window_buckets
+from widgets.utils import BEHAVIORS
+from widgets.figure_cache import memoize_figure
 
 PKL_FOLDER = "data/action_detection/loaded"
-HOURS_RANGE = range(6, 19)
+HOURS_RANGE = range(6, 19)          # Tagesfenster der Tages-Heatmap
+RESOLUTION = 60                     # Standard-Bucketgröße in Minuten (1, 5, 15, 60 oder 1440)
 
-def generate_behavior_heatmap(folder_path, behavior='feeding'):
-    df = load_behavior_data(folder_path)
-    if df.empty or behavior not in df.columns:
+@memoize_figure(source_arg="folder_path")
+def generate_behavior_heatmap(folder_path, behavior='feeding', resolution=RESOLUTION):
+    if behavior not in BEHAVIORS:
         return "Keine gültigen Daten gefunden."
 
-    df['date'] = pd.to_datetime(df['t']).dt.date
-    df['hour'] = pd.to_datetime(df['t']).dt.hour
-
-    # Gruppieren nach Tag und Stunde
-    grouped = df.groupby(['date', 'hour'])[behavior].mean().reset_index()
-
-    # Pivotieren für Heatmap
-    pivot = grouped.pivot(index='date', columns='hour', values=behavior)
+    # Datum × Bucket direkt aus der Rollup-Pyramide (bei 60 min: Spalten = Stunden)
+    pivot = mean_pivot(folder_path, behavior, resolution)
+    if pivot.empty:
+        return "Keine gültigen Daten gefunden."
+    hourly = int(resolution) == 60
 
     fig = px.imshow(
         pivot,
-        labels=dict(x="Stunde", y="Datum", color="Ø Verhalten (%)"),
-        x=pivot.columns.tolist(),
+        labels=dict(x="Stunde" if hourly else "Uhrzeit", y="Datum", color="Ø Verhalten (%)"),
+        x=pivot.columns.tolist() if hourly else [bucket_label(b, resolution) for b in pivot.columns],
         y=[str(d) for d in pivot.index],
         color_continuous_scale="OrRd",
         aspect="auto"
     )
     fig.update_layout(
-        title=f"Tagesmuster: {behavior} über Stunden",
+        title=f"Tagesmuster: {behavior} über {'Stunden' if hourly else 'den Tag'}",
         xaxis_nticks=24,
         yaxis_autorange="reversed"
     )
@@ -36,37 +35,35 @@ def generate_behavior_heatmap(folder_path, behavior='feeding'):
     return fig
 
 
-def generate_behavior_heatmap_for_day(date_str):
-    df = load_behavior_data(PKL_FOLDER)
-    if df.empty:
-        return "Keine Daten vorhanden."
-
-    target_date = pd.to_datetime(date_str).date()
-    df = df[df['date'] == target_date]
-    if df.empty:
+@memoize_figure(source=lambda: PKL_FOLDER)
+def generate_behavior_heatmap_for_day(date_str, resolution=RESOLUTION):
+    # Frames je Bucket und dominantem Verhalten aus der Rollup-Pyramide
+    counts = bucket_counts(PKL_FOLDER, resolution, date=date_str)
+    if counts.empty:
         return f"Keine Daten für {date_str}"
 
-    df = df[df['hour'].isin(HOURS_RANGE)]
-    df['dominant_behavior'] = df[BEHAVIORS].idxmax(axis=1)
-
-    grouped = df.groupby(['hour', 'dominant_behavior']).size().reset_index(name='count')
-    total_per_hour = grouped.groupby('hour')['count'].transform('sum')
-    grouped['percentage'] = (grouped['count'] / total_per_hour * 100).round(1)
+    window = window_buckets(resolution, HOURS_RANGE)
+    counts = counts[counts.index.isin(window) & (counts.sum(axis=1) > 0)]
+    percentage = (counts.div(counts.sum(axis=1), axis=0) * 100).round(1).where(counts > 0)
+    hourly = int(resolution) == 60
+    percentage.index = (percentage.index // 60 if hourly
+                        else [bucket_label(b, resolution) for b in percentage.index])
+    percentage = percentage.rename_axis('hour')
 
-    # Pivotieren zu Stunden (x) und Verhalten (y)
-    pivot = grouped.pivot(index='dominant_behavior', columns='hour', values='percentage')
-    pivot = pivot.reindex(index=[b for b in BEHAVIORS if b in pivot.index])
+    # Buckets (x) und Verhalten (y); nur Verhalten, die an dem Tag vorkommen
+    pivot = percentage.T.rename_axis('dominant_behavior')
+    pivot = pivot.reindex(index=[b for b in BEHAVIORS if counts[b].sum() > 0])
     
     fig = px.imshow(
         pivot,
         color_continuous_scale='OrRd',
-        labels=dict(x="Stunde", y="Verhalten", color="Anteil (%)"),
-        text_auto=True,
+        labels=dict(x="Stunde" if hourly else "Uhrzeit", y="Verhalten", color="Anteil (%)"),
+        text_auto=int(resolution) >= 15,
         aspect="auto"
     )
     fig.update_layout(
         title=f"Aktivitätsbudget als Heatmap ({date_str})",
-        xaxis=dict(tickmode='linear'),
+        xaxis=dict(tickmode='linear') if hourly else dict(type='category'),
         yaxis=dict(autorange="reversed")
     )
     return fig
\ No newline at end of file
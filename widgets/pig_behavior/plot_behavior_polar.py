@@ -1,14 +1,26 @@
+import json
+
 import pandas as pd
 import plotly.express as px
-from widgets.utils import load_behavior_data, BEHAVIORS
+from widgets.behavior_cube import get_cube, hour_counts
+from widgets.utils import BEHAVIORS
+from widgets.figure_cache import memoize_figure
+
+PKL_FOLDER = "data/action_detection/loaded"
 
 def generate_polar_figure(df, hour, title_prefix="Aktivitätsverteilung", scale="linear"):
-    hour_df = df[df['hour'] == hour]
+    hour_df = df[df['hour'] == hour] if not df.empty else df
+    counts = hour_df['dominant_behavior'].value_counts() if not hour_df.empty else pd.Series(dtype=int)
+    return polar_figure_from_counts(counts, hour, title_prefix=title_prefix, scale=scale)
+
 
-    if hour_df.empty:
+def polar_figure_from_counts(counts, hour, title_prefix="Aktivitätsverteilung", scale="linear"):
+    """Polarplot aus fertigen Zählungen (Series: Verhalten -> Anzahl Frames)."""
+    counts = counts.reindex(BEHAVIORS, fill_value=0).astype(int)
+    if counts.sum() == 0:
         return px.bar_polar(title=f"{title_prefix} um {hour}:00 Uhr – keine Daten")
 
-    behavior_counts = hour_df['dominant_behavior'].value_counts().reindex(BEHAVIORS, fill_value=0).reset_index()
+    behavior_counts = counts.reset_index()
     behavior_counts.columns = ['behavior', 'count']
     behavior_counts['percentage'] = (behavior_counts['count'] / behavior_counts['count'].sum() * 100).round(1)
     behavior_counts['tooltip'] = behavior_counts.apply(
@@ -36,22 +48,62 @@ def generate_polar_figure(df, hour, title_prefix="Aktivitätsverteilung", scale=
 
 
 def generate_two_polar_charts(hour, date, scale="linear"):
-    df = load_behavior_data("data/action_detection/loaded")  # Pfad wird übergeben
-
-    if df.empty:
+    """
+    Referenzimplementierung der beiden Polarplots (aggregiert, Tag) auf dem Server. Die Seite
+    zeichnet sie im Browser (assets/polar.js aus polar_counts); diese Funktion dient nur noch
+    zum Abgleich und für benchmarks/bench_suite.py, deshalb ohne Figuren-Cache.
+    """
+    # Zählungen je Stunde aus dem Datum × Stunde × Verhalten-Würfel
+    if get_cube(PKL_FOLDER).empty:
         return (
             px.bar_polar(title="Keine Daten für aggregierten Plot"),
             px.bar_polar(title="Keine Daten für Tagesplot")
         )
 
-    fig_all = generate_polar_figure(df, hour, title_prefix="Aggregierte Verteilung", scale=scale)
+    all_counts = hour_counts(PKL_FOLDER)
+    counts_all = all_counts.loc[hour] if hour in all_counts.index else pd.Series(dtype=int)
+    fig_all = polar_figure_from_counts(counts_all, hour, title_prefix="Aggregierte Verteilung", scale=scale)
 
     try:
-        day = pd.to_datetime(date).date()
-        df_day = df[df['date'] == day]
+        day_counts = hour_counts(PKL_FOLDER, date=date)
+        counts_day = day_counts.loc[hour] if hour in day_counts.index else pd.Series(dtype=int)
     except Exception:
-        df_day = pd.DataFrame()
+        counts_day = pd.Series(dtype=int)
 
-    fig_day = generate_polar_figure(df_day, hour, title_prefix=f"Verteilung am {date}", scale=scale)
+    fig_day = polar_figure_from_counts(counts_day, hour, title_prefix=f"Verteilung am {date}", scale=scale)
 
     return fig_all, fig_day
+
+
+def _polar_base():
+    """Trace- und Layout-Vorlage eines px.bar_polar (Template, Farbskala, Achsen) als JSON-Dict."""
+    fig = json.loads(polar_figure_from_counts(pd.Series(1, index=BEHAVIORS), 0).to_json())
+    trace = fig["data"][0]
+    for key in ("r", "theta", "hovertext"):
+        trace.pop(key, None)
+    trace["marker"].pop("color", None)
+    return {"trace": trace, "layout": fig["layout"]}
+
+
+@memoize_figure(source=lambda: PKL_FOLDER)
+def polar_counts(date):
+    """
+    Daten für die clientseitigen Polarplots (assets/polar.js), JSON-tauglich:
+    {"date", "hours": 0–23, "behaviors", "all": Stunde × Verhalten (alle Tage),
+     "day": Stunde × Verhalten (date), "base": {"trace", "layout"}}.
+    Stunde und Skala wählt der Browser, der Server wird nur beim Datumswechsel gefragt.
+    """
+    hours = list(range(24))
+    all_counts = hour_counts(PKL_FOLDER, hours=hours)
+    try:
+        day_counts = hour_counts(PKL_FOLDER, date=date, hours=hours)
+    except Exception:
+        day_counts = all_counts * 0
+    return {
+        "date": date,
+        "hours": hours,
+        "behaviors": BEHAVIORS,
+        "all": all_counts[BEHAVIORS].astype(int).values.tolist(),
+        "day": day_counts[BEHAVIORS].astype(int).values.tolist(),
+        "base": _polar_base(),
+    }
@@ -1,27 +1,108 @@
-def get_behavior_thresholds(xes_path, behaviors):
-    from pm4py.objects.log.importer.xes import importer as xes_importer
-    import pm4py
-    import pandas as pd
+"""
+Tagesdauern je Verhalten und daraus abgeleitete Schwellenwerte.
+
+Funktionen:
+- daily_minutes_matrix(xes_path)               # Datum × Verhalten, Minuten pro Tag
+- behavior_bands(xes_path, quantiles)          # mean, std und Quantile für alle Verhalten
+- get_behavior_thresholds(xes_path, behaviors) # Schwellenwerte für Balkendiagramm/Store
+
+Design:
+- Die Matrix entsteht in einem einzigen groupby über (Datum, Verhalten) und wird pro XES
+  zwischengespeichert (gültig, solange mtime/Größe der Datei gleich bleiben, wie beim
+  Eventlog-Cache in widgets.utils).
+- Tage, an denen ein Verhalten nicht vorkommt, bleiben NaN (nicht 0): Mittelwert und Balken
+  beziehen sich wie bisher nur auf Tage mit Vorkommen.
+- Rückgabe immer als Kopie, Aufrufer dürfen das Ergebnis verändern.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from widgets.utils import load_event_log
+
+DEFAULT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+# key: xes_path (normalisiert) -> ((mtime_ns, size), DataFrame)
+_MATRIX_CACHE = {}
+_MATRIX_LOCK = threading.Lock()
+
 
-    log = xes_importer.apply(xes_path)
-    df = pm4py.convert_to_dataframe(log)
-    df['time:timestamp'] = pd.to_datetime(df['time:timestamp'])
-    df['duration_timedelta'] = pd.to_timedelta(df['duration'])
-    df['date'] = df['time:timestamp'].dt.date
+def _build_matrix(xes_path):
+    df = load_event_log(xes_path)
+    # Kalendertag des (UTC-)Zeitstempels
+    day = df['time:timestamp'].to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+    minutes = (
+        pd.DataFrame({"date": day, "behavior": df['concept:name'],
+                      "minutes": df['duration_s'].to_numpy() / 60})
+        .groupby(["date", "behavior"], observed=True, sort=True)["minutes"].sum()
+        .unstack("behavior")
+    )
+    minutes.index = pd.Index(minutes.index.date, name="date")
+    minutes.columns = pd.Index([str(c) for c in minutes.columns], name="behavior")
+    return minutes
+
+
+def daily_minutes_matrix(xes_path):
+    """
+    Minuten pro Tag und Verhalten: Index = Datum (datetime.date), Spalten = Verhalten.
+    NaN = Verhalten kam an diesem Tag nicht vor.
+    """
+    key = os.path.normpath(xes_path)
+    st = os.stat(xes_path)
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    entry = _MATRIX_CACHE.get(key)
+    if entry is None or entry[0] != stamp:
+        with _MATRIX_LOCK:
+            entry = _MATRIX_CACHE.get(key)
+            if entry is None or entry[0] != stamp:
+                entry = (stamp, _build_matrix(xes_path))
+                _MATRIX_CACHE[key] = entry
+    return entry[1].copy()
+
+
+def behavior_bands(xes_path, quantiles=DEFAULT_QUANTILES):
+    """
+    Kennzahlen der Tagesminuten für alle Verhalten auf einmal.
+    Index = Verhalten, Spalten: days, mean, std, q10, q25, q50, ... (je nach quantiles)
+    """
+    matrix = daily_minutes_matrix(xes_path)
+    bands = pd.DataFrame({
+        "days": matrix.count(),
+        "mean": matrix.mean(),
+        "std": matrix.std(),
+    })
+    if len(quantiles):
+        q = matrix.quantile(list(quantiles)).T
+        q.columns = [f"q{int(round(p * 100))}" for p in quantiles]
+        bands = bands.join(q)
+    return bands
+
+
+def get_behavior_thresholds(xes_path, behaviors):
+    """
+    Schwellenwerte je Verhalten (gelb: ±10 %, rot: ±20 % um den Mittelwert) plus
+    Standardabweichung und Quantil-Bänder (q10 … q90). Nur JSON-taugliche floats,
+    das Ergebnis landet im dcc.Store.
+    """
+    bands = behavior_bands(xes_path)
 
     thresholds = {}
     for b in behaviors:
-        sub = df[df['concept:name'] == b]
-        if sub.empty:
+        if b not in bands.index or bands.at[b, "days"] == 0:
             continue
-        daily = sub.groupby('date')['duration_timedelta'].sum()
-        minutes = daily.dt.total_seconds() / 60
-        mean = minutes.mean()
+        row = bands.loc[b]
+        mean = float(row["mean"])
         thresholds[b] = {
             "mean": mean,
             "yellow_min": mean * 0.9,
             "yellow_max": mean * 1.1,
             "red_min": mean * 0.8,
-            "red_max": mean * 1.2
+            "red_max": mean * 1.2,
+            "std": float(row["std"]) if np.isfinite(row["std"]) else 0.0,
+            **{c: float(row[c]) for c in bands.columns if c.startswith("q")},
         }
     return thresholds
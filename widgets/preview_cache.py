@@ -0,0 +1,152 @@
+"""
+Vorschaukarten der Startseite: im Hintergrund berechnet, pro Datenversion gecacht und nach
+dem Prinzip stale-while-revalidate ausgeliefert.
+
+Funktionen:
+- get_previews(folder_path, jobs, wait_s)      # {Name: Ergebnis} sofort aus dem Cache
+- refresh_previews(folder_path, jobs)          # Neuberechnung asynchron anstoßen (Future)
+- preview_status(folder_path)                  # Version, Alter, laufende Neuberechnung
+- clear_previews()
+
+Design:
+- jobs = {Name: Funktion ohne Argumente}; jede Funktion liefert das fertige Ergebnis (in
+  app.py die Dash-Karte) und fängt ihre Fehler selbst ab. Die Jobs einer Neuberechnung
+  laufen gleichzeitig in einem Thread-Pool (Rendern ist seit dem OO-Umbau ohne pyplot
+  thread-sicher), die Neuberechnung selbst in einem eigenen Hintergrund-Thread.
+- Schlüssel ist frame_store.data_version des Ordners. Passt der Cache zur aktuellen Version,
+  wird er direkt zurückgegeben. Sonst wird (höchstens einmal gleichzeitig pro Ordner) neu
+  berechnet und bis dahin das alte Ergebnis ausgeliefert. Nur ganz ohne Ergebnis wartet der
+  Aufrufer bis zu wait_s Sekunden (None = bis fertig, danach None = noch nicht fertig).
+- Ab dem ersten Aufruf prüft ein Daemon-Thread alle WATCH_INTERVAL_S Sekunden die
+  Datenversion und rechnet bei neuen Daten auch ohne Seitenaufruf neu.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Optional
+
+from widgets.frame_store import data_version
+
+WATCH_INTERVAL_S = 30.0
+
+# folder_path -> {"version", "results", "computed_at", "seconds", "pending", "pending_version", "jobs"}
+_PREVIEWS: Dict[str, dict] = {}
+_PREVIEWS_LOCK = threading.Lock()
+_WATCHERS: Dict[str, threading.Thread] = {}
+
+# eine Neuberechnung nach der anderen; die Karten darin laufen parallel
+_REFRESH_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview-refresh")
+
+
+def _compute(folder_path: str, version: str, jobs: Dict[str, Callable]) -> dict:
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, len(jobs)),
+                            thread_name_prefix="preview-card") as pool:
+        futures = {name: pool.submit(job) for name, job in jobs.items()}
+        results = {name: f.result() for name, f in futures.items()}
+    with _PREVIEWS_LOCK:
+        entry = _PREVIEWS.setdefault(folder_path, {})
+        entry.update(version=version, results=results, computed_at=time.time(),
+                     seconds=time.perf_counter() - t0)
+        if entry.get("pending_version") == version:
+            entry.update(pending=None, pending_version=None)
+    return results
+
+
+def _clear_pending(folder_path: str, future: Future) -> None:
+    # Fehlschlag der Neuberechnung: nächster Aufruf darf es erneut versuchen
+    if future.exception() is not None:
+        with _PREVIEWS_LOCK:
+            entry = _PREVIEWS.get(folder_path, {})
+            if entry.get("pending") is future:
+                entry.update(pending=None, pending_version=None)
+
+
+def refresh_previews(folder_path: str, jobs: Dict[str, Callable],
+                     version: Optional[str] = None) -> Future:
+    """Stößt die Neuberechnung für die aktuelle Datenversion an (läuft sie schon: dieselbe Future)."""
+    version = version or data_version(folder_path)
+    with _PREVIEWS_LOCK:
+        entry = _PREVIEWS.setdefault(folder_path, {})
+        entry["jobs"] = jobs
+        pending = entry.get("pending")
+        if pending is not None and entry.get("pending_version") == version:
+            return pending
+        future = _REFRESH_POOL.submit(_compute, folder_path, version, jobs)
+        entry.update(pending=future, pending_version=version)
+    future.add_done_callback(lambda f: _clear_pending(folder_path, f))
+    return future
+
+
+def _watch(folder_path: str) -> None:
+    while True:
+        time.sleep(WATCH_INTERVAL_S)
+        try:
+            version = data_version(folder_path)
+            with _PREVIEWS_LOCK:
+                entry = _PREVIEWS.get(folder_path)
+                jobs = entry.get("jobs") if entry else None
+                current = entry is not None and entry.get("version") == version
+            if jobs and not current:
+                refresh_previews(folder_path, jobs, version)
+        except Exception:
+            pass  # Ordner kurzzeitig nicht lesbar o. Ä.: nächster Durchlauf
+
+
+def _ensure_watcher(folder_path: str) -> None:
+    with _PREVIEWS_LOCK:
+        if folder_path in _WATCHERS:
+            return
+        thread = threading.Thread(target=_watch, args=(folder_path,), daemon=True,
+                                  name=f"preview-watch:{folder_path}")
+        _WATCHERS[folder_path] = thread
+    thread.start()
+
+
+def get_previews(folder_path: str, jobs: Dict[str, Callable],
+                 wait_s: Optional[float] = None) -> Optional[dict]:
+    """
+    Ergebnisse aller jobs für folder_path. Aktuell -> sofort; veraltet -> altes Ergebnis
+    sofort, Neuberechnung im Hintergrund; noch keins -> bis zu wait_s warten (sonst None).
+    Ergebnisse nicht verändern (werden bei jedem Besuch wiederverwendet).
+    """
+    _ensure_watcher(folder_path)
+    version = data_version(folder_path)
+    with _PREVIEWS_LOCK:
+        entry = _PREVIEWS.get(folder_path, {})
+        results = entry.get("results")
+        if results is not None and entry.get("version") == version:
+            return results
+    future = refresh_previews(folder_path, jobs, version)
+    if results is not None:
+        return results
+    try:
+        return future.result(timeout=wait_s)
+    except FutureTimeout:
+        return None
+
+
+def preview_status(folder_path: str) -> dict:
+    """{"version", "age_s", "seconds" (letzte Berechnung), "refreshing", "stale"}."""
+    current = data_version(folder_path)
+    with _PREVIEWS_LOCK:
+        entry = dict(_PREVIEWS.get(folder_path, {}))
+    computed_at = entry.get("computed_at")
+    return {
+        "version": entry.get("version"),
+        "age_s": time.time() - computed_at if computed_at else None,
+        "seconds": entry.get("seconds"),
+        "refreshing": entry.get("pending") is not None,
+        "stale": entry.get("version") != current,
+    }
+
+
+def clear_previews() -> None:
+    """Verwirft alle gecachten Vorschauen (laufende Neuberechnungen schreiben danach neu)."""
+    with _PREVIEWS_LOCK:
+        for entry in _PREVIEWS.values():
+            entry.pop("results", None)
+            entry.pop("version", None)
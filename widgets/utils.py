@@ -1,56 +1,282 @@
-import pandas as pd
-import glob
+import hashlib
 import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from widgets.metrics import count_rows, stage
 
 # Globale Definition der Verhaltensspalten
 BEHAVIORS = ['lying', 'sitting', 'standing', 'moving',
              'investigating', 'feeding', 'defecating', 'playing']
 
 def load_behavior_data(folder_path, exclude=None):
-    file_list = sorted(glob.glob(os.path.join(folder_path, "*.pkl")))
-    if not file_list:
-        return pd.DataFrame()
+    """
+    Alle Frames des Ordners inkl. hour, date, dominant_behavior und x/y-Mittelpunkt.
+    Gelesen wird über den prozessweiten Frame-Store (widgets.frame_store): Die Dateien
+    werden nur bei geänderter Datenversion neu geladen, zurück kommt eine View.
+    """
+    from widgets.frame_store import get_frames
 
-    dfs = []
-    for file in file_list:
-        df = pd.read_pickle(file)
+    df = get_frames(folder_path)
+    if df.empty:
+        return df
 
-        # sicherstellen, dass Zeitspalte existiert
-        if 't' not in df.columns:
-            continue
+    # Verhalten ausschließen
+    if exclude:
+        df = df[~df['dominant_behavior'].isin(exclude)]
 
-        df['t'] = pd.to_datetime(df['t'])
-        dfs.append(df)
+    return df
 
-    if not dfs:
-        return pd.DataFrame()
 
-    df = pd.concat(dfs)
+def load_behavior_slice(folder_path, date=None, columns=None, behavior=None, hour=None):
+    """
+    Variante von load_behavior_data, die nur einen Ausschnitt liefert.
 
-    # Spalten berechnen
-    df['hour'] = df['t'].dt.hour
-    df['date'] = df['t'].dt.date
+    - date:     nur dieser Tag ('YYYY-MM-DD' oder datetime.date), None = alle Tage
+    - columns:  nur diese Spalten, None = alle
+    - behavior: nur Frames mit diesem dominant_behavior, None = alle
+    - hour:     nur diese Stunde, None = alle
 
-    # dominantes Verhalten
-    df['dominant_behavior'] = df[BEHAVIORS].idxmax(axis=1)
+    Quelle: der Frame-Store, wenn er bereits warm ist (Tag/Stunde per Offset-Index als
+    Zero-Copy-Slice); sonst ein aktuelles Parquet-Dataset (liest nur die Partition des Tages
+    und die angefragten Spalten); sonst Frame-Store laden.
 
-    # Mittelpunktberechnung
-    df['x_center'] = (df['x1'] + df['x2']) / 2
-    df['y_center'] = (df['y1'] + df['y2']) / 2
+    Gemessen als Stufe "filter" (inkl. eines ggf. nötigen Ladens), Zeilen = Ergebnisgröße.
+    """
+    with stage("filter"):
+        df = _behavior_slice(folder_path, date, columns, behavior, hour)
+    count_rows(len(df))
+    return df
 
-    # Verhalten ausschließen
-    if exclude:
-        df = df[~df['dominant_behavior'].isin(exclude)]
 
+def _behavior_slice(folder_path, date, columns, behavior, hour):
+    from widgets.frame_store import cached_frames, day_ranges, get_day_slice, get_frames
+    from widgets.parquet_store import dataset_is_fresh, dataset_path_for, read_dataset
+
+    if cached_frames(folder_path) is None and dataset_is_fresh(folder_path):
+        return read_dataset(dataset_path_for(folder_path), date=date, columns=columns,
+                            behavior=behavior, hour=hour)
+
+    if date is not None:
+        df = get_day_slice(folder_path, date, hour=hour)
+    elif hour is not None:
+        # Stunde über alle Tage: nur die (Tag, Stunde)-Slices zusammenfügen
+        parts = [get_day_slice(folder_path, d, hour=hour) for d in day_ranges(folder_path)]
+        df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    else:
+        df = get_frames(folder_path)
+    if df.empty:
+        return df
+
+    if behavior:
+        df = df[df['dominant_behavior'] == behavior]
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
     return df
 
 
-def get_available_behaviors(xes_path, exclude=None):
-    from pm4py.objects.log.importer.xes import importer as xes_importer
-    import pm4py
+# ---------------- XES-Eventlog (spaltenweiser Cache) ----------------
+
+# Spalten des aufbereiteten Eventlogs
+XES_COLUMNS = ["case:concept:name", "concept:name", "time:timestamp", "duration_s"]
+# erhöhen, wenn sich Inhalt/Bedeutung des Caches ändert
+XES_CACHE_SCHEMA = 2
+
+# key: xes_path (normalisiert) -> ((mtime_ns, size), DataFrame)
+_XES_CACHE = {}
+_XES_LOCK = threading.Lock()
+
+
+def _xes_cache_path(xes_path):
+    folder, name = os.path.split(xes_path)
+    return os.path.join(folder, "_derived", os.path.splitext(name)[0] + ".xes.npz")
+
+
+def _file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _sorted_categories(codes, categories):
+    """Kategorien alphabetisch sortieren und Codes entsprechend umnummern."""
+    categories = np.asarray(categories, dtype=str)
+    order = np.argsort(categories, kind="stable")
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    return remap[codes] if len(codes) else codes, categories[order]
 
-    log = xes_importer.apply(xes_path)
-    df = pm4py.convert_to_dataframe(log)
+
+def read_xes_columns(xes_path):
+    """
+    Streaming-Leser für XES (iterparse), spezialisiert auf die Attribute des Dashboards.
+
+    Extrahiert pro Event nur concept:name, time:timestamp, duration und die Trace-ID
+    (concept:name der Trace) und schreibt sie direkt in typisierte Arrays; verarbeitete
+    Elemente werden sofort aus dem Baum entfernt. Kein EventLog-Objektgraph wie bei pm4py.
+
+    Rückgabe (spaltenweise, wie im Cache):
+    case_codes/case_categories, name_codes/name_categories, ts (int64 ns UTC), duration_s
+    """
+    from array import array
+    try:
+        # lxml (kommt mit pm4py) filtert die Tags bereits im Parser
+        from lxml import etree as ET
+        only_tags = {"tag": ("{*}trace", "{*}event")}
+    except ImportError:
+        import xml.etree.ElementTree as ET
+        only_tags = {}
+
+    case_codes, name_codes = array("i"), array("i")
+    ts_raw, dur_raw = [], array("d")
+    case_index, name_index = {}, {}
+    trace_names = []                 # Trace-Nr. -> Name (kann nach den Events kommen)
+
+    trace = None
+    trace_no = -1
+    dur_seconds = {}                 # Dauer-Rohwert -> Sekunden (Werte wiederholen sich stark)
+
+    # 'start' nur für trace (zum Entfernen der Events), die Attribute werden am Event-Ende
+    # aus dessen direkten Kindern gelesen.
+    for kind, elem in ET.iterparse(xes_path, events=("start", "end"), **only_tags):
+        tag = elem.tag
+        if kind == "start":
+            if tag.endswith("trace"):
+                trace, trace_no = elem, trace_no + 1
+                trace_names.append("")
+            continue
+
+        if tag.endswith("event"):
+            if trace is None:
+                continue             # Events außerhalb von Traces ignorieren
+            name = ts = dur = None
+            for child in elem:
+                key = child.get("key")
+                if key == "concept:name":
+                    name = child.get("value")
+                elif key == "time:timestamp":
+                    ts = child.get("value")
+                elif key == "duration":
+                    raw = child.get("value")
+                    if child.tag.endswith(("float", "int")):
+                        raw = float(raw)
+                    dur = dur_seconds.get(raw)
+                    if dur is None:
+                        dur = dur_seconds[raw] = pd.Timedelta(raw).total_seconds()
+            case_codes.append(trace_no)
+            name_codes.append(name_index.setdefault(name or "", len(name_index)))
+            ts_raw.append(ts)
+            dur_raw.append(np.nan if dur is None else dur)
+            trace.remove(elem)
+        elif tag.endswith("trace") and trace is elem:
+            for child in elem:       # übrig sind nur noch die Trace-Attribute
+                if child.get("key") == "concept:name":
+                    trace_names[trace_no] = child.get("value") or ""
+            elem.clear()
+            trace = None
+
+    # Trace-Namen faktorisieren (gleiche Namen -> gleicher Code)
+    for name in trace_names:
+        case_index.setdefault(name, len(case_index))
+    trace_to_case = np.array([case_index[n] for n in trace_names], dtype=np.int32)
+    case = trace_to_case[np.frombuffer(case_codes, dtype=np.int32)] if len(case_codes) else \
+        np.zeros(0, dtype=np.int32)
+    names = np.frombuffer(name_codes, dtype=np.int32).copy()
+
+    ts = pd.to_datetime(pd.Series(ts_raw, dtype=object), utc=True, format="ISO8601")
+
+    case, case_cat = _sorted_categories(case, list(case_index))
+    names, name_cat = _sorted_categories(names, list(name_index))
+    return {
+        "case_codes": case.astype(np.int32),
+        "case_categories": case_cat,
+        "name_codes": names.astype(np.int32),
+        "name_categories": name_cat,
+        "ts": ts.to_numpy(dtype="datetime64[ns]").view(np.int64),
+        "duration_s": np.frombuffer(dur_raw, dtype=np.float64).copy(),
+    }
+
+
+def _event_log_frame(cols):
+    case_cat, case_codes = cols["case_categories"], cols["case_codes"]
+    name_cat, name_codes = cols["name_categories"], cols["name_codes"]
+    return pd.DataFrame({
+        "case:concept:name": pd.Categorical.from_codes(case_codes, categories=case_cat.tolist()),
+        "concept:name": pd.Categorical.from_codes(name_codes, categories=name_cat.tolist()),
+        "time:timestamp": pd.to_datetime(cols["ts"], unit="ns", utc=True),
+        "duration_s": cols["duration_s"],
+    })
+
+
+def _read_xes_cache(xes_path, stamp):
+    """Spalten aus dem Cache-File; bei geänderter mtime/Größe entscheidet der Inhalts-Hash."""
+    path = _xes_cache_path(xes_path)
+    try:
+        with np.load(path) as npz:
+            cols = {k: npz[k] for k in npz.files}
+    except (OSError, ValueError):
+        return None
+    meta = cols.pop("meta")
+    sha1 = str(cols.pop("sha1"))
+    if int(meta[0]) != XES_CACHE_SCHEMA:
+        return None
+    if (int(meta[1]), int(meta[2])) != stamp:
+        if _file_sha1(xes_path) != sha1:
+            return None
+        _write_xes_cache(xes_path, stamp, sha1, cols)  # nur berührt -> Stempel aktualisieren
+    return cols
+
+
+def _write_xes_cache(xes_path, stamp, sha1, cols):
+    target = _xes_cache_path(xes_path)
+    tmp = target + ".tmp.npz"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        meta = np.array([XES_CACHE_SCHEMA, stamp[0], stamp[1]], dtype=np.int64)
+        np.savez(tmp, meta=meta, sha1=np.array(sha1), **cols)
+        os.replace(tmp, target)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def load_event_log(xes_path):
+    """
+    Eventlog als kompaktes, spaltenweises DataFrame (siehe XES_COLUMNS):
+    case:concept:name und concept:name kategorial, time:timestamp (UTC), duration_s in Sekunden.
+
+    Das XES wird nur einmal geparst (read_xes_columns): Ergebnis liegt im Prozess-Cache und als
+    <ordner>/_derived/<name>.xes.npz auf der Platte. Ungültig wird der Cache, wenn sich
+    mtime/Größe ändern UND der Inhalts-Hash nicht mehr passt.
+    Rückgabe: flache Kopie, Änderungen wirken nicht auf den Cache.
+    """
+    key = os.path.normpath(xes_path)
+    st = os.stat(xes_path)
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    entry = _XES_CACHE.get(key)
+    if entry is None or entry[0] != stamp:
+        with _XES_LOCK:
+            entry = _XES_CACHE.get(key)
+            if entry is None or entry[0] != stamp:
+                cols = _read_xes_cache(xes_path, stamp)
+                if cols is None:
+                    sha1 = _file_sha1(xes_path)
+                    cols = read_xes_columns(xes_path)
+                    _write_xes_cache(xes_path, stamp, sha1, cols)
+                entry = (stamp, _event_log_frame(cols))
+                _XES_CACHE[key] = entry
+    return entry[1].copy(deep=False)
+
+
+def get_available_behaviors(xes_path, exclude=None):
+    df = load_event_log(xes_path)
     behaviors = sorted(df['concept:name'].unique())
     if exclude:
         behaviors = [b for b in behaviors if b not in exclude]